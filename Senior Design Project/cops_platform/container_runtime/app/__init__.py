@@ -3,7 +3,7 @@ from .extensions import api
 from flask_cors import CORS
 from ..config import config
 from flask_sqlalchemy import SQLAlchemy
-import docker
+from .utils.logging_util import get_module_logger, init_logging
 
 # Global object for communicating with the database
 db = SQLAlchemy()
@@ -12,6 +12,8 @@ DOCKER_CLIENT = None
 # Global boolean for whether this application is working with SELinux enforced
 ENFORCED = False
 
+logger = get_module_logger(__name__)
+
 
 def create_app(config_name='default'):
     """
@@ -26,10 +28,13 @@ def create_app(config_name='default'):
     app = Flask(__name__)
 
     # Sets the configurations for this app based on the passed in config_name string value
-    # NOTE: For now, just using the 'default' config_name string as there is only one config setting
+    # NOTE: 'default' runs the service containers with Docker and Postgres, 'simulated' runs them in process
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
 
+    # Configures the queued logging of the process (see the logging_util module)
+    init_logging(app.config)
+
     # By default allows CORS for all domains on all routes
     # NOTE: In a real application would want to restrict this to specific addresses
     # "support_credentials=True" allows CORS to pass a session cookie for authentication
@@ -41,9 +46,11 @@ def create_app(config_name='default'):
     # Initializes the db object for this app
     db.init_app(app)
 
-    # Create the global docker client from the environment
+    # Create the global docker client from the environment, or the configured container backend
+    # Imported here since the simulated backend imports from the utils package
+    from .utils.container_backend import create_container_backend
     global DOCKER_CLIENT
-    DOCKER_CLIENT = docker.from_env()
+    DOCKER_CLIENT = create_container_backend(app.config)
 
     # Registers the api endpoints for this app
     __register_api(app)
@@ -55,10 +62,38 @@ def create_app(config_name='default'):
     # NOTE: Would likely not want this option in a real application
     # but it makes testing easier for machines that don't support SELinux
     if app.config['ENFORCED']:
-        print("Running with SELinux enforced")
+        logger.info("Running with SELinux enforced")
         ENFORCED = True
     else:
-        print("Running without SELinux enforced")
+        logger.info("Running without SELinux enforced")
+
+    # Creates the tracer that records the phases of every service request, health check, and shutdown,
+    # starts the manager of the SELinux ip labels (labeling the pre-labeled ip pool, if configured),
+    # starts the shared database connection multiplexer (if configured),
+    # creates the cache of authorization levels, the HTTP client used for requests to the services,
+    # the allocator for the host ports of service containers,
+    # the coordinator for shutting down the Container Runtime,
+    # starts the scheduler that runs the health checks for every running session,
+    # and starts filling the warm pools of ready containers for each service and role
+    # Imported here since these require the app to be initialized
+    from .utils.tracing import init_tracer
+    from .utils.label_manager import init_label_manager
+    from .utils.db_multiplexer import init_db_multiplexer
+    from .utils.auth_cache import init_authorization_cache
+    from .utils.http_client import init_http_client
+    from .utils.port_allocator import init_port_allocator
+    from .utils.shutdown import init_shutdown_coordinator
+    from .utils.health_check import init_health_check_scheduler
+    from .utils.warm_pool import init_warm_pools
+    init_tracer(app.config)
+    init_label_manager(app.config)
+    init_db_multiplexer(app.config)
+    init_authorization_cache(app.config)
+    init_http_client(app.config)
+    init_port_allocator(app.config)
+    init_shutdown_coordinator(app.config)
+    init_health_check_scheduler(app.config)
+    init_warm_pools(app.config)
 
     return app
 
@@ -78,9 +113,12 @@ def __register_api(app):
 
     # Imports for controller classes must be done after app is initialized
     from .controllers.service_controller import ServiceRequest
+    from .controllers.trace_controller import Traces, TraceSummary
 
     # Adds API routes from the controller classes to the app
     api.add_resource(ServiceRequest, "/service_request")
+    api.add_resource(Traces, "/admin/traces")
+    api.add_resource(TraceSummary, "/admin/traces/summary")
 
 
 def get_docker_client():
@@ -1,87 +1,152 @@
 from flask_restful import Resource, reqparse, abort
 from ...app import get_docker_client
-from threading import Thread
-import requests
 from signal import signal, SIGINT
 from sys import exit
-import time
-from flask import make_response, current_app
+from flask import make_response, current_app, request
 from ...app.utils.service_util import services
-from ...app import get_enforced_status, db
-
-# For running the ip labeling script
-import subprocess
-
-# List of all currently running health check threads
-health_check_threads = []
-
-
-# Clears the ip for the given container
-def clear_ip(container):
-    docker_client = get_docker_client()
-    container = docker_client.containers.get(container.name)
-    if get_enforced_status():
-        subprocess.call(["./clearlabel", container.attrs['NetworkSettings']['IPAddress']])
+from ...app.utils.container_util import build_container_env, start_service_container, stop_service_container
+from ...app.utils.readiness import ContainerNotReadyError
+from ...app.utils.port_allocator import NoPortAvailableError
+from ...app.utils.warm_pool import acquire_container
+from ...app.utils.health_check import SessionHealthCheck, get_health_check_scheduler
+from ...app.utils.session_registry import get_session_registry
+from ...app.utils.auth_cache import get_authorization_cache
+from ...app.utils.http_client import get_http_client
+from ...app.utils.shutdown import get_shutdown_coordinator
+from ...app.utils.tracing import trace, span, new_request_id, get_tracer, REQUEST_ID_HEADER
+from ...app.utils.logging_util import get_module_logger
+from ...app import db
+
+logger = get_module_logger(__name__)
 
 
 def tear_down_handler(signal_received, frame):
     """
     Called when the Container Runtime process is to be stopped running.
-    Gracefully closes all currently running health check threads, stops
-    any currently containers, and removes the stored container images.
-    Closes the connection used for the the Docker client to the Docker daemon.
+    Gracefully stops the warm pools and the health check scheduler, then stops
+    all currently running containers concurrently within the shutdown deadline, and removes the stopped containers.
+    Closes the connection used for the the Docker client to the Docker daemon,
+    and the pooled connections used for sending requests to the services.
+    Reports any container that could not be stopped, and exports the most recent traces (if configured).
     :param signal_received: Unused
     :param frame: Unused
     """
-    print('SIGINT or CTRL-C detected. Exiting gracefully')
-
-    for thread in health_check_threads:
-        thread.join(10)
+    logger.info('SIGINT or CTRL-C detected. Exiting gracefully')
 
-    docker_client = get_docker_client()
-    containers = docker_client.containers.list()
+    with trace('shutdown'):
+        report = get_shutdown_coordinator().shutdown(get_docker_client())
+    if report.is_clean():
+        logger.info(str(report))
+    else:
+        logger.error(str(report))
 
-    for container in containers:
-        if container.status != 'stopped':
-            clear_ip(container)
-            print("Stopping container " + container.name)
-            container.stop()
-            print("Container stopped.")
+    tracer = get_tracer()
+    if tracer is not None and tracer.export_path is not None:
+        logger.info("Exported " + str(tracer.save()) + " traces to " + tracer.export_path)
 
-    docker_client.containers.prune()
-    docker_client.close()
     exit(0)
 
 
 def obtain_authorization_level(username):
     """
     Authenticates and obtains the Authorization level of the user.
-    Currently, does this by viewing each database user table in the Postgres DB
-    starting from least privilege. If a matching user is found, returns the authorization
+    Currently, does this by viewing every database user table in the Postgres DB with a single query,
+    preferring the role with the least privilege. If a matching user is found, returns the authorization
     levels based on their role.
+    Authorization levels are cached for a short time, see the auth_cache module for invalidating them.
     NOTE: In the real COPS Platform a IdAM service will be used instead
     :param username: the username of this user.
     :return: the authorization levels of the user. Currently this is 'student', 'instructor', or 'coordinator'
     If no matching user is found, 'None' is returned.
     """
-    results = db.session.execute("""
-        SELECT username FROM STUDENT where username=:username LIMIT 1
-        """, {'username': username}).first()
-    if results and results[0] == username:
-        return "student"
-
-    results = db.session.execute("""
-        SELECT username FROM INSTRUCTOR where username=:username LIMIT 1
-        """, {'username': username}).first()
-    if results and results[0] == username:
-        return "instructor"
-
-    results = db.session.execute("""
-        SELECT username FROM COORDINATOR where username=:username LIMIT 1
-        """, {'username': username}).first()
-    if results and results[0] == username:
-        return "coordinator"
-    return None
+    with span('authorization') as authorization:
+        cache = get_authorization_cache()
+        role = cache.get(username)
+        authorization.attributes['cached'] = role is not None
+        if role is not None:
+            return role
+
+        # The priority column orders the roles from least privilege, in case a username is in more than one table
+        results = db.session.execute("""
+            SELECT role FROM (
+                SELECT 'student' AS role, 1 AS priority FROM STUDENT WHERE username=:username
+                UNION ALL
+                SELECT 'instructor' AS role, 2 AS priority FROM INSTRUCTOR WHERE username=:username
+                UNION ALL
+                SELECT 'coordinator' AS role, 3 AS priority FROM COORDINATOR WHERE username=:username
+            ) AS roles ORDER BY priority LIMIT 1
+            """, {'username': username}).first()
+        if results is None:
+            # Unknown users are not cached so they are able to connect as soon as they are added
+            return None
+
+        cache.put(username, results[0])
+        return results[0]
+
+
+def start_session(service, service_class, username, security_label, request_id):
+    """
+    Starts the session of a service for the user. Hands off a ready container from the warm pool, or starts a new
+    container, logs the user in the service, and schedules the health checks for the session.
+    :param service: the name of the requested service
+    :param service_class: the static config class of the requested service
+    :param username: the username of the user
+    :param security_label: the authorization level of the user
+    :param request_id: the request id of the service request, sent to the service with the login request
+    :return: the response forwarded from the service (including the session cookie) along with the url of the service
+    """
+    # Hands off a ready container from the warm pool for this service and role
+    # If the pool is empty (or disabled), starts a new container for this user instead
+    with span('warm_pool') as warm_pool:
+        started = acquire_container(service, security_label)
+        warm_pool.attributes['hit'] = started is not None
+    if started is None:
+        env = build_container_env(current_app.config, security_label)
+        try:
+            started = start_service_container(service_class, security_label, env)
+        except ContainerNotReadyError as e:
+            logger.warning(str(e))
+            abort(400, message="Service request failed. The service did not start in time")
+        except NoPortAvailableError as e:
+            logger.warning(str(e))
+            abort(503, message="Service request failed. No ports are available for a new service")
+    service_object, container, container_ip = started
+
+    # Attempts to send login request for this user to the now started service
+    try:
+        login_url = service_object.login_url
+        data = {"username": username}
+
+        # Response from the request, the request id lets the service's logs be matched to this service request
+        with span('login'):
+            response = get_http_client().post(login_url, data=data, headers={REQUEST_ID_HEADER: request_id})
+
+    # If any exception occurs (such as cannot connect to this container or service),
+    # the request is treated as unsuccessful
+    except Exception as e:
+        logger.warning("Failed to log " + username + " in to " + service + ": " + str(e))
+        response = None
+
+    # If response is not successful, shuts down the container and returns an error message to the user
+    if response is None or response.status_code != 200:
+        stop_service_container(container, service_object)
+        abort(400, message="Service request failed")
+
+    # Create response to forward to client
+    client_response = make_response({'message': "Service request was successful",
+                                     'url': service_object.base_url})
+
+    # Include session cookie in forwarded response
+    client_response.set_cookie("session", response.cookies.get("session"))
+
+    # Records the container details of this user's session for this service
+    get_session_registry().activate(service, username, container.id, service_object.host_port, container_ip)
+
+    # Schedule the health checks to monitor this running session in the container
+    health_check = SessionHealthCheck(service, username, service_object, container)
+    get_health_check_scheduler().add(health_check)
+
+    return client_response
 
 
 """
@@ -102,11 +167,12 @@ class ServiceRequest(Resource):
         - Requires the service and username values as form data in the body of the POST request.
         - Authenticates and gets the user's authorization levels (as SELinux labels) using the IAM system.
          (NOTE: Using a Mock IAM system for now.)
-        - Creates the container to run the requested web service with the authorized security labels for this
-         user enforced.
+        - Hands off a ready container from the warm pool for the requested web service and the user's authorized
+         security labels. If no container is ready, creates the container to run the requested web service with the
+         authorized security labels for this user enforced.
         - Logs the user in the web service, and forwards the response (with the session cookie) back to the user,
           along with redirect for the url with port number that the user will need to connect to service.
-        - Creates a Health Check Thread to monitor the lifecycle of the running container. Shuts down the container
+        - Schedules Health Checks to monitor the lifecycle of the running container. Shuts down the container
           once the user logs our or disconnects from the running service.
 
         :return: Response of whether service request was successful. If successful returns forwarded response from
@@ -114,9 +180,6 @@ class ServiceRequest(Resource):
         message to user.
         """
 
-        # Gets the Docker client
-        docker_client = get_docker_client()
-
         # Retrieves the service and username parameters from the body of the request
         parser = reqparse.RequestParser()
         parser.add_argument('service', location='form')
@@ -125,183 +188,38 @@ class ServiceRequest(Resource):
         username = args.username
         service = args.service
 
-        # Check if the service requested is valid
-        if service not in services:
-            abort(400, message="This is not a valid service")
+        # Uses the request id sent by the user (if it is valid), otherwise generates a new one
+        request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
 
-        # Using Mock IAM, authenticate user and retrieve SELinux security labels for this user
-        security_label = obtain_authorization_level(username)
-        if security_label is None:
-            abort(400, message="Given credentials are not valid")
+        # Traces each phase of the service request, see the tracing module for querying the traces
+        with trace('service_request', request_id, service=service, username=username) as service_trace:
+            # Check if the service requested is valid
+            if service not in services:
+                abort(400, message="This is not a valid service")
 
-        # Retrieves the service static configuration class for this specific service
-        service_class = services[service]
+            # Using Mock IAM, authenticate user and retrieve SELinux security labels for this user
+            security_label = obtain_authorization_level(username)
+            if security_label is None:
+                abort(400, message="Given credentials are not valid")
+            service_trace.attributes['role'] = security_label
 
-        # Security check, make sure user is not already connected to another running container for the service requested
-        for user in service_class.active_users:
-            if username == user:
-                abort(400, message="User already has an active session for this service")
+            # Retrieves the service static configuration class for this specific service
+            service_class = services[service]
 
-        # Lock used to prevent conflicting port numbers for running services
-        service_class.port_lock.acquire()
-
-        # Get current port for this service
-        port = service_class.current_port
-
-        # Creates a service object based on the static config service class
-        service_object = service_class(host_port=str(port))
-
-        ports = {service_object.port: port}
-
-        # Increment current port value
-        service_class.current_port = port + 1
-
-        # Release lock
-        service_class.port_lock.release()
-
-        # Retrieve name of container for this service
-        container_name = service_object.container
-
-        # Sets the ROLE environment variable for the Docker Container to the security_label for this user
-        # Along with the POSTGRES env for the DB connection.
-        # These are using all the same ones from the host machines with the exception of POSTGRES_URL
-        # POSTGRES_URL corresponds to the docker0 interface URL the Docker Containers use to connect to the Host
-        env = {"ROLE": security_label, "POSTGRES_DB": current_app.config['POSTGRES_DB'],
-               "POSTGRES_USER": current_app.config['POSTGRES_USER'],
-               "POSTGRES_URL": '172.17.0.1',
-               "POSTGRES_PW": current_app.config['POSTGRES_PW']}
-
-        # Start the running container in detached mode at the unique port
-        container = docker_client.containers.run(container_name, detach=True, ports=ports, environment=env)
-
-        # TODO: Do this in a way that is generic and not hardcoded
-        # Waits until the service running inside the container has been started
-        # NOTE: Due to this not being inside an exception, you can occasionally get weird
-        # errors where you are constantly waiting for a connection. This normally due
-        # the connection not being labeled with SELinux. Due to time constraints we did not have time to fix this.
-        # Best solution would to be to try to connect the running application multiple times with successive requests.
-        # If it can't reach the connection in a certain time frame, then return an error response back to the user.
-        while True:
-            logs = docker_client.containers.get(container.name).logs(stream=True)
-            found = False
-            for log in logs:
-                log = str(log)
-                if "Running" in log:
-                    found = True
-                    break
-            if found:
-                break
-
-        # Retrieves the container's IP address from the the now running container
-        container_ip = docker_client.containers.get(container.name).attrs['NetworkSettings']['IPAddress']
-
-        # If running with SELinux, labels this Docker Container's IP connection based on the user's authorization levels
-        if get_enforced_status():
-            subprocess.check_call(["./iplabel", container_ip, security_label])
-
-        # Attempts to send login request for this user to the now started service
-        try:
-            login_url = service_object.login_url
-            data = {"username": username}
-
-            # Response from the request
-            response = requests.post(login_url, data=data)
-
-            # If response is not successful, return an error message to user
-            if response.status_code != 200:
-                abort(400, message="Service request failed")
-                clear_ip(container)
-                container.stop()
-                exit(1)
-
-            # Create response to forward to client
-            client_response = make_response({'message': "Service request was successful",
-                                             'url': service_object.base_url})
-
-            # Include session cookie in forwarded response
-            client_response.set_cookie("session", response.cookies.get("session"))
-
-        # If any exception occurs (such as cannot connect to this container or service),
-        # returns an error message to the user, and shuts down the container.
-        except Exception as e:
-            print(e)
-            abort(400, message="Service request failed")
-            clear_ip(container)
-            container.stop()
-            exit(1)
-
-        # Add user to the list of active sessions for this service
-        service_class.active_users.append(username)
-
-        # Initialize and start the health check thread to monitor this running session in the container
-        health_check_thread = HealthCheckThread(service_class, username, service_object.health_check_url, container)
-        health_check_thread.start()
-
-        # Add to the list of running health check threads
-        health_check_threads.append(health_check_thread)
-
-        # Return a forwarded response from the successful connection to the web service.
-        return client_response
-
-
-class HealthCheckThread(Thread):
-    """
-    A thread used to monitor the health of a running container.
-    """
-
-    def __init__(self, service, username, url, container):
-        """
-        Creates a HealthCheckThread with the passed in parameters.
-        :param service: the service class for the service that is running on the container
-        :param username: the username of the logged in user for the session of this service
-        :param url: the health-check url endpoint for this service
-        :param container: the container that is running this service
-        """
-        Thread.__init__(self)
-        self.service = service
-        self.username = username
-        self.url = url
-        self.container = container
-
-    def run(self):
-        """
-        Runs this health check thread to monitor the container.
-        """
-
-        # Checks the health check endpoint every 30 second until the user's session ends
-        # or a networking error occurs
-        while True:
-
-            time.sleep(30)
+            # Security check, atomically reserves the session so the user can not be connected to another running
+            # container for the service requested
+            session_registry = get_session_registry()
+            if session_registry.reserve(service, username) is None:
+                abort(400, message="User already has an active session for this service")
 
+            # Releases the reserved session if the service request fails
             try:
-                # Attempt to access the health check endpoint
-                response = requests.get(self.url)
-
-            # If can't reach the endpoint, shut down the container
-            except Exception as e:
-                self.tear_down()
-                clear_ip(self.container)
-                self.container.stop()
-                return
-
-            # This session is longer active for this user
-            if response.status_code != 200:
-                print('User has disconnected')
-                break
-
-        # Stop the running container and tear down the thread
-        self.tear_down()
-        print("Container is being shut down!")
-        clear_ip(self.container)
-        self.container.stop()
-        return
-
-    def tear_down(self):
-        """
-        Called before the thread is to be exited.
-        """
-        # Removes the user for this session from the list of active users for this session
-        self.service.active_users.remove(self.username)
-        # Removes this thread from the list of health check threads
-        health_check_threads.remove(self)
+                client_response = start_session(service, service_class, username, security_label, request_id)
+            except Exception:
+                session_registry.release(service, username)
+                raise
+            service_trace.attributes['status_code'] = client_response.status_code
+
+        # Return a forwarded response from the successful connection to the web service, with its request id
+        client_response.headers[REQUEST_ID_HEADER] = request_id
+        return client_response
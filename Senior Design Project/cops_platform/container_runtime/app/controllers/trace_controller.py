@@ -0,0 +1,74 @@
+import io
+from flask_restful import Resource, reqparse, abort, inputs
+from flask import make_response, request, current_app
+from ...app.utils.tracing import get_tracer
+
+
+def check_admin_address():
+    """
+    Only allows the addresses configured in TRACE_ADMIN_ADDRESSES to query the traces,
+    since they include the usernames of the users.
+    """
+    if request.remote_addr not in current_app.config['TRACE_ADMIN_ADDRESSES']:
+        abort(403, message="Traces can only be queried from an admin address")
+
+
+class Traces(Resource):
+    """
+    Handler for querying the most recent traces of the Container Runtime.
+    """
+
+    def get(self):
+        """
+        - Gets the most recent traces, most recent first, that match every given filter.
+        - Accepts the optional query parameters:
+          name (ex: service_request, health_check, or shutdown), id (the request id), min_duration (in milliseconds),
+          errors (only the traces that ended with an error), and limit (the maximum number of traces, 100 by default).
+        - Returns the traces as JSON, or as JSON lines with one trace per line if the format parameter is "jsonl".
+
+        :return: The matching traces and their spans.
+        """
+        check_admin_address()
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('name', location='args')
+        parser.add_argument('id', location='args')
+        parser.add_argument('min_duration', type=float, location='args')
+        parser.add_argument('errors', type=inputs.boolean, default=False, location='args')
+        parser.add_argument('limit', type=inputs.natural, default=100, location='args')
+        parser.add_argument('format', choices=('json', 'jsonl'), default='json', location='args')
+        args = parser.parse_args()
+
+        min_duration = args.min_duration / 1000 if args.min_duration is not None else None
+        traces = get_tracer().query(name=args.name, trace_id=args.id, min_duration=min_duration,
+                                    errors_only=args.errors, limit=args.limit)
+
+        if args.format == 'jsonl':
+            stream = io.StringIO()
+            get_tracer().export(stream, traces)
+            response = make_response(stream.getvalue())
+            response.mimetype = 'application/x-ndjson'
+            return response
+        return {'traces': [trace.to_dict() for trace in traces]}
+
+
+class TraceSummary(Resource):
+    """
+    Handler for the latency summary of each phase of the most recent traces.
+    """
+
+    def get(self):
+        """
+        - Summarizes the latency of each phase of the most recent traces, by trace name.
+        - Accepts the optional name query parameter to only summarize the traces with that name.
+
+        :return: The count, mean, 50th, 95th, and 99th percentiles, and max (in milliseconds) of each phase,
+        keyed by trace name then phase name. The "total" phase is the duration of the whole traces.
+        """
+        check_admin_address()
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('name', location='args')
+        args = parser.parse_args()
+
+        return {'summary': get_tracer().summarize(args.name)}
@@ -0,0 +1,115 @@
+"""
+Authorization Cache
+
+A bounded cache of the authorization levels returned by the Mock IAM. Entries expire after a time to live
+and the least recently used entry is evicted once the cache is full. Entries can be invalidated for a single
+user (for example when their role changes) or cleared entirely.
+
+The following can be imported from this module:
+    * AuthorizationCache - the bounded time to live and least recently used cache
+    * init_authorization_cache - creates the global authorization cache
+    * get_authorization_cache - gets the global authorization cache
+    * invalidate_authorization - removes the cached authorization level of a user
+    * clear_authorization_cache - removes every cached authorization level
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# The global authorization cache used by the Container Runtime
+AUTHORIZATION_CACHE = None
+
+
+class AuthorizationCache:
+    """
+    Thread-safe cache of authorization levels keyed by username, bounded by size and time to live.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        Creates an AuthorizationCache with the passed in parameters.
+        :param max_size: the maximum number of users to cache the authorization level of
+        :param ttl: the number of seconds a cached authorization level is used for
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = Lock()
+        # (expiry time, authorization level) keyed by username, ordered from least to most recently used
+        self.entries = OrderedDict()
+
+    def get(self, username):
+        """
+        Gets the cached authorization level of the user.
+        :param username: the username of the user
+        :return: the authorization level. None if it is not cached or has expired.
+        """
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[username]
+                return None
+            self.entries.move_to_end(username)
+            return entry[1]
+
+    def put(self, username, authorization_level):
+        """
+        Caches the authorization level of the user, evicting the least recently used user if the cache is full.
+        :param username: the username of the user
+        :param authorization_level: the authorization level of the user
+        """
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[username] = (time.monotonic() + self.ttl, authorization_level)
+            self.entries.move_to_end(username)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, username):
+        """
+        Removes the cached authorization level of the user.
+        :param username: the username of the user
+        """
+        with self.lock:
+            self.entries.pop(username, None)
+
+    def clear(self):
+        """
+        Removes every cached authorization level.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+def init_authorization_cache(config):
+    """
+    Creates the global authorization cache.
+    :param config: the config of the Container Runtime app
+    """
+    global AUTHORIZATION_CACHE
+    AUTHORIZATION_CACHE = AuthorizationCache(config['AUTH_CACHE_SIZE'], config['AUTH_CACHE_TTL'])
+
+
+def get_authorization_cache():
+    """
+    Gets the global authorization cache
+    :return: the authorization cache
+    """
+    return AUTHORIZATION_CACHE
+
+
+def invalidate_authorization(username):
+    """
+    Removes the cached authorization level of the user, so it is looked up again on their next service request.
+    :param username: the username of the user
+    """
+    AUTHORIZATION_CACHE.invalidate(username)
+
+
+def clear_authorization_cache():
+    """
+    Removes every cached authorization level.
+    """
+    AUTHORIZATION_CACHE.clear()
@@ -0,0 +1,70 @@
+"""
+Container Backend
+
+Creates the client the Container Runtime runs the service containers with, which is returned by get_docker_client().
+Every backend has the interface of the parts of the Docker SDK's DockerClient used by the Container Runtime:
+    * containers - run, create, get, list, and prune, returning containers with id, name, status, attrs,
+      logs, start, stop, reload, and remove
+    * networks - get, list, and create, returning networks with connect and disconnect
+    * close
+
+A backend may also have a service_adapter, a requests transport adapter that the HTTP client sends the requests
+for the services running in its containers to.
+
+The backend is chosen with CONTAINER_BACKEND:
+    * docker - the Docker daemon, through the Docker SDK (the default)
+    * simulated - in-process simulated containers, see the simulated_backend module
+
+The following can be imported from this module:
+    * BACKENDS - the function creating each backend by name
+    * create_container_backend - creates the configured backend
+"""
+import docker
+
+from .simulated_backend import SimulatedDockerClient
+
+
+def create_docker_backend(config):
+    """
+    Creates the Docker client from the environment.
+    :param config: the config of the Container Runtime app
+    :return: the Docker client
+    """
+    return docker.from_env()
+
+
+def create_simulated_backend(config):
+    """
+    Creates the simulated Docker client.
+    :param config: the config of the Container Runtime app
+    :return: the simulated Docker client
+    """
+    return SimulatedDockerClient(start_latency=config['SIMULATED_START_LATENCY'],
+                                 start_jitter=config['SIMULATED_START_JITTER'],
+                                 output=config['SIMULATED_LOG_OUTPUT'].encode('utf-8'),
+                                 subnet=config['SIMULATED_SUBNET'],
+                                 api_latency=config['SIMULATED_API_LATENCY'],
+                                 run_failure_rate=config['SIMULATED_RUN_FAILURE_RATE'],
+                                 crash_rate=config['SIMULATED_CRASH_RATE'],
+                                 login_failure_rate=config['SIMULATED_LOGIN_FAILURE_RATE'],
+                                 seed=config['SIMULATED_SEED'])
+
+
+# The function creating each backend by name
+BACKENDS = {
+    'docker': create_docker_backend,
+    'simulated': create_simulated_backend,
+}
+
+
+def create_container_backend(config):
+    """
+    Creates the backend named by CONTAINER_BACKEND.
+    :param config: the config of the Container Runtime app
+    :raises ValueError: if there is no backend with the name
+    :return: the client of the backend
+    """
+    name = config['CONTAINER_BACKEND']
+    if name not in BACKENDS:
+        raise ValueError("Unknown container backend " + name + ", expected one of: " + ", ".join(BACKENDS))
+    return BACKENDS[name](config)
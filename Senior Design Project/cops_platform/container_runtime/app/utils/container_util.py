@@ -0,0 +1,198 @@
+"""
+Container Utils
+
+Contains the helper functions for starting and cleaning up the Docker Containers that run a service.
+These are shared between the Service Request handler and the warm pool of pre-started containers.
+
+The following functions can be imported from this module:
+    * build_container_env - builds the environment variables passed in to a service container
+    * start_service_container - starts a container for a service with the given security label
+    * stop_service_container - stops a service container and releases its port
+    * get_container_ip - gets the ip of the given container
+    * clear_ip - clears the SELinux label for the ip of the given container, or returns it to the pre-labeled ip pool
+"""
+from ...app import get_docker_client
+from .readiness import wait_until_ready, ContainerNotReadyError
+from .port_allocator import get_port_allocator
+from .label_manager import get_label_manager, get_ip_pool
+from .db_multiplexer import get_db_multiplexer
+from .tracing import span
+
+
+def build_container_env(config, security_label):
+    """
+    Builds the environment variables for a service container.
+    Sets the ROLE environment variable for the Docker Container to the security_label for the user,
+    along with the POSTGRES env for the DB connection.
+    These are using all the same ones from the host machines with the exception of POSTGRES_URL.
+    POSTGRES_URL corresponds to the docker0 interface URL the Docker Containers use to connect to the Host,
+    or to the shared connection multiplexer if one is running.
+    :param config: the config of the Container Runtime app
+    :param security_label: the authorization level of the user ('student', 'instructor', or 'coordinator')
+    :return: dictionary of the environment variables for the container
+    """
+    db_multiplexer = get_db_multiplexer()
+    return {"ROLE": security_label, "POSTGRES_DB": config['POSTGRES_DB'],
+            "POSTGRES_USER": config['POSTGRES_USER'],
+            "POSTGRES_URL": db_multiplexer.url if db_multiplexer is not None else '172.17.0.1',
+            "POSTGRES_PW": config['POSTGRES_PW']}
+
+
+def start_service_container(service_class, security_label, env):
+    """
+    Starts a new container running the given service at a free host port and waits until the service
+    inside of it is running. Labels the container's IP connection based on the passed in security label.
+    If there is a free ip in the pre-labeled ip pool for the security label, the container is started with that ip
+    instead, which is already labeled.
+    Each of these phases is timed as a span of the current trace, if there is one.
+    :param service_class: the static config class of the service to start
+    :param security_label: the authorization level the container is started with
+    :param env: the environment variables for the container
+    :raises ContainerNotReadyError: if the service in the container is not ready before its deadline
+    :raises NoPortAvailableError: if there is no free host port for the container
+    :raises CalledProcessError: if the container's ip could not be labeled
+    :return: tuple of the service object (with the urls for this container), the container, and the container's ip
+    """
+    docker_client = get_docker_client()
+
+    # Allocates a free host port for this container
+    with span('port_allocation') as port_allocation:
+        port = get_port_allocator().allocate()
+        port_allocation.attributes['port'] = port
+
+    # Creates a service object based on the static config service class
+    service_object = service_class(host_port=port)
+
+    ports = {service_object.port: port}
+
+    # Takes an already labeled ip for this security label, if there is a pool of pre-labeled ips
+    ip_pool = get_ip_pool()
+    pooled_ip = ip_pool.acquire(security_label) if ip_pool is not None else None
+
+    # Start the running container in detached mode at the unique port
+    try:
+        with span('container_run', image=service_object.container, pooled_ip=pooled_ip is not None):
+            if pooled_ip is None:
+                container = docker_client.containers.run(service_object.container, detach=True, ports=ports,
+                                                         environment=env)
+            else:
+                container = __run_with_ip(docker_client, ip_pool, pooled_ip, service_object, ports, env)
+    except Exception:
+        get_port_allocator().release(port)
+        if pooled_ip is not None:
+            ip_pool.release(pooled_ip)
+        raise
+
+    # Waits until the service running inside the container has been started
+    # If it is not ready before the deadline of its readiness spec, stops the container and raises the error
+    try:
+        with span('readiness'):
+            wait_until_ready(container, service_object)
+    except ContainerNotReadyError:
+        container.stop()
+        get_port_allocator().release(port)
+        if pooled_ip is not None:
+            ip_pool.release(pooled_ip)
+        raise
+
+    # Labels this Docker Container's IP connection based on the user's authorization levels
+    # Pre-labeled ips already have this label, and the label manager does nothing without SELinux enforced
+    # If it can not be labeled, removes the container so it is not left running without its label
+    try:
+        with span('labeling', pooled_ip=pooled_ip is not None):
+            if pooled_ip is None:
+                container_ip = get_container_ip(container)
+                get_label_manager().label(container_ip, security_label)
+            else:
+                container_ip = pooled_ip
+    except Exception:
+        try:
+            container.remove(force=True)
+        except Exception:
+            pass
+        get_port_allocator().release(port)
+        if pooled_ip is not None:
+            ip_pool.release(pooled_ip)
+        raise
+
+    return service_object, container, container_ip
+
+
+def stop_service_container(container, service_object):
+    """
+    Clears the ip label for the container, stops it, and releases its host port to be used by a new container.
+    A container that was already removed (ex: outside of the Container Runtime) is treated as stopped.
+    The host port is released even if stopping the container fails, so it is not lost to the allocator.
+    :param container: the container to stop
+    :param service_object: the service object for the service running in the container
+    """
+    import docker
+    try:
+        # The ip is looked up before the container is stopped, since a stopped container no longer has one
+        try:
+            ip = get_container_ip(container)
+            with span('container_stop'):
+                container.stop()
+        except docker.errors.NotFound:
+            ip = None
+        with span('unlabeling'):
+            clear_ip(ip)
+    finally:
+        get_port_allocator().release(service_object.host_port)
+
+
+def get_container_ip(container):
+    """
+    Gets the ip of the given running container, from the default bridge network or any other network it is on.
+    :param container: the container to get the ip of
+    :return: the ip of the container, None if it does not have one
+    """
+    settings = get_docker_client().containers.get(container.name).attrs['NetworkSettings']
+    if settings.get('IPAddress'):
+        return settings['IPAddress']
+    for network in (settings.get('Networks') or {}).values():
+        if network.get('IPAddress'):
+            return network['IPAddress']
+    return None
+
+
+def clear_ip(ip):
+    """
+    Returns the ip to the pre-labeled ip pool with its label, or clears its SELinux label if it is not from the pool.
+    Does not wait for the label to be cleared.
+    :param ip: the ip of the stopped container
+    """
+    if ip is None:
+        return
+    ip_pool = get_ip_pool()
+    if ip_pool is None or not ip_pool.release(ip):
+        get_label_manager().unlabel(ip)
+
+
+def __run_with_ip(docker_client, ip_pool, ip, service_object, ports, env):
+    """
+    Private function to start a container on the network of the ip pool with the given ip.
+    :param docker_client: the Docker client
+    :param ip_pool: the pool of pre-labeled ips
+    :param ip: the pre-labeled ip to start the container with
+    :param service_object: the service object for the service to run in the container
+    :param ports: the ports to publish
+    :param env: the environment variables for the container
+    :return: the running container
+    """
+    # The container connects to the host through the gateway of the pool's network instead of docker0,
+    # at the same port (ex: the port of the multiplexer)
+    _, separator, port = env['POSTGRES_URL'].partition(":")
+    env = dict(env, POSTGRES_URL=ip_pool.gateway + separator + port)
+    container = docker_client.containers.create(service_object.container, ports=ports, environment=env,
+                                                network=ip_pool.network)
+    try:
+        # Reconnects the created container with the pre-labeled ip before it is started
+        network = docker_client.networks.get(ip_pool.network)
+        network.disconnect(container)
+        network.connect(container, ipv4_address=ip)
+        container.start()
+    except Exception:
+        container.remove(force=True)
+        raise
+    return container
@@ -0,0 +1,128 @@
+"""
+Database Multiplexer
+
+Runs an optional shared connection multiplexer (PgBouncer) in a Docker Container, which the service containers
+connect to instead of connecting to the host's Postgres directly. Every container can keep its own small pool of
+client connections to the multiplexer, while the multiplexer shares a fixed number of server connections to Postgres
+between all of them, so the number of running containers is no longer limited by Postgres' max_connections.
+
+The multiplexer is not started with SELinux enforced. Postgres would see every connection as coming from the
+multiplexer's ip, instead of from the labeled ip of the container the connection is for.
+
+The following can be imported from this module:
+    * DatabaseMultiplexer - the container running the shared connection multiplexer
+    * init_db_multiplexer - creates and starts the global multiplexer, if one is configured
+    * get_db_multiplexer - gets the global multiplexer
+"""
+from .logging_util import get_module_logger
+
+# The global multiplexer the service containers connect to, None if they connect to Postgres directly
+DB_MULTIPLEXER = None
+
+# The name of the multiplexer's container
+CONTAINER_NAME = "cops_db_multiplexer"
+
+# The port the multiplexer listens on inside of its container
+CONTAINER_PORT = 5432
+
+logger = get_module_logger(__name__)
+
+
+class DatabaseMultiplexer:
+    """
+    The Docker Container running the shared connection multiplexer.
+    """
+
+    def __init__(self, image, host, port, upstream, pool_mode, pool_size, max_client_connections):
+        """
+        Creates a DatabaseMultiplexer with the passed in parameters.
+        :param image: the Docker image of the multiplexer
+        :param host: the host address the service containers reach the multiplexer's published port at
+        :param port: the host port the multiplexer is published at
+        :param upstream: the host (and optional port) of Postgres, as reached from inside of a container
+        :param pool_mode: when a server connection is returned to the pool ('transaction' or 'session')
+        :param pool_size: the number of server connections to Postgres shared between every container
+        :param max_client_connections: the maximum number of connections from the containers to the multiplexer
+        """
+        self.image = image
+        self.host = host
+        self.port = port
+        self.upstream = upstream
+        self.pool_mode = pool_mode
+        self.pool_size = pool_size
+        self.max_client_connections = max_client_connections
+        self.container = None
+
+    @property
+    def url(self):
+        """
+        :return: the POSTGRES_URL (host:port) the service containers connect to
+        """
+        return self.host + ":" + str(self.port)
+
+    def build_env(self, config):
+        """
+        Builds the environment variables of the multiplexer's container.
+        :param config: the config of the Container Runtime app
+        :return: dictionary of the environment variables
+        """
+        upstream_host, _, upstream_port = self.upstream.partition(":")
+        return {"DB_HOST": upstream_host, "DB_PORT": upstream_port or "5432",
+                "DB_NAME": config['POSTGRES_DB'], "DB_USER": config['POSTGRES_USER'],
+                "DB_PASSWORD": config['POSTGRES_PW'], "LISTEN_PORT": str(CONTAINER_PORT),
+                "POOL_MODE": self.pool_mode, "DEFAULT_POOL_SIZE": str(self.pool_size),
+                "MAX_CLIENT_CONN": str(self.max_client_connections),
+                # Removes any session state (ex: SET) before a server connection is handed to another client
+                "SERVER_RESET_QUERY": "DISCARD ALL"}
+
+    def start(self, docker_client, config):
+        """
+        Starts the multiplexer's container, replacing one left behind by an earlier run of the Container Runtime.
+        :param docker_client: the Docker client
+        :param config: the config of the Container Runtime app
+        """
+        import docker
+        try:
+            docker_client.containers.get(CONTAINER_NAME).remove(force=True)
+        except docker.errors.NotFound:
+            pass
+        self.container = docker_client.containers.run(self.image, name=CONTAINER_NAME, detach=True,
+                                                      ports={CONTAINER_PORT: self.port},
+                                                      environment=self.build_env(config),
+                                                      restart_policy={"Name": "on-failure"})
+
+    def stop(self, timeout=3):
+        """
+        Stops the multiplexer's container.
+        :param timeout: the number of seconds the multiplexer is given to exit before it is killed
+        """
+        if self.container is not None:
+            self.container.stop(timeout=timeout)
+            self.container = None
+
+
+def init_db_multiplexer(config):
+    """
+    Creates and starts the global multiplexer if DB_MULTIPLEXER_IMAGE is configured and SELinux is not enforced.
+    :param config: the config of the Container Runtime app
+    """
+    from ...app import get_docker_client, get_enforced_status
+    global DB_MULTIPLEXER
+    if not config['DB_MULTIPLEXER_IMAGE']:
+        return
+    if get_enforced_status():
+        logger.warning("Not starting the database multiplexer since SELinux is enforced")
+        return
+    DB_MULTIPLEXER = DatabaseMultiplexer(config['DB_MULTIPLEXER_IMAGE'], config['DB_MULTIPLEXER_HOST'],
+                                         config['DB_MULTIPLEXER_PORT'], config['DB_MULTIPLEXER_UPSTREAM'],
+                                         config['DB_MULTIPLEXER_POOL_MODE'], config['DB_MULTIPLEXER_POOL_SIZE'],
+                                         config['DB_MULTIPLEXER_MAX_CLIENT_CONNECTIONS'])
+    DB_MULTIPLEXER.start(get_docker_client(), config)
+
+
+def get_db_multiplexer():
+    """
+    Gets the global multiplexer
+    :return: the multiplexer, None if the service containers connect to Postgres directly
+    """
+    return DB_MULTIPLEXER
@@ -0,0 +1,198 @@
+"""
+Health Check
+
+Monitors the health of every running session from a single scheduler thread instead of a thread per session.
+Due health checks are kept in a timer heap and probed concurrently on a bounded pool of worker threads,
+each with its own timeout. The time between checks is jittered so sessions started together do not all
+get probed at the same time.
+
+Every probe, and the tear down of every ended session, is recorded as a trace (see the tracing module).
+
+The following can be imported from this module:
+    * SessionHealthCheck - the health check for a single running session
+    * HealthCheckScheduler - the scheduler that runs the health checks for every session
+    * init_health_check_scheduler - creates and starts the global health check scheduler
+    * get_health_check_scheduler - gets the global health check scheduler
+"""
+import heapq
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from threading import Thread, Condition
+
+from .http_client import get_http_client
+from .container_util import stop_service_container
+from .session_registry import get_session_registry
+from .tracing import trace, span, REQUEST_ID_HEADER
+from .logging_util import get_module_logger
+
+# The global health check scheduler used by the Container Runtime
+HEALTH_CHECK_SCHEDULER = None
+
+logger = get_module_logger(__name__)
+
+
+class SessionHealthCheck:
+    """
+    The health check for a single session of a service running in a container.
+    """
+
+    def __init__(self, service, username, service_object, container):
+        """
+        Creates a SessionHealthCheck with the passed in parameters.
+        :param service: the name of the service that is running on the container
+        :param username: the username of the logged in user for the session of this service
+        :param service_object: the service object (with the health-check url endpoint) for this session
+        :param container: the container that is running this service
+        """
+        self.service = service
+        self.username = username
+        self.service_object = service_object
+        self.url = service_object.health_check_url
+        self.container = container
+
+    def probe(self, timeout):
+        """
+        Accesses the health check endpoint of the service.
+        :param timeout: the number of seconds to wait for a response
+        :return: whether the user's session is still active
+        """
+        with trace('health_check', service=self.service, username=self.username) as health_check:
+            try:
+                with span('probe'):
+                    response = get_http_client().get(self.url, timeout=timeout,
+                                                     headers={REQUEST_ID_HEADER: health_check.id})
+            # If can't reach the endpoint, the container is to be shut down
+            except Exception:
+                health_check.attributes['active'] = False
+                return False
+            health_check.attributes['status_code'] = response.status_code
+
+            # This session is no longer active for this user
+            if response.status_code != 200:
+                logger.info(self.username + " has disconnected from " + self.service)
+                health_check.attributes['active'] = False
+                return False
+
+            get_session_registry().record_health_check(self.service, self.username)
+            health_check.attributes['active'] = True
+            return True
+
+    def tear_down(self):
+        """
+        Ends this session. Releases the user's session for this service
+        and stops the running container, releasing its port.
+        """
+        with trace('session_tear_down', service=self.service, username=self.username):
+            get_session_registry().release(self.service, self.username)
+            logger.info("The container of " + self.username + "'s " + self.service + " session is being shut down")
+            stop_service_container(self.container, self.service_object)
+
+
+class HealthCheckScheduler(Thread):
+    """
+    A single thread that schedules the health checks for all running sessions.
+    """
+
+    def __init__(self, interval, timeout, max_workers, jitter):
+        """
+        Creates a HealthCheckScheduler with the passed in parameters.
+        :param interval: the number of seconds between the health checks of a session
+        :param timeout: the number of seconds to wait for a response to a single health check
+        :param max_workers: the maximum number of health checks that are run at the same time
+        :param jitter: the fraction of the interval each check is randomly moved earlier or later by
+        """
+        Thread.__init__(self, daemon=True)
+        self.interval = interval
+        self.timeout = timeout
+        self.jitter = jitter
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Heap of (due time, sequence number, health check); the sequence number breaks ties between checks
+        self.heap = []
+        self.sequence = count()
+        self.condition = Condition()
+        self.stopped = False
+
+    def add(self, check):
+        """
+        Schedules the health checks for a newly started session.
+        :param check: the SessionHealthCheck for the session
+        """
+        with self.condition:
+            self.__schedule(check)
+            self.condition.notify()
+
+    def run(self):
+        """
+        Waits until the earliest health check is due, then hands all due checks to the worker threads.
+        """
+        with self.condition:
+            while not self.stopped:
+                now = time.monotonic()
+                while self.heap and self.heap[0][0] <= now:
+                    check = heapq.heappop(self.heap)[2]
+                    self.executor.submit(self.__run_check, check)
+
+                # Waits until the next check is due or a new check has been added
+                wait = self.heap[0][0] - now if self.heap else None
+                self.condition.wait(wait)
+
+    def stop(self, timeout=None, wait=True):
+        """
+        Stops scheduling health checks.
+        :param timeout: the maximum number of seconds to wait for the scheduler thread
+        :param wait: whether to wait for any running checks to finish
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.join(timeout)
+        self.executor.shutdown(wait=wait)
+
+    def __run_check(self, check):
+        """
+        Runs a single health check on a worker thread. Reschedules the check if the session is still active,
+        otherwise ends the session.
+        :param check: the SessionHealthCheck to run
+        """
+        if check.probe(self.timeout):
+            with self.condition:
+                if not self.stopped:
+                    self.__schedule(check)
+                    self.condition.notify()
+            return
+
+        try:
+            check.tear_down()
+        except Exception:
+            logger.exception("Failed to tear down the session of " + check.username + " for " + check.service)
+
+    def __schedule(self, check):
+        """
+        Pushes the next jittered health check for the session on to the heap. Must hold the condition's lock.
+        :param check: the SessionHealthCheck to schedule
+        """
+        delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self.heap, (time.monotonic() + delay, next(self.sequence), check))
+
+
+def init_health_check_scheduler(config):
+    """
+    Creates and starts the global health check scheduler.
+    :param config: the config of the Container Runtime app
+    """
+    global HEALTH_CHECK_SCHEDULER
+    HEALTH_CHECK_SCHEDULER = HealthCheckScheduler(interval=config['HEALTH_CHECK_INTERVAL'],
+                                                  timeout=config['HEALTH_CHECK_TIMEOUT'],
+                                                  max_workers=config['HEALTH_CHECK_WORKERS'],
+                                                  jitter=config['HEALTH_CHECK_JITTER'])
+    HEALTH_CHECK_SCHEDULER.start()
+
+
+def get_health_check_scheduler():
+    """
+    Gets the global health check scheduler
+    :return: the health check scheduler
+    """
+    return HEALTH_CHECK_SCHEDULER
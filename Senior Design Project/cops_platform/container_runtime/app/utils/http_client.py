@@ -0,0 +1,102 @@
+"""
+HTTP Client
+
+The shared HTTP client used for every request the Container Runtime sends to the services running in its
+containers (logging users in, health checks, and readiness probes). Connections are pooled and kept alive per
+host, every request has a connect and read timeout, and failed connections are retried with backoff.
+
+The following can be imported from this module:
+    * ServiceHttpClient - the pooled HTTP client with default timeouts and retries
+    * init_http_client - creates the global HTTP client
+    * get_http_client - gets the global HTTP client
+"""
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# The global HTTP client used by the Container Runtime
+HTTP_CLIENT = None
+
+
+class ServiceHttpClient:
+    """
+    Pooled HTTP client with keep-alive, timeouts, and bounded retries for requests to service containers.
+    """
+
+    def __init__(self, connect_timeout, read_timeout, retries, backoff, max_hosts, max_connections_per_host):
+        """
+        Creates a ServiceHttpClient with the passed in parameters.
+        :param connect_timeout: the number of seconds to wait for a connection to a service
+        :param read_timeout: the number of seconds to wait for a response from a service
+        :param retries: the number of times a failed connection is retried
+        :param backoff: the backoff factor (in seconds) between retried connections
+        :param max_hosts: the number of hosts (containers) to keep a connection pool for
+        :param max_connections_per_host: the maximum number of connections open to a single host
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        # Cookies are forwarded from the responses to the users instead of being stored for later requests,
+        # since the session cookie from one container should never be sent to another container
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        # Only failed connections are retried, since the service never received these requests
+        retry = Retry(total=retries, connect=retries, read=0, status=0, redirect=0, backoff_factor=backoff)
+        adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_connections_per_host, pool_block=True,
+                              max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, timeout=None, **kwargs):
+        """
+        Sends a GET request.
+        :param url: the url to send the request to
+        :param timeout: the timeout for this request, defaults to the client's connect and read timeouts
+        :return: the response
+        """
+        return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        """
+        Sends a POST request.
+        :param url: the url to send the request to
+        :param timeout: the timeout for this request, defaults to the client's connect and read timeouts
+        :return: the response
+        """
+        return self.session.post(url, timeout=timeout or self.timeout, **kwargs)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        self.session.close()
+
+
+def init_http_client(config):
+    """
+    Creates the global HTTP client.
+    :param config: the config of the Container Runtime app
+    """
+    global HTTP_CLIENT
+    HTTP_CLIENT = ServiceHttpClient(connect_timeout=config['HTTP_CONNECT_TIMEOUT'],
+                                    read_timeout=config['HTTP_READ_TIMEOUT'],
+                                    retries=config['HTTP_RETRIES'],
+                                    backoff=config['HTTP_BACKOFF'],
+                                    max_hosts=config['HTTP_MAX_HOSTS'],
+                                    max_connections_per_host=config['HTTP_MAX_CONNECTIONS_PER_HOST'])
+
+    # A simulated container backend also simulates the services running in its containers
+    from ...app import get_docker_client
+    service_adapter = getattr(get_docker_client(), 'service_adapter', None)
+    if service_adapter is not None:
+        HTTP_CLIENT.session.mount('http://', service_adapter)
+
+
+def get_http_client():
+    """
+    Gets the global HTTP client
+    :return: the HTTP client
+    """
+    return HTTP_CLIENT
@@ -0,0 +1,323 @@
+"""
+Label Manager
+
+Manages the SELinux network labels of the container IPs. Label changes requested at about the same time are
+collected into a batch and applied with a single process, and the current label of every IP is cached so an IP
+that already has the right label is never labeled again.
+
+Optionally, a pool of container IPs on a separate Docker network is labeled ahead of time for each role.
+Containers started with one of these IPs already have the right label, so starting a session does not need to
+wait on labeling at all, and the IP keeps its label when it is returned to the pool.
+
+When SELinux is not enforced, a no-op backend is used and no process is ever started.
+
+The following can be imported from this module:
+    * NetlabelBackend - applies a batch of label changes with the labelbatch script
+    * NoOpLabelBackend - ignores every label change
+    * LabelManager - batches label changes and caches the current label of each IP
+    * IpPool - the pre-labeled container IPs for each role
+    * init_label_manager - creates the global label manager and IP pool
+    * get_label_manager - gets the global label manager
+    * get_ip_pool - gets the global IP pool, None if there is no pool of pre-labeled IPs
+"""
+import ipaddress
+import subprocess
+import time
+from threading import Thread, Condition, Event, Lock
+
+from .logging_util import get_module_logger
+
+# The global label manager and IP pool used by the Container Runtime
+LABEL_MANAGER = None
+IP_POOL = None
+
+logger = get_module_logger(__name__)
+
+
+class NetlabelBackend:
+    """
+    Applies label changes with the labelbatch script, which runs netlabelctl for every change.
+    """
+    enforcing = True
+
+    def __init__(self, timeout=None):
+        """
+        Creates a NetlabelBackend.
+        :param timeout: the number of seconds a batch is given before its process is killed, unlimited if None
+        """
+        self.timeout = timeout
+
+    def apply(self, changes):
+        """
+        Applies a batch of label changes with a single process.
+        :param changes: list of ('add', ip, role) or ('del', ip, None) changes
+        :raises CalledProcessError: if the process failed
+        :raises TimeoutExpired: if the process did not finish before the timeout, and was killed
+        """
+        lines = [" ".join(value for value in change if value is not None) for change in changes]
+        subprocess.run(["./labelbatch"], input="\n".join(lines) + "\n", universal_newlines=True, check=True,
+                       timeout=self.timeout)
+
+
+class NoOpLabelBackend:
+    """
+    Ignores every label change. Used when SELinux is not enforced.
+    """
+    enforcing = False
+
+    def apply(self, changes):
+        pass
+
+
+class LabelBatch:
+    """
+    A batch of label changes that are applied together.
+    """
+
+    def __init__(self):
+        self.changes = []
+        self.done = Event()
+        self.error = None
+
+
+class LabelManager(Thread):
+    """
+    A thread that applies batches of label changes and caches the current label of each IP.
+    """
+
+    def __init__(self, backend, batch_window):
+        """
+        Creates a LabelManager with the passed in parameters.
+        :param backend: the backend used to apply label changes
+        :param batch_window: the number of seconds to wait for more label changes before applying a batch
+        """
+        Thread.__init__(self, daemon=True)
+        self.backend = backend
+        self.batch_window = batch_window
+        # The current role label of each labeled IP
+        self.labels = {}
+        self.batch = LabelBatch()
+        self.condition = Condition()
+        self.stopped = False
+
+    def label(self, ip, role):
+        """
+        Labels the IP for the role and waits until the label has been applied.
+        Returns immediately if the IP already has this label.
+        :param ip: the IP of the container
+        :param role: the role (security label) of the user
+        :raises CalledProcessError: if applying the label failed
+        """
+        with self.condition:
+            if self.labels.get(ip) == role:
+                return
+            if not self.backend.enforcing:
+                self.labels[ip] = role
+                return
+            batch = self.__add_change(('add', ip, role))
+
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def label_all(self, roles):
+        """
+        Labels many IPs in a single batch and waits until the labels have been applied.
+        :param roles: dictionary of each IP and the role it is labeled for
+        """
+        with self.condition:
+            if not self.backend.enforcing:
+                self.labels.update(roles)
+                return
+            batch = None
+            for ip, role in roles.items():
+                if self.labels.get(ip) != role:
+                    batch = self.__add_change(('add', ip, role))
+
+        if batch is not None:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+
+    def unlabel(self, ip):
+        """
+        Removes the label of the IP. Does not wait for the label to be removed.
+        The IP is no longer cached as labeled once the removal is queued, so a new container given the same IP
+        before the removal is applied is labeled again after it, instead of being left unlabeled.
+        :param ip: the IP of the container
+        """
+        with self.condition:
+            self.labels.pop(ip, None)
+            if self.backend.enforcing:
+                self.__add_change(('del', ip, None))
+
+    def unlabel_all(self, timeout=None):
+        """
+        Removes the label of every labeled IP in a single batch and waits until they have been removed.
+        :param timeout: the maximum number of seconds to wait for the labels to be removed, unlimited if None
+        :return: list of the IPs whose labels were not removed, because the batch failed or is still being applied
+        """
+        with self.condition:
+            ips = list(self.labels)
+            self.labels.clear()
+            if not self.backend.enforcing:
+                return []
+            batch = None
+            for ip in ips:
+                batch = self.__add_change(('del', ip, None))
+
+        if batch is None:
+            return []
+        if not batch.done.wait(timeout) or batch.error is not None:
+            return ips
+        return []
+
+    def run(self):
+        """
+        Waits for label changes, collects any more changes for the batch window, then applies them as a single batch.
+        """
+        while True:
+            with self.condition:
+                while not self.batch.changes and not self.stopped:
+                    self.condition.wait()
+                if self.stopped and not self.batch.changes:
+                    return
+
+            # Gives any other label changes requested at about the same time a chance to join this batch
+            time.sleep(self.batch_window)
+
+            with self.condition:
+                batch = self.batch
+                self.batch = LabelBatch()
+
+            try:
+                self.backend.apply(batch.changes)
+            except Exception as e:
+                logger.exception("Failed to apply a batch of " + str(len(batch.changes)) + " ip label changes")
+                batch.error = e
+            else:
+                with self.condition:
+                    for op, ip, role in batch.changes:
+                        if op == 'add':
+                            self.labels[ip] = role
+                        else:
+                            self.labels.pop(ip, None)
+            batch.done.set()
+
+    def stop(self, timeout=None):
+        """
+        Applies any pending label changes, then stops this thread.
+        :param timeout: the maximum number of seconds to wait for pending changes to be applied
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.join(timeout)
+
+    def __add_change(self, change):
+        """
+        Adds a change to the current batch. Must hold the condition's lock.
+        :param change: the label change
+        :return: the batch the change was added to
+        """
+        self.batch.changes.append(change)
+        self.condition.notify()
+        return self.batch
+
+
+class IpPool:
+    """
+    The pre-labeled container IPs on the Docker network of the pool, reserved for each role.
+    """
+
+    def __init__(self, network, subnet, sizes):
+        """
+        Creates an IpPool with the passed in parameters.
+        The subnet's hosts after the gateway (the first host) are split between the roles in order.
+        :param network: the name of the Docker network the IPs are on
+        :param subnet: the subnet of the Docker network (ex: "172.30.0.0/16")
+        :param sizes: dictionary of each role and the number of IPs reserved for it
+        """
+        self.network = network
+        self.subnet = subnet
+        self.lock = Lock()
+        hosts = ipaddress.ip_network(subnet).hosts()
+        self.gateway = str(next(hosts))
+        # Free IPs for each role, and the role each IP is reserved for
+        self.free = {}
+        self.roles = {}
+        for role, size in sizes.items():
+            self.free[role] = [str(next(hosts)) for _ in range(size)]
+            for ip in self.free[role]:
+                self.roles[ip] = role
+
+    def acquire(self, role):
+        """
+        Takes a free IP reserved for the role.
+        :param role: the role (security label) of the user
+        :return: the IP. None if every IP for this role is in use.
+        """
+        with self.lock:
+            free = self.free.get(role)
+            if not free:
+                return None
+            return free.pop()
+
+    def release(self, ip):
+        """
+        Returns the IP to the pool of its role, keeping its label.
+        :param ip: the IP of the stopped container
+        :return: whether the IP belongs to this pool
+        """
+        with self.lock:
+            role = self.roles.get(ip)
+            if role is None:
+                return False
+            if ip not in self.free[role]:
+                self.free[role].append(ip)
+            return True
+
+    def ensure_network(self, docker_client):
+        """
+        Creates the Docker network of the pool if it does not already exist.
+        :param docker_client: the Docker client
+        """
+        import docker
+        if docker_client.networks.list(names=[self.network]):
+            return
+        ipam = docker.types.IPAMConfig(pool_configs=[docker.types.IPAMPool(subnet=self.subnet, gateway=self.gateway)])
+        docker_client.networks.create(self.network, driver='bridge', ipam=ipam)
+
+
+def init_label_manager(config):
+    """
+    Creates and starts the global label manager, which uses the no-op backend if SELinux is not enforced.
+    If a network is configured for the pool of pre-labeled IPs, creates the IP pool and labels all of its IPs.
+    :param config: the config of the Container Runtime app
+    """
+    from ...app import get_docker_client, get_enforced_status
+    global LABEL_MANAGER, IP_POOL
+    backend = NetlabelBackend(config['LABEL_BATCH_TIMEOUT']) if get_enforced_status() else NoOpLabelBackend()
+    LABEL_MANAGER = LabelManager(backend, config['LABEL_BATCH_WINDOW'])
+    LABEL_MANAGER.start()
+
+    if config['LABEL_POOL_NETWORK']:
+        IP_POOL = IpPool(config['LABEL_POOL_NETWORK'], config['LABEL_POOL_SUBNET'], config['LABEL_POOL_SIZES'])
+        IP_POOL.ensure_network(get_docker_client())
+        LABEL_MANAGER.label_all(IP_POOL.roles)
+
+
+def get_label_manager():
+    """
+    Gets the global label manager
+    :return: the label manager
+    """
+    return LABEL_MANAGER
+
+
+def get_ip_pool():
+    """
+    Gets the global pool of pre-labeled IPs
+    :return: the IP pool, None if no network is configured for the pool
+    """
+    return IP_POOL
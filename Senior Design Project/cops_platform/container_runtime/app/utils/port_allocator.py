@@ -0,0 +1,104 @@
+"""
+Port Allocator
+
+Hands out the host ports that service containers are mapped to from a configured range of ports.
+Free ports are kept in a queue (with a set for membership checks) so allocating and releasing a port is O(1).
+Ports are returned to the queue when the container using them is stopped, so the Container Runtime
+can keep running without walking past the end of the range.
+
+The following can be imported from this module:
+    * NoPortAvailableError - raised when every port in the range is in use
+    * PortAllocator - allocates and reclaims host ports from a range of ports
+    * init_port_allocator - creates the global port allocator
+    * get_port_allocator - gets the global port allocator
+"""
+import socket
+from collections import deque
+from threading import Lock
+
+# The global port allocator used by the Container Runtime
+PORT_ALLOCATOR = None
+
+
+class NoPortAvailableError(Exception):
+    """
+    Raised when there is no free port left in the range of the port allocator.
+    """
+    pass
+
+
+class PortAllocator:
+    """
+    Allocates host ports from an inclusive range of ports and reclaims them once released.
+    """
+
+    def __init__(self, start, end):
+        """
+        Creates a PortAllocator for the passed in range of ports.
+        :param start: the first port in the range
+        :param end: the last port in the range
+        """
+        self.start = start
+        self.end = end
+        self.lock = Lock()
+        # Free ports in the order they are handed out, along with a set for checking if a port is free
+        self.free = deque(range(start, end + 1))
+        self.free_set = set(self.free)
+
+    def allocate(self):
+        """
+        Takes the next free port that is not already being listened on by another process on the host.
+        Ports that are in use by another process are moved to the back of the queue to be tried again later.
+        :raises NoPortAvailableError: if every port in the range is in use
+        :return: the allocated port
+        """
+        with self.lock:
+            for _ in range(len(self.free)):
+                port = self.free.popleft()
+                if not port_in_use(port):
+                    self.free_set.discard(port)
+                    return port
+                self.free.append(port)
+
+        raise NoPortAvailableError("No free port in the range " + str(self.start) + "-" + str(self.end))
+
+    def release(self, port):
+        """
+        Returns the port to the free ports so it can be allocated again.
+        :param port: the port that is no longer being used
+        """
+        with self.lock:
+            if self.start <= port <= self.end and port not in self.free_set:
+                self.free.append(port)
+                self.free_set.add(port)
+
+
+def port_in_use(port):
+    """
+    Checks whether a port is already being listened on by another process on the host.
+    :param port: the port to check
+    :return: whether the port is in use
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind(('0.0.0.0', port))
+        except OSError:
+            return True
+    return False
+
+
+def init_port_allocator(config):
+    """
+    Creates the global port allocator for the configured range of ports.
+    :param config: the config of the Container Runtime app
+    """
+    global PORT_ALLOCATOR
+    PORT_ALLOCATOR = PortAllocator(config['SERVICE_PORT_START'], config['SERVICE_PORT_END'])
+
+
+def get_port_allocator():
+    """
+    Gets the global port allocator
+    :return: the port allocator
+    """
+    return PORT_ALLOCATOR
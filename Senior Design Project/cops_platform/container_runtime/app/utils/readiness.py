@@ -0,0 +1,106 @@
+"""
+Readiness
+
+Detects when the service inside a newly started container is ready to accept requests, based on the
+ReadinessSpec of the service. Either follows the container's logs incrementally for the spec's log message,
+or probes the service's health check url with backoff. Raises a ContainerNotReadyError once the spec's
+timeout has passed.
+
+The following can be imported from this module:
+    * ContainerNotReadyError - raised when a container is not ready before its deadline
+    * wait_until_ready - blocks until the container running the given service is ready
+"""
+import time
+from threading import Thread, Event
+
+import requests
+
+from .http_client import get_http_client
+
+
+class ContainerNotReadyError(Exception):
+    """
+    Raised when the service in a container is not ready before the deadline of its readiness spec.
+    """
+    pass
+
+
+def wait_until_ready(container, service_object):
+    """
+    Blocks until the service running inside of the container is ready.
+    :param container: the newly started container
+    :param service_object: the service object for the service running in the container
+    :raises ContainerNotReadyError: if the service is not ready before the timeout of its readiness spec
+    """
+    spec = service_object.readiness
+    deadline = time.monotonic() + spec.timeout
+
+    if spec.log_message is not None:
+        wait_for_log_message(container, spec.log_message, deadline)
+    if spec.probe_health_check:
+        wait_for_health_check(service_object.health_check_url, deadline, spec.initial_backoff, spec.max_backoff)
+
+
+def wait_for_log_message(container, message, deadline):
+    """
+    Follows the logs of the container from the start, only reading each new log line once,
+    until the given message is found.
+    :param container: the container to follow the logs of
+    :param message: the log message that signals the container is ready
+    :param deadline: the time (from time.monotonic) to stop waiting at
+    :raises ContainerNotReadyError: if the message is not found before the deadline or the container exits
+    """
+    logs = container.logs(stream=True, follow=True)
+    found = Event()
+    finished = Event()
+
+    def follow():
+        # Keeps the end of the previous chunk in case the message is split between two chunks
+        tail = ''
+        try:
+            for chunk in logs:
+                text = tail + chunk.decode('utf-8', errors='replace')
+                if message in text:
+                    found.set()
+                    return
+                tail = text[-len(message):]
+        except Exception:
+            # The stream is closed when the deadline has passed
+            pass
+        finally:
+            finished.set()
+
+    # The log stream blocks until new output is written, so it is followed on its own thread
+    # in order for the deadline to be enforced
+    Thread(target=follow, daemon=True).start()
+    finished.wait(max(deadline - time.monotonic(), 0))
+    logs.close()
+
+    if not found.is_set():
+        raise ContainerNotReadyError("Container " + container.name + " did not log '" + message + "' in time")
+
+
+def wait_for_health_check(url, deadline, initial_backoff, max_backoff):
+    """
+    Probes the health check url of the service, doubling the wait between each attempt, until the service responds.
+    Any response means the service is accepting requests, since the health check is only successful
+    once a user has logged in.
+    :param url: the health check url of the service
+    :param deadline: the time (from time.monotonic) to stop waiting at
+    :param initial_backoff: the number of seconds to wait after the first failed attempt
+    :param max_backoff: the maximum number of seconds to wait between attempts
+    :raises ContainerNotReadyError: if the service does not respond before the deadline
+    """
+    backoff = initial_backoff
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ContainerNotReadyError("Service at " + url + " did not respond in time")
+        try:
+            get_http_client().get(url, timeout=remaining)
+            return
+        except requests.RequestException:
+            pass
+
+        time.sleep(min(backoff, max(deadline - time.monotonic(), 0)))
+        backoff = min(backoff * 2, max_backoff)
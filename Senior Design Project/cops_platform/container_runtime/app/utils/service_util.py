@@ -1,5 +1,26 @@
 from abc import ABC
-from threading import Lock
+
+
+class ReadinessSpec:
+    """
+    Describes how the Container Runtime knows the service inside a newly started container is ready.
+    """
+
+    def __init__(self, log_message=None, probe_health_check=False, timeout=30.0, initial_backoff=0.1,
+                 max_backoff=2.0):
+        """
+        Initializes the Readiness Spec with the passed in parameters.
+        :param log_message: the container is ready once this message is written to its logs
+        :param probe_health_check: the container is ready once its health check url responds to a request
+        :param timeout: the number of seconds to wait for the container to be ready before failing the request
+        :param initial_backoff: the number of seconds to wait between the first health check probes
+        :param max_backoff: the maximum number of seconds to wait between health check probes
+        """
+        self.log_message = log_message
+        self.probe_health_check = probe_health_check
+        self.timeout = timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
 
 
 class ServiceConfig(ABC):
@@ -7,22 +28,26 @@ class ServiceConfig(ABC):
     Abstract Config class for a Service.
     """
 
-    def __init__(self, port, host, container, base_url, login_url, health_check_url):
+    def __init__(self, port, host_port, host, container, base_url, login_url, health_check_url, readiness):
         """
         Initialize the Service Config class with the passed in parameters.
         :param port: the port this service listens on in the container
+        :param host_port: the port on the host machine this container's service is mapped to
         :param host: the host for this service
         :param container: the container name for this service
         :param base_url: the base url for this service (host + post)
         :param login_url: the url used for logging in a user for this service
         :param health_check_url: the url used for checking the health of the container running this service
+        :param readiness: the readiness spec used to know when the container running this service has started
         """
         self.port = port
+        self.host_port = host_port
         self.host = host
         self.container = container
         self.base_url = base_url
         self.login_url = login_url
         self.health_check_url = health_check_url
+        self.readiness = readiness
         super().__init__()
 
 
@@ -30,12 +55,6 @@ class CourseManagerServiceConfig(ServiceConfig):
     """
     Course Manager Service Config class.
     """
-    # Lock used to make sure a unique port is assigned to each running service
-    port_lock = Lock()
-    # Static value for the current_port number of this service
-    current_port = 8000
-    # List of active users for this service
-    active_users = []
 
     def __init__(self, host_port):
         """
@@ -45,11 +64,14 @@ class CourseManagerServiceConfig(ServiceConfig):
         port = '5000/tcp'
         host = 'http://127.0.0.1'
         container = 'course_manager_test'
-        base_url = 'http://127.0.0.1:' + host_port
+        base_url = 'http://127.0.0.1:' + str(host_port)
         login_url = '/api/login'
         health_check_url = '/api/health_check'
-        super().__init__(port=port, host=host, container=container, base_url=base_url,
-                         login_url=base_url + login_url, health_check_url=base_url + health_check_url)
+        # Flask logs "Running on ..." once the Course Manager app is accepting requests
+        readiness = ReadinessSpec(log_message='Running', timeout=30.0)
+        super().__init__(port=port, host_port=host_port, host=host, container=container, base_url=base_url,
+                         login_url=base_url + login_url, health_check_url=base_url + health_check_url,
+                         readiness=readiness)
 
 
 """
@@ -0,0 +1,145 @@
+"""
+Session Registry
+
+Keeps track of every active session of a service, keyed by the (service, username) of the session.
+Reserving a session is atomic, so a user can never start two sessions for the same service at once.
+The health checks, tear down, and any other component of the Container Runtime look up sessions here.
+
+The following can be imported from this module:
+    * Session - the details of a single session
+    * SessionRegistry - the thread-safe registry of active sessions
+    * get_session_registry - gets the global session registry
+"""
+import time
+from threading import Lock
+
+
+class Session:
+    """
+    The details of a single session of a service for a user.
+    A session is reserved before its container is started, so the container details are None until it is activated.
+    """
+
+    def __init__(self, service, username):
+        """
+        Creates a Session with the passed in parameters.
+        :param service: the name of the service this session is for
+        :param username: the username of the user of this session
+        """
+        self.service = service
+        self.username = username
+        self.container_id = None
+        self.port = None
+        self.ip = None
+        self.start_time = time.time()
+        self.last_health_check = None
+
+    def to_dict(self):
+        """
+        Gets the details of this session as a dictionary.
+        :return: dictionary of this session's details
+        """
+        return {'service': self.service, 'username': self.username, 'container_id': self.container_id,
+                'port': self.port, 'ip': self.ip, 'start_time': self.start_time,
+                'last_health_check': self.last_health_check}
+
+
+class SessionRegistry:
+    """
+    Thread-safe registry of the active sessions for every service.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty SessionRegistry.
+        """
+        self.lock = Lock()
+        # Each session keyed by its (service, username)
+        self.sessions = {}
+
+    def reserve(self, service, username):
+        """
+        Reserves a session for the user if they do not already have a session for this service.
+        :param service: the name of the service
+        :param username: the username of the user
+        :return: the reserved Session. None if the user already has a session for this service.
+        """
+        key = (service, username)
+        with self.lock:
+            if key in self.sessions:
+                return None
+            session = Session(service, username)
+            self.sessions[key] = session
+            return session
+
+    def activate(self, service, username, container_id, port, ip):
+        """
+        Records the container details of a reserved session once its container has started.
+        :param service: the name of the service
+        :param username: the username of the user
+        :param container_id: the id of the container running the session
+        :param port: the host port the container is mapped to
+        :param ip: the ip of the container
+        """
+        with self.lock:
+            session = self.sessions[(service, username)]
+            session.container_id = container_id
+            session.port = port
+            session.ip = ip
+            session.last_health_check = time.time()
+
+    def record_health_check(self, service, username):
+        """
+        Records that the session passed a health check.
+        :param service: the name of the service
+        :param username: the username of the user
+        """
+        with self.lock:
+            session = self.sessions.get((service, username))
+            if session is not None:
+                session.last_health_check = time.time()
+
+    def release(self, service, username):
+        """
+        Removes the session for the user, so they are able to start a new session for this service.
+        :param service: the name of the service
+        :param username: the username of the user
+        :return: the removed Session. None if there was no session.
+        """
+        with self.lock:
+            return self.sessions.pop((service, username), None)
+
+    def get(self, service, username):
+        """
+        Gets the session of the user for this service.
+        :param service: the name of the service
+        :param username: the username of the user
+        :return: the Session. None if there is no session.
+        """
+        with self.lock:
+            return self.sessions.get((service, username))
+
+    def list(self, service=None):
+        """
+        Gets all of the active sessions.
+        :param service: if given, only gets the sessions for this service
+        :return: list of the Sessions
+        """
+        with self.lock:
+            return [session for session in self.sessions.values() if service is None or session.service == service]
+
+    def __len__(self):
+        with self.lock:
+            return len(self.sessions)
+
+
+# The global session registry used by the Container Runtime
+SESSION_REGISTRY = SessionRegistry()
+
+
+def get_session_registry():
+    """
+    Gets the global session registry
+    :return: the session registry
+    """
+    return SESSION_REGISTRY
@@ -0,0 +1,167 @@
+"""
+Shutdown
+
+Coordinates the graceful shutdown of the Container Runtime. Signals every background component to stop at once,
+then stops every running container concurrently on a bounded pool of worker threads, all within one overall deadline,
+and clears every ip label in a single batch. Reports the containers that could not be cleaned up in time.
+Each of these steps is timed as a span of the shutdown's trace (see the tracing module).
+
+The following can be imported from this module:
+    * ShutdownReport - the results of shutting down the running containers
+    * ShutdownCoordinator - stops every background component and running container of the Container Runtime
+    * init_shutdown_coordinator - creates the global shutdown coordinator
+    * get_shutdown_coordinator - gets the global shutdown coordinator
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .label_manager import get_label_manager
+from .warm_pool import shutdown_warm_pools
+from .health_check import get_health_check_scheduler
+from .http_client import get_http_client
+from .db_multiplexer import get_db_multiplexer, CONTAINER_NAME as DB_MULTIPLEXER_NAME
+from .tracing import span
+
+# The global shutdown coordinator used by the Container Runtime
+SHUTDOWN_COORDINATOR = None
+
+
+class ShutdownReport:
+    """
+    The results of shutting down the running containers.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty ShutdownReport.
+        """
+        # Names of the containers that were stopped
+        self.stopped = []
+        # (name, error) of the containers that raised an error while being stopped
+        self.failed = []
+        # Names of the containers that were still being stopped when the deadline passed
+        self.unfinished = []
+        # IPs whose labels were not cleared before the deadline passed
+        self.labeled = []
+        self.duration = 0.0
+
+    def is_clean(self):
+        """
+        :return: whether every container was stopped
+        """
+        return not self.failed and not self.unfinished and not self.labeled
+
+    def __str__(self):
+        lines = ["Stopped " + str(len(self.stopped)) + " containers in " + str(round(self.duration, 2)) + " seconds"]
+        for name, error in self.failed:
+            lines.append("Failed to stop container " + name + ": " + str(error))
+        for name in self.unfinished:
+            lines.append("Container " + name + " was not stopped before the deadline")
+        if self.labeled:
+            lines.append("The labels of " + str(len(self.labeled)) + " ips were not cleared before the deadline: " +
+                         ", ".join(self.labeled))
+        return "\n".join(lines)
+
+
+class ShutdownCoordinator:
+    """
+    Stops every background component and running container of the Container Runtime within one deadline.
+    """
+
+    def __init__(self, max_workers, deadline, stop_timeout):
+        """
+        Creates a ShutdownCoordinator with the passed in parameters.
+        :param max_workers: the maximum number of containers that are stopped at the same time
+        :param deadline: the number of seconds to wait for every container to be stopped
+        :param stop_timeout: the number of seconds each container is given to exit before it is killed
+        """
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.stop_timeout = stop_timeout
+
+    def shutdown(self, docker_client):
+        """
+        Stops the warm pools and health check scheduler, then stops every running container before the deadline,
+        and then the database multiplexer.
+        Clears every ip label within what is left of the deadline, reporting the ips whose labels were not cleared,
+        removes the stopped containers, and closes the Docker client and HTTP client.
+        :param docker_client: the Docker client
+        :return: the ShutdownReport
+        """
+        start = time.monotonic()
+
+        # Signals the warm pools and the health check scheduler to stop at the same time,
+        # without waiting on any health check that is currently running
+        with span('stop_background'):
+            shutdown_warm_pools()
+            get_health_check_scheduler().stop(timeout=1, wait=False)
+
+        # The database multiplexer is stopped after the service containers, which may still be using it
+        with span('stop_containers') as stop_containers:
+            containers = [container for container in docker_client.containers.list()
+                          if container.status != 'stopped' and container.name != DB_MULTIPLEXER_NAME]
+            report = self.stop_containers(containers)
+            stop_containers.attributes['containers'] = len(containers)
+            stop_containers.attributes['clean'] = report.is_clean()
+        db_multiplexer = get_db_multiplexer()
+        if db_multiplexer is not None:
+            with span('stop_db_multiplexer'):
+                db_multiplexer.stop(timeout=self.stop_timeout)
+
+        # Clears the labels of every container ip, including the pre-labeled ip pool, in a single batch,
+        # within what is left of the deadline
+        with span('unlabeling'):
+            label_manager = get_label_manager()
+            report.labeled = label_manager.unlabel_all(timeout=max(self.deadline - (time.monotonic() - start), 0))
+            label_manager.stop(timeout=1)
+
+        with span('cleanup'):
+            docker_client.containers.prune()
+            docker_client.close()
+            get_http_client().close()
+        return report
+
+    def stop_containers(self, containers):
+        """
+        Stops the given containers concurrently.
+        :param containers: the containers to stop
+        :return: the ShutdownReport
+        """
+        report = ShutdownReport()
+        start = time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {executor.submit(container.stop, timeout=self.stop_timeout): container.name
+                   for container in containers}
+        done, not_done = wait(futures, timeout=self.deadline)
+        # Does not wait on any container still being stopped, it is reported instead
+        # The stops still queued are cancelled, otherwise the worker threads would run them (joined at exit)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        for future in done:
+            if future.exception() is None:
+                report.stopped.append(futures[future])
+            else:
+                report.failed.append((futures[future], future.exception()))
+        report.unfinished = [futures[future] for future in not_done]
+        report.duration = time.monotonic() - start
+        return report
+
+
+def init_shutdown_coordinator(config):
+    """
+    Creates the global shutdown coordinator.
+    :param config: the config of the Container Runtime app
+    """
+    global SHUTDOWN_COORDINATOR
+    SHUTDOWN_COORDINATOR = ShutdownCoordinator(max_workers=config['SHUTDOWN_WORKERS'],
+                                               deadline=config['SHUTDOWN_DEADLINE'],
+                                               stop_timeout=config['SHUTDOWN_STOP_TIMEOUT'])
+
+
+def get_shutdown_coordinator():
+    """
+    Gets the global shutdown coordinator
+    :return: the shutdown coordinator
+    """
+    return SHUTDOWN_COORDINATOR
@@ -0,0 +1,534 @@
+"""
+Simulated Backend
+
+An in-process stand-in for the Docker daemon and the services running in its containers, used for load testing and
+capacity planning the Container Runtime without Docker, SELinux, or the service images.
+
+The simulated client has the same interface as the parts of the Docker SDK's DockerClient used by the Container
+Runtime. Its containers take a configurable (randomly jittered) time to start, write the configured log output once
+they are ready, and are given an ip from the subnet of their network. Failures can be injected: the Docker API
+failing to run a container, a container crashing before it is ready, and the service failing to log a user in.
+
+The services running in the simulated containers are simulated by a requests transport adapter, which answers the
+login and health check requests the Container Runtime sends to a container's published host port.
+
+The following can be imported from this module:
+    * SimulatedDockerClient - the in-process stand-in for the Docker client
+    * SimulatedContainer - a simulated container
+    * SimulatedNetwork - a simulated Docker network, which assigns the ips of its containers
+    * SimulatedServiceAdapter - answers the requests sent to the services running in the simulated containers
+"""
+import ipaddress
+import itertools
+import random
+import time
+import uuid
+from threading import Event, Lock
+from urllib.parse import urlsplit
+
+import docker
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# The output written by a container that crashes before it is ready
+CRASH_OUTPUT = b"Traceback (most recent call last):\nRuntimeError: simulated crash\n"
+
+
+class SimulatedLogStream:
+    """
+    A followed stream of the logs of a simulated container, which can be closed from another thread.
+    """
+
+    def __init__(self, container, follow):
+        """
+        Creates a SimulatedLogStream with the passed in parameters.
+        :param container: the container the logs are from
+        :param follow: whether the stream stays open for new output until the container stops
+        """
+        self.container = container
+        self.follow = follow
+        self.sent = False
+        self.closed = False
+        # Set when the stream is closed or the container stops
+        self.wake = Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        container = self.container
+        if not self.sent:
+            # Blocks until the container writes its output
+            self.wake.wait(max(container.ready_at - time.monotonic(), 0))
+            if self.closed or container.status != 'running':
+                raise StopIteration
+            self.sent = True
+            if container.crashes:
+                container.exit()
+                return CRASH_OUTPUT
+            return container.output
+        if self.follow and container.status == 'running':
+            self.wake.wait()
+        raise StopIteration
+
+    def close(self):
+        """
+        Closes the stream, ending a blocked read.
+        """
+        self.closed = True
+        self.wake.set()
+
+
+class SimulatedContainer:
+    """
+    A simulated container that is ready (writes its log output) a set amount of time after it is started.
+    """
+
+    def __init__(self, client, image, ports, environment, start_latency, output, crashes):
+        """
+        Creates a SimulatedContainer with the passed in parameters.
+        :param client: the simulated client the container belongs to
+        :param image: the image the container runs
+        :param ports: dictionary of the container ports and the host ports they are published at
+        :param environment: the environment variables of the container
+        :param start_latency: the number of seconds after the container is started that it is ready
+        :param output: the log output written once the container is ready
+        :param crashes: whether the container exits before it is ready
+        """
+        self.client = client
+        self.id = uuid.uuid4().hex
+        self.name = "simulated_" + self.id[:12]
+        self.image = image
+        self.environment = environment or {}
+        self.host_ports = [int(port) for port in (ports or {}).values()]
+        self.start_latency = start_latency
+        self.output = output
+        self.crashes = crashes
+        self.status = 'created'
+        self.ready_at = float('inf')
+        # The ip of the container on each network it is connected to
+        self.ips = {}
+        # Whether a user has logged in to the service running in the container
+        self.logged_in = False
+        self.streams = []
+        self.lock = Lock()
+
+    @property
+    def attrs(self):
+        """
+        :return: the details of the container in the format returned by the Docker API
+        """
+        networks = {name: {'IPAddress': ip} for name, ip in self.ips.items()}
+        return {'Id': self.id, 'Name': '/' + self.name, 'State': {'Status': self.status},
+                'NetworkSettings': {'IPAddress': self.ips.get('bridge', ''), 'Networks': networks}}
+
+    def is_ready(self):
+        """
+        :return: whether the service in the container is running and accepting requests
+        """
+        return self.status == 'running' and not self.crashes and time.monotonic() >= self.ready_at
+
+    def start(self):
+        """
+        Starts the container.
+        """
+        self.client.call_api()
+        with self.lock:
+            self.status = 'running'
+            self.ready_at = time.monotonic() + self.start_latency
+
+    def logs(self, stream=False, follow=False):
+        """
+        Gets the logs of the container.
+        :param stream: whether to return a stream of the logs instead of the output so far
+        :param follow: whether the stream stays open for new output until the container stops
+        :return: the stream of the logs, or the output so far
+        """
+        if stream:
+            log_stream = SimulatedLogStream(self, follow)
+            with self.lock:
+                self.streams.append(log_stream)
+                if self.status != 'running':
+                    log_stream.wake.set()
+            return log_stream
+        if self.status == 'running' and time.monotonic() >= self.ready_at:
+            return CRASH_OUTPUT if self.crashes else self.output
+        return b''
+
+    def stop(self, timeout=10):
+        """
+        Stops the container.
+        :param timeout: unused, a simulated container always exits right away
+        """
+        self.client.call_api()
+        self.exit()
+
+    def exit(self):
+        """
+        Exits the container, disconnecting it from its networks and ending its followed log streams.
+        """
+        with self.lock:
+            if self.status == 'exited':
+                return
+            self.status = 'exited'
+            self.logged_in = False
+            streams, self.streams = self.streams, []
+        for log_stream in streams:
+            log_stream.wake.set()
+        for name in list(self.ips):
+            self.client.networks.get(name).disconnect(self)
+
+    def reload(self):
+        """
+        Reloads the details of the container, which are always current for a simulated container.
+        """
+        pass
+
+    def remove(self, force=False):
+        """
+        Removes the container.
+        :param force: whether a running container is stopped and removed
+        """
+        if self.status == 'running':
+            if not force:
+                raise docker.errors.APIError("You cannot remove a running container " + self.id)
+            self.exit()
+        self.client.containers.forget(self)
+
+
+class SimulatedContainers:
+    """
+    The containers of a simulated client, with the interface of the Docker SDK's ContainerCollection.
+    """
+
+    def __init__(self, client):
+        """
+        Creates a SimulatedContainers for the passed in client.
+        :param client: the simulated client the containers belong to
+        """
+        self.client = client
+        self.lock = Lock()
+        self.by_id = {}
+
+    def create(self, image, ports=None, environment=None, network=None, **kwargs):
+        """
+        Creates a container, connected to the given network or the default bridge network.
+        :param image: the image the container runs
+        :param ports: dictionary of the container ports and the host ports they are published at
+        :param environment: the environment variables of the container
+        :param network: the name of the network the container is connected to
+        :raises APIError: if a failure is injected
+        :return: the created container
+        """
+        client = self.client
+        client.call_api()
+        if client.chance(client.run_failure_rate):
+            raise docker.errors.APIError("Simulated failure creating a container from " + image)
+        container = SimulatedContainer(client, image, ports, environment, client.pick_start_latency(),
+                                       client.output, client.chance(client.crash_rate))
+        with self.lock:
+            self.by_id[container.id] = container
+        client.networks.get(network or 'bridge').connect(container)
+        return container
+
+    def run(self, image, detach=True, ports=None, environment=None, network=None, **kwargs):
+        """
+        Creates and starts a container.
+        :return: the running container
+        """
+        container = self.create(image, ports=ports, environment=environment, network=network)
+        container.start()
+        return container
+
+    def get(self, container_id):
+        """
+        Gets a container by its id or name.
+        :param container_id: the id or name of the container
+        :raises NotFound: if there is no such container
+        :return: the container
+        """
+        with self.lock:
+            container = self.by_id.get(container_id)
+            if container is None:
+                container = next((found for found in self.by_id.values() if found.name == container_id), None)
+        if container is None:
+            raise docker.errors.NotFound("No such container: " + str(container_id))
+        return container
+
+    def list(self, all=False):
+        """
+        Lists the containers.
+        :param all: whether stopped containers are included
+        :return: list of the containers
+        """
+        with self.lock:
+            return [container for container in self.by_id.values() if all or container.status == 'running']
+
+    def prune(self):
+        """
+        Removes every stopped container.
+        :return: the ids of the removed containers
+        """
+        with self.lock:
+            pruned = [container_id for container_id, container in self.by_id.items()
+                      if container.status == 'exited']
+            for container_id in pruned:
+                del self.by_id[container_id]
+        return {'ContainersDeleted': pruned, 'SpaceReclaimed': 0}
+
+    def forget(self, container):
+        """
+        Removes the container from the collection.
+        :param container: the removed container
+        """
+        with self.lock:
+            self.by_id.pop(container.id, None)
+
+    def find_by_port(self, port):
+        """
+        Finds the running container published at a host port.
+        :param port: the host port
+        :return: the container, None if no running container is published at the port
+        """
+        with self.lock:
+            return next((container for container in self.by_id.values()
+                         if container.status == 'running' and port in container.host_ports), None)
+
+
+class SimulatedNetwork:
+    """
+    A simulated Docker network, which assigns each connected container an ip from its subnet.
+    """
+
+    def __init__(self, name, subnet, gateway=None):
+        """
+        Creates a SimulatedNetwork with the passed in parameters.
+        :param name: the name of the network
+        :param subnet: the subnet of the network (ex: "172.17.0.0/16")
+        :param gateway: the gateway of the network, defaults to the first host of the subnet
+        """
+        self.name = name
+        self.subnet = subnet
+        self.lock = Lock()
+        hosts = ipaddress.ip_network(subnet).hosts()
+        self.gateway = gateway or str(next(hosts))
+        # Ips are handed out in order, reusing the ips of disconnected containers first
+        self.hosts = (str(host) for host in hosts if str(host) != self.gateway)
+        self.released = []
+        self.in_use = set()
+
+    def connect(self, container, ipv4_address=None):
+        """
+        Connects a container to the network.
+        :param container: the container
+        :param ipv4_address: the ip of the container, defaults to the next free ip
+        :raises APIError: if the ip is already in use or there are no free ips left
+        """
+        with self.lock:
+            if ipv4_address is not None:
+                if ipv4_address in self.in_use:
+                    raise docker.errors.APIError("Address already in use: " + ipv4_address)
+                ip = ipv4_address
+            elif self.released:
+                ip = self.released.pop()
+            else:
+                ip = next((host for host in self.hosts if host not in self.in_use), None)
+                if ip is None:
+                    raise docker.errors.APIError("No available addresses on network " + self.name)
+            self.in_use.add(ip)
+        container.ips[self.name] = ip
+
+    def disconnect(self, container):
+        """
+        Disconnects a container from the network, freeing its ip.
+        :param container: the container
+        """
+        ip = container.ips.pop(self.name, None)
+        if ip is None:
+            return
+        with self.lock:
+            self.in_use.discard(ip)
+            self.released.append(ip)
+
+
+class SimulatedNetworks:
+    """
+    The networks of a simulated client, with the interface of the Docker SDK's NetworkCollection.
+    """
+
+    def __init__(self, subnet):
+        """
+        Creates a SimulatedNetworks with the default bridge network.
+        :param subnet: the subnet of the default bridge network
+        """
+        self.lock = Lock()
+        self.by_name = {'bridge': SimulatedNetwork('bridge', subnet)}
+
+    def create(self, name, driver=None, ipam=None, **kwargs):
+        """
+        Creates a network.
+        :param name: the name of the network
+        :param driver: unused
+        :param ipam: the IPAMConfig with the subnet (and optional gateway) of the network
+        :return: the network
+        """
+        pool = ipam['Config'][0]
+        network = SimulatedNetwork(name, pool['Subnet'], pool.get('Gateway'))
+        with self.lock:
+            self.by_name[name] = network
+        return network
+
+    def get(self, name):
+        """
+        Gets a network by its name.
+        :param name: the name of the network
+        :raises NotFound: if there is no such network
+        :return: the network
+        """
+        with self.lock:
+            network = self.by_name.get(name)
+        if network is None:
+            raise docker.errors.NotFound("No such network: " + name)
+        return network
+
+    def list(self, names=None):
+        """
+        Lists the networks.
+        :param names: the names of the networks to list, defaults to every network
+        :return: list of the networks
+        """
+        with self.lock:
+            return [network for name, network in self.by_name.items() if names is None or name in names]
+
+
+class SimulatedDockerClient:
+    """
+    An in-process stand-in for the Docker client, running simulated containers.
+    """
+
+    def __init__(self, start_latency=1.0, start_jitter=0.5, output=b" * Running on http://0.0.0.0:5000/\n",
+                 subnet="172.17.0.0/16", api_latency=0.01, run_failure_rate=0.0, crash_rate=0.0,
+                 login_failure_rate=0.0, seed=None):
+        """
+        Creates a SimulatedDockerClient with the passed in parameters.
+        :param start_latency: the average number of seconds after a container is started that it is ready
+        :param start_jitter: the fraction the start latency of each container is randomly made shorter or longer by
+        :param output: the log output written by a container once it is ready
+        :param subnet: the subnet of the default bridge network
+        :param api_latency: the number of seconds each call that creates, starts, or stops a container takes
+        :param run_failure_rate: the fraction of the containers that fail to be created
+        :param crash_rate: the fraction of the containers that crash before they are ready
+        :param login_failure_rate: the fraction of the login requests to a service that fail
+        :param seed: the seed of the start latencies and injected failures
+        """
+        self.start_latency = start_latency
+        self.start_jitter = start_jitter
+        self.output = output
+        self.api_latency = api_latency
+        self.run_failure_rate = run_failure_rate
+        self.crash_rate = crash_rate
+        self.random = random.Random(seed)
+        self.random_lock = Lock()
+        self.containers = SimulatedContainers(self)
+        self.networks = SimulatedNetworks(subnet)
+        # Simulates the services running in the containers, mounted on the HTTP client of the Container Runtime
+        self.service_adapter = SimulatedServiceAdapter(self, login_failure_rate)
+
+    def call_api(self):
+        """
+        Waits for the time a call to the Docker API takes.
+        """
+        if self.api_latency > 0:
+            time.sleep(self.api_latency)
+
+    def chance(self, rate):
+        """
+        :param rate: the probability of the event
+        :return: whether the event happens
+        """
+        if rate <= 0:
+            return False
+        with self.random_lock:
+            return self.random.random() < rate
+
+    def pick_start_latency(self):
+        """
+        :return: the number of seconds a new container takes to be ready
+        """
+        with self.random_lock:
+            jitter = self.random.uniform(-self.start_jitter, self.start_jitter)
+        return max(self.start_latency * (1 + jitter), 0.0)
+
+    def close(self):
+        """
+        Closes the client, which has no connection to close.
+        """
+        pass
+
+
+class SimulatedServiceAdapter(BaseAdapter):
+    """
+    Transport adapter that answers the requests sent to the services running in simulated containers,
+    found by the host port of the request's url.
+    """
+
+    def __init__(self, client, login_failure_rate):
+        """
+        Creates a SimulatedServiceAdapter with the passed in parameters.
+        :param client: the simulated client running the containers
+        :param login_failure_rate: the fraction of the login requests that fail
+        """
+        super().__init__()
+        self.client = client
+        self.login_failure_rate = login_failure_rate
+        self.sessions = itertools.count(1)
+
+    def send(self, request, **kwargs):
+        """
+        Answers a request: logging a user in, or the health check of the session.
+        :param request: the prepared request
+        :raises ConnectionError: if no ready container is published at the port of the url
+        :return: the response
+        """
+        url = urlsplit(request.url)
+        container = self.client.containers.find_by_port(url.port)
+        if container is None or not container.is_ready():
+            raise requests.ConnectionError("Connection refused: " + request.url, request=request)
+
+        cookies = {}
+        if url.path == '/api/login' and request.method == 'POST':
+            if self.client.chance(self.login_failure_rate):
+                return self.__response(request, 500, "Simulated login failure")
+            container.logged_in = True
+            cookies['session'] = "simulated-session-" + str(next(self.sessions))
+            return self.__response(request, 200, "Successfully logged in", cookies)
+        if url.path == '/api/health_check':
+            if container.logged_in:
+                return self.__response(request, 200, "Running")
+            return self.__response(request, 400, "Not logged in")
+        return self.__response(request, 404, "Not found")
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def __response(request, status_code, message, cookies=None):
+        """
+        Private function to build the response to a request.
+        :param request: the prepared request
+        :param status_code: the status code of the response
+        :param message: the body of the response
+        :param cookies: dictionary of the cookies set by the response
+        :return: the response
+        """
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict({'Content-Type': 'text/plain'})
+        response._content = message.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        for name, value in (cookies or {}).items():
+            response.cookies.set(name, value)
+        return response
@@ -0,0 +1,382 @@
+"""
+Tracing
+
+Span-style tracing of the work done by the Container Runtime. Every service request, health check, and shutdown is
+recorded as a trace made of timed spans, one for each of its phases (ex: "authorization", "port_allocation",
+"container_run", "readiness", "labeling", and "login" for a service request). The trace being recorded is kept for
+the current thread, so the helpers called while handling a request add their spans to it without it being passed in,
+and the spans of work done outside of a trace (ex: refilling the warm pools) are not recorded.
+
+Each trace has an id, which for a service request is its request id: taken from the X-Request-ID header of the
+request if it has a valid one, or generated otherwise. The request id is sent to the service with the login request,
+and returned to the user with a successful response.
+
+Completed traces are kept in a rolling buffer of the most recent traces of each name, so frequent health checks do not
+push out the service requests. The buffer can be queried from the /admin/traces endpoint, exported as JSON lines,
+and summarized as the latency percentiles of each phase.
+
+The following can be imported from this module:
+    * REQUEST_ID_HEADER - the header the request id is sent and returned in
+    * Span - a timed phase of a trace
+    * Trace - the spans of a single service request, health check, or shutdown
+    * Tracer - records the traces and keeps the most recent ones
+    * new_request_id - gets the request id of a request, or generates a new one
+    * trace - starts a trace on the current thread with the global tracer
+    * span - times a phase of the trace of the current thread
+    * current_trace - gets the trace of the current thread
+    * init_tracer - creates the global tracer
+    * get_tracer - gets the global tracer
+"""
+import json
+import re
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock, local
+
+# The global tracer used by the Container Runtime
+TRACER = None
+
+# The header the request id is sent and returned in
+REQUEST_ID_HEADER = 'X-Request-ID'
+# A request id sent by a user is only used if it is made of these characters, so it is safe to log and forward
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# The percentiles of each phase in a summary
+SUMMARY_PERCENTILES = (50, 95, 99)
+
+# The trace being recorded by each thread
+tracing_state = local()
+
+
+class Span:
+    """
+    A timed phase of a trace.
+    """
+
+    def __init__(self, name, offset, attributes):
+        """
+        Creates a Span that has started.
+        :param name: the name of the phase (ex: "readiness")
+        :param offset: the number of seconds from the start of the trace to the start of this span
+        :param attributes: dictionary of details about the phase (ex: the port that was allocated)
+        """
+        self.name = name
+        self.offset = offset
+        self.attributes = attributes
+        self.duration = None
+        self.error = None
+
+    def to_dict(self):
+        """
+        :return: dictionary of the span, with its times in milliseconds
+        """
+        return {'name': self.name, 'offset_ms': to_milliseconds(self.offset),
+                'duration_ms': to_milliseconds(self.duration), 'attributes': self.attributes, 'error': self.error}
+
+
+class Trace:
+    """
+    The spans of a single service request, health check, or shutdown.
+    """
+
+    def __init__(self, name, trace_id, attributes):
+        """
+        Creates a Trace that has started.
+        :param name: the name of the traced work (ex: "service_request")
+        :param trace_id: the id of the trace, the request id for a service request
+        :param attributes: dictionary of details about the traced work (ex: the requested service)
+        """
+        self.name = name
+        self.id = trace_id
+        self.attributes = attributes
+        self.spans = []
+        # Wall clock time the trace started at, reported in the exported traces
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def finish(self, error=None):
+        """
+        Ends the trace.
+        :param error: the exception that ended the traced work, None if it was successful
+        """
+        self.duration = time.perf_counter() - self.start
+        if error is not None:
+            self.error = describe_error(error)
+            # Requests aborted with an HTTP error record its status code
+            if isinstance(getattr(error, 'code', None), int):
+                self.attributes.setdefault('status_code', error.code)
+
+    def to_dict(self):
+        """
+        :return: dictionary of the trace and its spans, with its times in milliseconds
+        """
+        return {'id': self.id, 'name': self.name, 'started_at': self.started_at,
+                'duration_ms': to_milliseconds(self.duration), 'attributes': self.attributes, 'error': self.error,
+                'spans': [span.to_dict() for span in self.spans]}
+
+
+class Tracer:
+    """
+    Thread-safe recorder of traces, keeping the most recent completed traces of each name.
+    """
+
+    def __init__(self, buffer_size=1000, enabled=True, export_path=None):
+        """
+        Creates a Tracer with the passed in parameters.
+        :param buffer_size: the number of completed traces of each name that are kept
+        :param enabled: whether traces are recorded, if not the traced work still has an id but no spans are timed
+        :param export_path: the file the kept traces are exported to as JSON lines when the Container Runtime shuts
+        down, None to not export them
+        """
+        self.buffer_size = buffer_size
+        self.enabled = enabled
+        self.export_path = export_path
+        self.lock = Lock()
+        # Completed traces keyed by their name, oldest first
+        self.buffers = {}
+
+    @contextmanager
+    def trace(self, name, trace_id=None, **attributes):
+        """
+        Records a trace of the work done by the current thread within the block of code.
+        Ex: with tracer.trace('health_check', service=service) as health_check_trace: ...
+        :param name: the name of the traced work
+        :param trace_id: the id of the trace, a new id is generated if None
+        :param attributes: details about the traced work
+        :return: the Trace, which is kept once the block ends
+        """
+        current = Trace(name, trace_id or uuid.uuid4().hex, attributes)
+        if not self.enabled:
+            yield current
+            return
+
+        previous = getattr(tracing_state, 'trace', None)
+        tracing_state.trace = current
+        error = None
+        try:
+            yield current
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracing_state.trace = previous
+            current.finish(error)
+            self.add(current)
+
+    def add(self, completed):
+        """
+        Keeps a completed trace, dropping the oldest trace of the same name if its buffer is full.
+        :param completed: the completed Trace
+        """
+        with self.lock:
+            buffer = self.buffers.get(completed.name)
+            if buffer is None:
+                buffer = self.buffers[completed.name] = deque(maxlen=self.buffer_size)
+            buffer.append(completed)
+
+    def query(self, name=None, trace_id=None, min_duration=None, errors_only=False, limit=None):
+        """
+        Gets the kept traces that match every given filter, most recent first.
+        :param name: the name of the traces, any name if None
+        :param trace_id: the id (or request id) of the trace, any id if None
+        :param min_duration: the minimum number of seconds the traces took, any duration if None
+        :param errors_only: whether to only get the traces that ended with an error
+        :param limit: the maximum number of traces, unlimited if None
+        :return: list of the traces
+        """
+        with self.lock:
+            if name is None:
+                traces = [kept for buffer in self.buffers.values() for kept in buffer]
+            else:
+                traces = list(self.buffers.get(name, ()))
+
+        matching = []
+        for kept in sorted(traces, key=lambda kept: kept.started_at, reverse=True):
+            if limit is not None and len(matching) >= limit:
+                break
+            if trace_id is not None and kept.id != trace_id:
+                continue
+            if min_duration is not None and kept.duration < min_duration:
+                continue
+            if errors_only and kept.error is None:
+                continue
+            matching.append(kept)
+        return matching
+
+    def summarize(self, name=None):
+        """
+        Summarizes the latency of each phase of the kept traces.
+        :param name: the name of the traces to summarize, every name if None
+        :return: dictionary of the summaries keyed by trace name, then by phase name. Each summary has the count,
+        mean, percentiles, and max of the phase in milliseconds. The "total" phase is the duration of the traces.
+        """
+        durations = {}
+        for kept in self.query(name):
+            phases = durations.setdefault(kept.name, {'total': []})
+            phases['total'].append(kept.duration)
+            for timed in kept.spans:
+                if timed.duration is not None:
+                    phases.setdefault(timed.name, []).append(timed.duration)
+
+        return {trace_name: {phase: summarize_durations(values) for phase, values in phases.items()}
+                for trace_name, phases in durations.items()}
+
+    def export(self, stream, traces=None):
+        """
+        Writes traces to a stream as JSON lines, one trace per line.
+        :param stream: the text stream the traces are written to
+        :param traces: the traces to write, every kept trace (oldest first) if None
+        :return: the number of traces written
+        """
+        if traces is None:
+            traces = reversed(self.query())
+        written = 0
+        for kept in traces:
+            stream.write(json.dumps(kept.to_dict()) + "\n")
+            written += 1
+        return written
+
+    def save(self):
+        """
+        Appends every kept trace to the export file, if there is one.
+        :return: the number of traces written
+        """
+        if self.export_path is None:
+            return 0
+        with open(self.export_path, 'a') as stream:
+            return self.export(stream)
+
+    def clear(self):
+        """
+        Drops every kept trace.
+        """
+        with self.lock:
+            self.buffers.clear()
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(buffer) for buffer in self.buffers.values())
+
+
+# Used by trace when there is no global tracer, so the traced work still runs
+UNRECORDED_TRACER = Tracer(enabled=False)
+
+
+def new_request_id(header=None):
+    """
+    Gets the request id of a request.
+    :param header: the value of the request's X-Request-ID header
+    :return: the value of the header if it is a valid request id, otherwise a new request id
+    """
+    if header is not None and VALID_REQUEST_ID.match(header):
+        return header
+    return uuid.uuid4().hex
+
+
+def trace(name, trace_id=None, **attributes):
+    """
+    Records a trace of the work done by the current thread within the block of code with the global tracer.
+    If there is no global tracer (ex: in unit tests of a single component), the trace is not recorded.
+    Ex: with trace('service_request', request_id, service=service): ...
+    :param name: the name of the traced work
+    :param trace_id: the id of the trace, a new id is generated if None
+    :param attributes: details about the traced work
+    :return: the context manager of the Trace
+    """
+    tracer = TRACER if TRACER is not None else UNRECORDED_TRACER
+    return tracer.trace(name, trace_id, **attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Times a phase of the trace of the current thread within the block of code.
+    Does not record anything if there is no trace for the current thread.
+    Ex: with span('container_run', image=image) as container_run: ...
+    :param name: the name of the phase
+    :param attributes: details about the phase, more can be added to the span's attributes within the block
+    :return: the Span
+    """
+    current = getattr(tracing_state, 'trace', None)
+    if current is None:
+        yield Span(name, 0.0, attributes)
+        return
+
+    timed = Span(name, time.perf_counter() - current.start, attributes)
+    # Added when it starts so the spans are in the order they started, with nested spans after their parent
+    current.spans.append(timed)
+    try:
+        yield timed
+    except BaseException as e:
+        timed.error = describe_error(e)
+        raise
+    finally:
+        timed.duration = time.perf_counter() - current.start - timed.offset
+
+
+def current_trace():
+    """
+    Gets the trace being recorded by the current thread.
+    :return: the Trace, None if no trace is being recorded
+    """
+    return getattr(tracing_state, 'trace', None)
+
+
+def describe_error(error):
+    """
+    Describes the exception that ended a trace or span.
+    :param error: the exception
+    :return: the description, the message of a request aborted with an HTTP error
+    """
+    data = getattr(error, 'data', None)
+    if isinstance(data, dict) and data.get('message'):
+        return str(data['message'])
+    return type(error).__name__ + ": " + str(error)
+
+
+def summarize_durations(durations):
+    """
+    Summarizes a list of durations.
+    :param durations: list of durations in seconds
+    :return: dictionary of the count, mean, percentiles (nearest rank), and max of the durations in milliseconds
+    """
+    durations = sorted(durations)
+    summary = {'count': len(durations), 'mean_ms': to_milliseconds(sum(durations) / len(durations))}
+    for percent in SUMMARY_PERCENTILES:
+        rank = max(1, -(-len(durations) * percent // 100))
+        summary['p' + str(percent) + '_ms'] = to_milliseconds(durations[rank - 1])
+    summary['max_ms'] = to_milliseconds(durations[-1])
+    return summary
+
+
+def to_milliseconds(seconds):
+    """
+    Converts a number of seconds to milliseconds for the exported traces.
+    :param seconds: the number of seconds, or None
+    :return: the number of milliseconds rounded to a microsecond, None if seconds is None
+    """
+    if seconds is None:
+        return None
+    return round(seconds * 1000, 3)
+
+
+def init_tracer(config):
+    """
+    Creates the global tracer.
+    :param config: the config of the Container Runtime app
+    """
+    global TRACER
+    TRACER = Tracer(buffer_size=config['TRACE_BUFFER_SIZE'], enabled=config['TRACING_ENABLED'],
+                    export_path=config['TRACE_EXPORT_PATH'])
+
+
+def get_tracer():
+    """
+    Gets the global tracer
+    :return: the tracer
+    """
+    return TRACER
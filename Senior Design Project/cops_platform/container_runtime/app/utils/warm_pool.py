@@ -0,0 +1,142 @@
+"""
+Warm Pool
+
+Keeps a configurable number of pre-started and already labeled service containers ready for each
+service and role. A service request is handed one of these ready containers instead of waiting for a
+new container to start, and the pool is refilled in the background.
+
+The following can be imported from this module:
+    * WarmPool - the pool of ready containers for a single service and role
+    * init_warm_pools - creates and starts the warm pools for every service and role
+    * acquire_container - takes a ready container from the warm pool for a service and role
+    * shutdown_warm_pools - stops refilling every warm pool
+"""
+from queue import Queue, Empty
+from threading import Thread, Event
+
+from .service_util import services
+from .container_util import build_container_env, start_service_container, clear_ip
+from .port_allocator import get_port_allocator
+from .logging_util import get_module_logger
+
+# Each role a service container can be started with
+ROLES = ('student', 'instructor', 'coordinator')
+
+logger = get_module_logger(__name__)
+
+# Every running warm pool keyed by the (service, role) it holds containers for
+warm_pools = {}
+
+
+class WarmPool(Thread):
+    """
+    A thread that keeps the pool of ready containers for a single service and role filled.
+    """
+
+    def __init__(self, service_class, role, size, env):
+        """
+        Creates a WarmPool with the passed in parameters.
+        :param service_class: the static config class of the service the containers are running
+        :param role: the role (security label) the containers are started with
+        :param size: the number of ready containers to keep in this pool
+        :param env: the environment variables the containers are started with
+        """
+        Thread.__init__(self, daemon=True)
+        self.service_class = service_class
+        self.role = role
+        self.size = size
+        self.env = env
+        # Ready containers as tuples of (service object, container, container ip)
+        self.ready = Queue()
+        # Set whenever a container is taken out of the pool so it is refilled
+        self.refill = Event()
+        self.stopped = Event()
+
+    def run(self):
+        """
+        Starts new containers until the pool is full, then waits until a container is taken out of the pool.
+        """
+        while not self.stopped.is_set():
+            if self.ready.qsize() >= self.size:
+                self.refill.wait()
+                self.refill.clear()
+                continue
+
+            try:
+                self.ready.put(start_service_container(self.service_class, self.role, self.env))
+            except Exception as e:
+                # Waits before trying again so a broken service image does not spin this thread
+                logger.error("Failed to start a " + self.role + " container for the warm pool: " + str(e))
+                self.stopped.wait(5)
+
+    def acquire(self):
+        """
+        Takes a ready container out of the pool and signals for it to be refilled.
+        Containers that are no longer running are skipped, releasing their ip and port, and removed.
+        :return: tuple of the service object, container, and container ip. None if the pool is empty.
+        """
+        while True:
+            try:
+                service_object, container, container_ip = self.ready.get_nowait()
+            except Empty:
+                return None
+            finally:
+                self.refill.set()
+
+            # Skips any container that has been removed or has exited while waiting in the pool
+            try:
+                container.reload()
+                if container.status == 'running':
+                    return service_object, container, container_ip
+            except Exception:
+                pass
+            clear_ip(container_ip)
+            get_port_allocator().release(service_object.host_port)
+            # Removes the dead container now instead of leaving it until the stopped containers are pruned
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+
+    def shutdown(self):
+        """
+        Stops refilling this pool. The pooled containers are stopped along with all other containers
+        when the Container Runtime is torn down.
+        """
+        self.stopped.set()
+        self.refill.set()
+
+
+def init_warm_pools(config):
+    """
+    Creates and starts a warm pool for each service and role that has a pool size greater than zero.
+    :param config: the config of the Container Runtime app
+    """
+    for service, service_class in services.items():
+        for role in ROLES:
+            size = config['WARM_POOL_SIZES'][role]
+            if size > 0:
+                pool = WarmPool(service_class, role, size, build_container_env(config, role))
+                warm_pools[(service, role)] = pool
+                pool.start()
+
+
+def acquire_container(service, role):
+    """
+    Takes a ready container out of the warm pool for the given service and role.
+    :param service: the name of the requested service
+    :param role: the role (security label) of the user
+    :return: tuple of the service object, container, and container ip. None if there is no ready container.
+    """
+    pool = warm_pools.get((service, role))
+    if pool is None:
+        return None
+    return pool.acquire()
+
+
+def shutdown_warm_pools():
+    """
+    Stops refilling every warm pool.
+    """
+    for pool in warm_pools.values():
+        pool.shutdown()
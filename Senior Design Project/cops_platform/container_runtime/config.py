@@ -20,6 +20,104 @@ class Config:
     ENFORCED = os.getenv("ENFORCED")
     # Disables due to significant overhead this adds
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Number of pre-started containers kept ready for each service and role
+    # WARM_POOL_SIZE sets the size for every role, WARM_POOL_SIZE_<ROLE> overrides it for a single role
+    # Defaults to 0 (no warm pool) if no corresponding env is provided
+    WARM_POOL_SIZES = {role: int(os.getenv("WARM_POOL_SIZE_" + role.upper()) or os.getenv("WARM_POOL_SIZE") or 0)
+                       for role in ('student', 'instructor', 'coordinator')}
+    # Inclusive range of host ports that service containers are mapped to
+    SERVICE_PORT_START = int(os.getenv("SERVICE_PORT_START") or 8000)
+    SERVICE_PORT_END = int(os.getenv("SERVICE_PORT_END") or 8999)
+    # Maximum number of users whose authorization level is cached, and the number of seconds it is cached for
+    AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE") or 1024)
+    AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL") or 60)
+    # Timeouts (in seconds) for the requests sent to the services running in containers
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT") or 2)
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT") or 10)
+    # Number of times a failed connection to a service is retried, and the backoff factor (in seconds) between retries
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES") or 2)
+    HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF") or 0.1)
+    # Number of hosts to keep a connection pool for, and the maximum number of connections to a single host
+    HTTP_MAX_HOSTS = int(os.getenv("HTTP_MAX_HOSTS") or 256)
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST") or 2)
+    # Maximum number of containers stopped at the same time when the Container Runtime shuts down,
+    # the number of seconds to wait for all of them to stop,
+    # and the number of seconds each container is given to exit before it is killed
+    SHUTDOWN_WORKERS = int(os.getenv("SHUTDOWN_WORKERS") or 32)
+    SHUTDOWN_DEADLINE = float(os.getenv("SHUTDOWN_DEADLINE") or 15)
+    SHUTDOWN_STOP_TIMEOUT = int(os.getenv("SHUTDOWN_STOP_TIMEOUT") or 3)
+    # Number of seconds between the health checks of each running session
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL") or 30)
+    # Number of seconds to wait for a response to a single health check
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT") or 5)
+    # Maximum number of health checks that are run at the same time
+    HEALTH_CHECK_WORKERS = int(os.getenv("HEALTH_CHECK_WORKERS") or 16)
+    # Fraction of the interval each health check is randomly moved earlier or later by
+    HEALTH_CHECK_JITTER = float(os.getenv("HEALTH_CHECK_JITTER") or 0.1)
+    # Number of seconds to wait for more ip label changes before applying them together as a single batch
+    LABEL_BATCH_WINDOW = float(os.getenv("LABEL_BATCH_WINDOW") or 0.05)
+    # Number of seconds a batch of ip label changes is given to be applied before its process is killed
+    LABEL_BATCH_TIMEOUT = float(os.getenv("LABEL_BATCH_TIMEOUT") or 10)
+    # Docker network and subnet of the pre-labeled container ips, defaults to no pool of pre-labeled ips
+    LABEL_POOL_NETWORK = os.getenv("LABEL_POOL_NETWORK")
+    LABEL_POOL_SUBNET = os.getenv("LABEL_POOL_SUBNET") or "172.30.0.0/16"
+    # Number of pre-labeled container ips reserved for each role
+    # LABEL_POOL_SIZE sets the size for every role, LABEL_POOL_SIZE_<ROLE> overrides it for a single role
+    LABEL_POOL_SIZES = {role: int(os.getenv("LABEL_POOL_SIZE_" + role.upper()) or os.getenv("LABEL_POOL_SIZE") or 32)
+                        for role in ('student', 'instructor', 'coordinator')}
+    # Docker image of the shared connection multiplexer (PgBouncer) the service containers connect to Postgres through
+    # Defaults to no multiplexer, where every container connects to Postgres directly
+    DB_MULTIPLEXER_IMAGE = os.getenv("DB_MULTIPLEXER_IMAGE")
+    # Host address and host port the service containers reach the multiplexer at
+    DB_MULTIPLEXER_HOST = os.getenv("DB_MULTIPLEXER_HOST") or "172.17.0.1"
+    DB_MULTIPLEXER_PORT = int(os.getenv("DB_MULTIPLEXER_PORT") or 6432)
+    # Host (and optional port) of Postgres as reached from inside of the multiplexer's container
+    DB_MULTIPLEXER_UPSTREAM = os.getenv("DB_MULTIPLEXER_UPSTREAM") or "172.17.0.1"
+    # When a server connection is shared with another container: after each transaction, or after each session
+    DB_MULTIPLEXER_POOL_MODE = os.getenv("DB_MULTIPLEXER_POOL_MODE") or "transaction"
+    # Number of connections to Postgres shared between every container,
+    # and the maximum number of connections from the containers to the multiplexer
+    DB_MULTIPLEXER_POOL_SIZE = int(os.getenv("DB_MULTIPLEXER_POOL_SIZE") or 20)
+    DB_MULTIPLEXER_MAX_CLIENT_CONNECTIONS = int(os.getenv("DB_MULTIPLEXER_MAX_CLIENT_CONNECTIONS") or 1000)
+    # The backend that runs the service containers: "docker" (the Docker daemon) or "simulated" (in process)
+    CONTAINER_BACKEND = os.getenv("CONTAINER_BACKEND") or "docker"
+    # Average number of seconds a simulated container takes to be ready,
+    # and the fraction each container's start time is randomly made shorter or longer by
+    SIMULATED_START_LATENCY = float(os.getenv("SIMULATED_START_LATENCY") or 1.0)
+    SIMULATED_START_JITTER = float(os.getenv("SIMULATED_START_JITTER") or 0.5)
+    # Log output written by a simulated container once it is ready
+    SIMULATED_LOG_OUTPUT = os.getenv("SIMULATED_LOG_OUTPUT") or " * Running on http://0.0.0.0:5000/\n"
+    # Subnet the ips of simulated containers are assigned from
+    SIMULATED_SUBNET = os.getenv("SIMULATED_SUBNET") or "172.17.0.0/16"
+    # Number of seconds each simulated Docker API call that creates, starts, or stops a container takes
+    SIMULATED_API_LATENCY = float(os.getenv("SIMULATED_API_LATENCY") or 0.01)
+    # Fractions of the simulated containers that fail to be created or crash before they are ready,
+    # and of the login requests to the simulated services that fail
+    SIMULATED_RUN_FAILURE_RATE = float(os.getenv("SIMULATED_RUN_FAILURE_RATE") or 0)
+    SIMULATED_CRASH_RATE = float(os.getenv("SIMULATED_CRASH_RATE") or 0)
+    SIMULATED_LOGIN_FAILURE_RATE = float(os.getenv("SIMULATED_LOGIN_FAILURE_RATE") or 0)
+    # Seed of the simulated start times and failures, defaults to a different seed each run
+    SIMULATED_SEED = os.getenv("SIMULATED_SEED")
+    # Whether the phases of every service request, health check, and shutdown are traced,
+    # unless TRACING_ENABLED is "false" or "0"
+    TRACING_ENABLED = (os.getenv("TRACING_ENABLED") or "true").lower() not in ("false", "0")
+    # Number of the most recent traces of each kind (ex: service requests) kept for the /admin/traces endpoint
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE") or 1000)
+    # File the kept traces are appended to as JSON lines when the Container Runtime shuts down, defaults to none
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+    # Comma separated addresses allowed to query the /admin/traces endpoints, defaults to the local machine only
+    TRACE_ADMIN_ADDRESSES = [address.strip() for address in
+                             (os.getenv("TRACE_ADMIN_ADDRESSES") or "127.0.0.1,::1").split(",")]
+    # Lowest level of the lines that are logged (ex: "INFO"), and whether they are logged as "text" or "json"
+    LOG_LEVEL = os.getenv("LOG_LEVEL") or "DEBUG"
+    LOG_FORMAT = os.getenv("LOG_FORMAT") or "text"
+    # File the lines are also logged to, defaults to only logging to the console
+    # The file is rotated once it reaches LOG_FILE_MAX_BYTES, keeping LOG_FILE_BACKUPS of the previous files
+    LOG_FILE = os.getenv("LOG_FILE")
+    LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES") or 10 * 1024 * 1024)
+    LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS") or 5)
+    # Maximum number of lines waiting to be logged, new lines are dropped instead of blocking a request once it is full
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE") or 10000)
 
     @staticmethod
     def init_app(app):
@@ -37,25 +135,58 @@ class PostgresConfig(Config):
 
     DB_URL = None
 
-    # If all the required env have not been set - exits with a error message
-    if POSTGRES_URL is None or POSTGRES_USER is None or POSTGRES_PW is None or POSTGRES_DB is None:
-        print("Postgres Connection environment variables have not been set.")
-        print("Requires the following envs:")
-        print("POSTGRES_USER")
-        print("POSTGRES_PW")
-        print("POSTGRES_URL")
-        print("POSTGRES_DB")
-        sys.exit(0)
-    else:
+    if POSTGRES_URL is not None and POSTGRES_USER is not None and POSTGRES_PW is not None \
+            and POSTGRES_DB is not None:
         DB_URL = 'postgresql+psycopg2://{user}:{pw}@{url}/{db}'.format(user=POSTGRES_USER, pw=POSTGRES_PW,
                                                                        url=POSTGRES_URL, db=POSTGRES_DB)
 
     SQLALCHEMY_DATABASE_URI = DB_URL
 
+    # Connection pool of the Container Runtime's own database connections
+    # Number of connections kept open, and the number of extra connections opened when all of them are in use
+    # Number of seconds before a connection is replaced, and the number of seconds to wait for a free connection
+    # Each connection is checked before it is used unless DB_POOL_PRE_PING is "false" or "0"
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE") or 5),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW") or 5),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE") or 1800),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT") or 10),
+        "pool_pre_ping": (os.getenv("DB_POOL_PRE_PING") or "true").lower() not in ("false", "0"),
+    }
+
+    @staticmethod
+    def init_app(app):
+        # If all the required env have not been set - exits with a error message
+        if PostgresConfig.DB_URL is None:
+            print("Postgres Connection environment variables have not been set.")
+            print("Requires the following envs:")
+            print("POSTGRES_USER")
+            print("POSTGRES_PW")
+            print("POSTGRES_URL")
+            print("POSTGRES_DB")
+            sys.exit(0)
+
+
+class SimulatedConfig(Config):
+    """
+    Runs the service containers with the simulated backend, and uses a SQLite database instead of Postgres
+    for the Mock IAM. Used for load testing the Container Runtime without Docker or Postgres.
+    """
+    CONTAINER_BACKEND = "simulated"
+    # Passed in to the simulated containers, which do not connect to a database
+    POSTGRES_URL = os.environ.get("POSTGRES_URL") or "127.0.0.1"
+    POSTGRES_USER = os.environ.get("POSTGRES_USER") or "simulated"
+    POSTGRES_PW = os.environ.get("POSTGRES_PW") or "simulated"
+    POSTGRES_DB = os.environ.get("POSTGRES_DB") or "simulated"
+
+    SQLALCHEMY_DATABASE_URI = os.getenv("SIMULATED_DATABASE_URL") or 'sqlite:///' + os.path.join(basedir,
+                                                                                                 'simulated.db')
+
 
 """
 Each config string key and the corresponding Config class it will create.
 """
 config = {
-    'default':  PostgresConfig
+    'default':  PostgresConfig,
+    'simulated': SimulatedConfig
 }
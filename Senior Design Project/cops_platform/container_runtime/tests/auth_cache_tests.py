@@ -0,0 +1,45 @@
+import time
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.auth_cache import AuthorizationCache
+
+
+class AuthorizationCacheTestCase(unittest.TestCase):
+    """
+    Unit tests for the Authorization Cache.
+    """
+
+    def test_least_recently_used_evicted(self):
+        cache = AuthorizationCache(max_size=2, ttl=60)
+        cache.put('student', 'student')
+        cache.put('instructor', 'instructor')
+
+        # Using the student makes the instructor the least recently used
+        self.assertEqual(cache.get('student'), 'student')
+        cache.put('coordinator', 'coordinator')
+
+        self.assertIsNone(cache.get('instructor'))
+        self.assertEqual(cache.get('student'), 'student')
+        self.assertEqual(cache.get('coordinator'), 'coordinator')
+
+    def test_expired_entries(self):
+        cache = AuthorizationCache(max_size=2, ttl=0.05)
+        cache.put('student', 'student')
+        self.assertEqual(cache.get('student'), 'student')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('student'))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_invalidate_and_clear(self):
+        cache = AuthorizationCache(max_size=4, ttl=60)
+        cache.put('student', 'student')
+        cache.put('instructor', 'instructor')
+
+        cache.invalidate('student')
+        self.assertIsNone(cache.get('student'))
+        self.assertEqual(cache.get('instructor'), 'instructor')
+
+        cache.clear()
+        self.assertIsNone(cache.get('instructor'))
@@ -0,0 +1,102 @@
+import subprocess
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+import docker
+
+from cops_platform.container_runtime.app.utils import container_util
+from cops_platform.container_runtime.app.utils.container_util import start_service_container, stop_service_container
+from cops_platform.container_runtime.app.utils.label_manager import LabelManager
+from cops_platform.container_runtime.app.utils.port_allocator import PortAllocator
+from cops_platform.container_runtime.app.utils.simulated_backend import SimulatedDockerClient
+
+
+class FakeService:
+    """
+    Service class of a service run by the simulated container backend.
+    """
+    container = 'course_manager_test'
+    port = '5000/tcp'
+
+    def __init__(self, host_port):
+        self.host_port = host_port
+
+
+class FailingContainer:
+    """
+    Running container whose stop fails with the given Docker error.
+    """
+    def __init__(self, container, error):
+        self.name = container.name
+        self.error = error
+
+    def stop(self):
+        raise self.error
+
+
+class FailingBackend:
+    """
+    Label backend that fails to apply every batch of label changes.
+    """
+    enforcing = True
+
+    def apply(self, changes):
+        raise subprocess.CalledProcessError(1, ['labelbatch'])
+
+
+class ContainerUtilTestCase(unittest.TestCase):
+    """
+    Unit tests for the Container Utils, with the containers run by the simulated container backend.
+    """
+
+    def setUp(self):
+        self.docker_client = SimulatedDockerClient(start_latency=0, start_jitter=0, api_latency=0)
+        self.port_allocator = PortAllocator(52000, 52001)
+        self.label_manager = LabelManager(FailingBackend(), batch_window=0)
+        self.label_manager.start()
+
+        # Replaces the global components the helpers use, and skips waiting until the service is ready
+        self.originals = (container_util.get_docker_client, container_util.get_port_allocator,
+                          container_util.get_label_manager, container_util.get_ip_pool,
+                          container_util.wait_until_ready)
+        container_util.get_docker_client = lambda: self.docker_client
+        container_util.get_port_allocator = lambda: self.port_allocator
+        container_util.get_label_manager = lambda: self.label_manager
+        container_util.get_ip_pool = lambda: None
+        container_util.wait_until_ready = lambda container, service_object: None
+
+    def tearDown(self):
+        self.label_manager.stop(timeout=1)
+        (container_util.get_docker_client, container_util.get_port_allocator, container_util.get_label_manager,
+         container_util.get_ip_pool, container_util.wait_until_ready) = self.originals
+
+    def test_container_removed_when_labeling_fails(self):
+        with self.assertRaises(subprocess.CalledProcessError):
+            start_service_container(FakeService, 'student', {})
+
+        # The container is not left running without its label, and its port can be allocated again
+        self.assertEqual(self.docker_client.containers.list(all=True), [])
+        self.assertEqual(sorted(self.port_allocator.free), [52000, 52001])
+
+    def test_removed_container_treated_as_stopped(self):
+        container = self.docker_client.containers.run(FakeService.container, ports={FakeService.port: 52000})
+        self.port_allocator.allocate()
+        container.remove(force=True)
+
+        stop_service_container(container, FakeService(52000))
+        self.assertIn(52000, self.port_allocator.free)
+
+    def test_port_released_when_stop_fails(self):
+        container = self.docker_client.containers.run(FakeService.container, ports={FakeService.port: 52000})
+        self.port_allocator.allocate()
+
+        with self.assertRaises(docker.errors.APIError):
+            stop_service_container(FailingContainer(container, docker.errors.APIError("Simulated failure")),
+                                   FakeService(52000))
+        self.assertIn(52000, self.port_allocator.free)
+        container.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
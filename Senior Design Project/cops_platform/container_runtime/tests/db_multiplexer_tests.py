@@ -0,0 +1,91 @@
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+import docker
+from cops_platform.container_runtime.app.utils.db_multiplexer import DatabaseMultiplexer, CONTAINER_NAME, \
+    CONTAINER_PORT
+
+
+class FakeContainer:
+    def __init__(self):
+        self.removed = False
+        self.stopped = False
+
+    def remove(self, force):
+        self.removed = True
+
+    def stop(self, timeout):
+        self.stopped = True
+
+
+class FakeContainers:
+    """
+    Records the containers that are run, with an optional container left behind by an earlier run.
+    """
+    def __init__(self, existing=None):
+        self.existing = existing
+        self.runs = []
+
+    def get(self, name):
+        if self.existing is None:
+            raise docker.errors.NotFound(name)
+        return self.existing
+
+    def run(self, image, **kwargs):
+        self.runs.append((image, kwargs))
+        return FakeContainer()
+
+
+class FakeDockerClient:
+    def __init__(self, existing=None):
+        self.containers = FakeContainers(existing)
+
+
+CONFIG = {'POSTGRES_DB': 'cops', 'POSTGRES_USER': 'cops_user', 'POSTGRES_PW': 'secret'}
+
+
+class DatabaseMultiplexerTestCase(unittest.TestCase):
+    """
+    Unit tests for the shared database connection multiplexer.
+    """
+
+    def setUp(self):
+        self.multiplexer = DatabaseMultiplexer('pgbouncer', '172.17.0.1', 6432, '172.17.0.1:5433', 'transaction',
+                                               pool_size=20, max_client_connections=1000)
+
+    def test_url(self):
+        self.assertEqual(self.multiplexer.url, '172.17.0.1:6432')
+
+    def test_env(self):
+        env = self.multiplexer.build_env(CONFIG)
+        self.assertEqual(env['DB_HOST'], '172.17.0.1')
+        self.assertEqual(env['DB_PORT'], '5433')
+        self.assertEqual(env['DB_NAME'], 'cops')
+        self.assertEqual(env['POOL_MODE'], 'transaction')
+        self.assertEqual(env['DEFAULT_POOL_SIZE'], '20')
+        self.assertEqual(env['MAX_CLIENT_CONN'], '1000')
+
+    def test_start_publishes_port(self):
+        client = FakeDockerClient()
+        self.multiplexer.start(client, CONFIG)
+
+        image, kwargs = client.containers.runs[0]
+        self.assertEqual(image, 'pgbouncer')
+        self.assertEqual(kwargs['name'], CONTAINER_NAME)
+        self.assertEqual(kwargs['ports'], {CONTAINER_PORT: 6432})
+
+        self.multiplexer.stop()
+        self.assertIsNone(self.multiplexer.container)
+
+    def test_start_replaces_existing_container(self):
+        existing = FakeContainer()
+        client = FakeDockerClient(existing)
+        self.multiplexer.start(client, CONFIG)
+
+        self.assertTrue(existing.removed)
+        self.assertEqual(len(client.containers.runs), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+from threading import Lock, Event
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.health_check import HealthCheckScheduler
+
+
+class FakeHealthCheck:
+    """
+    Health check whose session stays active for the given number of probes.
+    """
+    def __init__(self, active_probes):
+        self.active_probes = active_probes
+        self.probes = 0
+        self.ended = Event()
+
+    def probe(self, timeout):
+        self.probes += 1
+        return self.probes <= self.active_probes
+
+    def tear_down(self):
+        self.ended.set()
+
+
+class HealthCheckSchedulerTestCase(unittest.TestCase):
+    """
+    Unit tests for the Health Check Scheduler.
+    """
+
+    def setUp(self):
+        self.scheduler = HealthCheckScheduler(interval=0.05, timeout=1, max_workers=4, jitter=0.1)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop(5)
+
+    def test_session_torn_down_when_inactive(self):
+        checks = [FakeHealthCheck(active_probes=n) for n in range(3)]
+        for check in checks:
+            self.scheduler.add(check)
+
+        for check in checks:
+            self.assertTrue(check.ended.wait(5))
+            self.assertEqual(check.probes, check.active_probes + 1)
+        # The checks of the ended sessions are not scheduled again
+        with self.scheduler.condition:
+            self.assertEqual(self.scheduler.heap, [])
+
+    def test_probes_are_bounded(self):
+        lock = Lock()
+        running = [0, 0]
+
+        class SlowHealthCheck(FakeHealthCheck):
+            def probe(self, timeout):
+                with lock:
+                    running[0] += 1
+                    running[1] = max(running[1], running[0])
+                time.sleep(0.05)
+                with lock:
+                    running[0] -= 1
+                return False
+
+        checks = [SlowHealthCheck(active_probes=0) for _ in range(12)]
+        for check in checks:
+            self.scheduler.add(check)
+        for check in checks:
+            self.assertTrue(check.ended.wait(5))
+        self.assertLessEqual(running[1], 4)
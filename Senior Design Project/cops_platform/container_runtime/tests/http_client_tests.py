@@ -0,0 +1,52 @@
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from dotenv import load_dotenv
+load_dotenv()
+
+import requests
+from cops_platform.container_runtime.app.utils.http_client import ServiceHttpClient
+
+
+class LoginHandler(BaseHTTPRequestHandler):
+    """
+    Responds to every POST request with a session cookie, like the login endpoint of a service.
+    """
+    def do_POST(self):
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=abc; Path=/')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class ServiceHttpClientTestCase(unittest.TestCase):
+    """
+    Unit tests for the Service HTTP Client.
+    """
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), LoginHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ServiceHttpClient(connect_timeout=1, read_timeout=1, retries=1, backoff=0,
+                                        max_hosts=4, max_connections_per_host=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_cookie_not_stored(self):
+        url = 'http://127.0.0.1:' + str(self.server.server_port) + '/api/login'
+        response = self.client.post(url, data={'username': 'student'})
+
+        # The cookie is forwarded in the response but never sent to another container
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies.get('session'), 'abc')
+        self.assertEqual(len(self.client.session.cookies), 0)
+
+    def test_connection_error(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get('http://127.0.0.1:1/api/health_check')
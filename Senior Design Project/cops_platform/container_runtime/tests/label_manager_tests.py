@@ -0,0 +1,113 @@
+import subprocess
+import time
+import unittest
+from threading import Thread
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.label_manager import LabelManager, NoOpLabelBackend, IpPool
+
+
+class RecordingBackend:
+    """
+    Backend that records every batch of label changes instead of applying them.
+    """
+    enforcing = True
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def apply(self, changes):
+        self.batches.append(list(changes))
+        if self.error:
+            raise self.error
+
+
+class LabelManagerTestCase(unittest.TestCase):
+    """
+    Unit tests for the Label Manager and the pre-labeled IP pool.
+    """
+
+    def setUp(self):
+        self.backend = RecordingBackend()
+        self.manager = LabelManager(self.backend, batch_window=0.1)
+        self.manager.start()
+
+    def tearDown(self):
+        self.manager.stop(timeout=1)
+
+    def test_concurrent_labels_applied_in_one_batch(self):
+        threads = [Thread(target=self.manager.label, args=('172.17.0.' + str(i), 'student')) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.backend.batches), 1)
+        self.assertEqual(len(self.backend.batches[0]), 10)
+        self.assertEqual(self.manager.labels['172.17.0.3'], 'student')
+
+    def test_cached_label_not_applied_again(self):
+        self.manager.label('172.17.0.2', 'instructor')
+        self.manager.label('172.17.0.2', 'instructor')
+        self.assertEqual(len(self.backend.batches), 1)
+
+        # A different label for the same ip is applied
+        self.manager.label('172.17.0.2', 'student')
+        self.assertEqual(len(self.backend.batches), 2)
+
+    def test_unlabel_all_in_one_batch(self):
+        self.manager.label_all({'172.17.0.2': 'student', '172.17.0.3': 'coordinator'})
+        self.manager.unlabel('172.17.0.2')
+        self.manager.unlabel_all()
+
+        self.assertEqual(self.manager.labels, {})
+        self.assertEqual(len(self.backend.batches), 2)
+        self.assertEqual(self.backend.batches[1][0], ('del', '172.17.0.2', None))
+
+    def test_reused_ip_labeled_again_after_unlabel(self):
+        self.manager.label('172.17.0.2', 'student')
+        # The ip is freed, then given to a new container of the same role before the removal is applied
+        self.manager.unlabel('172.17.0.2')
+        self.manager.label('172.17.0.2', 'student')
+
+        self.assertEqual(self.backend.batches[1], [('del', '172.17.0.2', None), ('add', '172.17.0.2', 'student')])
+        self.assertEqual(self.manager.labels['172.17.0.2'], 'student')
+
+    def test_unlabel_all_timeout(self):
+        self.manager.label_all({'172.17.0.2': 'student', '172.17.0.3': 'coordinator'})
+
+        # The labelbatch process hangs, so the labels are reported as not cleared once the timeout passes
+        self.backend.apply = lambda changes: time.sleep(2)
+        start = time.monotonic()
+        self.assertEqual(sorted(self.manager.unlabel_all(timeout=0.3)), ['172.17.0.2', '172.17.0.3'])
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_failed_batch_raises_and_is_not_cached(self):
+        self.backend.error = subprocess.CalledProcessError(1, './labelbatch')
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.manager.label('172.17.0.2', 'student')
+        self.assertNotIn('172.17.0.2', self.manager.labels)
+
+    def test_noop_backend_applies_nothing(self):
+        manager = LabelManager(NoOpLabelBackend(), batch_window=0.1)
+        manager.label('172.17.0.2', 'student')
+        self.assertEqual(manager.labels, {'172.17.0.2': 'student'})
+        manager.unlabel('172.17.0.2')
+        self.assertEqual(manager.labels, {})
+
+    def test_ip_pool_per_role(self):
+        pool = IpPool('cops_labeled', '172.30.0.0/29', {'student': 2, 'instructor': 1})
+        self.assertEqual(pool.gateway, '172.30.0.1')
+        self.assertEqual(sorted(pool.free['student']), ['172.30.0.2', '172.30.0.3'])
+
+        ip = pool.acquire('instructor')
+        self.assertEqual(ip, '172.30.0.4')
+        self.assertIsNone(pool.acquire('instructor'))
+        self.assertIsNone(pool.acquire('coordinator'))
+
+        # Pooled ips return to the pool of their role, other ips do not belong to the pool
+        self.assertTrue(pool.release(ip))
+        self.assertFalse(pool.release('172.17.0.2'))
+        self.assertEqual(pool.acquire('instructor'), ip)
@@ -0,0 +1,230 @@
+"""
+Load Generator
+
+This a script for measuring how the Container Runtime handles many users requesting a service at the same time,
+such as 500 concurrent logins, without Docker, SELinux, or Postgres. The Container Runtime is run with the
+simulated container backend and a SQLite database of generated users, and each user sends a service request
+through the Flask test client from one of the given number of concurrent threads.
+
+Reports the session start latency percentiles, the status of the responses, the number of running threads,
+the memory used by the process while the requests were being handled, and the latency of each phase of the
+service requests from their traces, then shuts down every container.
+
+Usage:
+python -m cops_platform.container_runtime.tests.load_generator [--concurrency 500] [--requests 500]
+[--start-latency 1.0] [--start-jitter 0.5] [--crash-rate 0] [--run-failure-rate 0] [--login-failure-rate 0]
+[--warm-pool 0] [--seed 316]
+
+This file can also be imported as a module and contains the following
+functions:
+    * LoadReport - the results of a load test
+    * run_load - runs a load test against the Container Runtime with the simulated backend
+"""
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# The number of seconds between samples of the thread count and memory
+SAMPLE_INTERVAL = 0.05
+
+
+class LoadReport:
+    """
+    The results of a load test.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty LoadReport.
+        """
+        # Session start latency (in seconds) of each successful request
+        self.latencies = []
+        # Number of responses with each status code
+        self.statuses = Counter()
+        self.duration = 0.0
+        self.peak_threads = 0
+        # Resident memory of the process in megabytes, before the test and at its peak
+        self.start_memory = 0.0
+        self.peak_memory = 0.0
+        self.running_containers = 0
+        # Latency summary of each phase of the traced service requests, keyed by phase name
+        self.phases = {}
+        self.shutdown_report = None
+
+    def percentile(self, percent):
+        """
+        :param percent: the percentile
+        :return: the session start latency at the percentile (nearest rank) in seconds, 0 if no request succeeded
+        """
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        rank = max(1, -(-len(latencies) * percent // 100))
+        return latencies[int(rank) - 1]
+
+    def __str__(self):
+        requests = sum(self.statuses.values())
+        statuses = ", ".join(str(count) + " x " + str(status) for status, count in sorted(self.statuses.items()))
+        lines = ["Sent " + str(requests) + " service requests in " + str(round(self.duration, 2)) + " seconds (" +
+                 str(round(requests / self.duration, 1) if self.duration > 0 else 0.0) + " requests per second)",
+                 "Responses: " + statuses,
+                 "Session start latency (s): p50 " + str(round(self.percentile(50), 3)) +
+                 ", p95 " + str(round(self.percentile(95), 3)) + ", p99 " + str(round(self.percentile(99), 3)) +
+                 ", max " + str(round(max(self.latencies, default=0.0), 3)),
+                 "Peak threads: " + str(self.peak_threads),
+                 "Memory (MB): " + str(round(self.start_memory, 1)) + " at the start, " +
+                 str(round(self.peak_memory, 1)) + " at the peak",
+                 "Running containers after the requests: " + str(self.running_containers)]
+        for phase, summary in self.phases.items():
+            lines.append("Phase " + phase + " (ms): p50 " + str(summary['p50_ms']) + ", p95 " +
+                         str(summary['p95_ms']) + ", p99 " + str(summary['p99_ms']) + ", max " +
+                         str(summary['max_ms']) + " (" + str(summary['count']) + " spans)")
+        if self.shutdown_report is not None:
+            lines.append(str(self.shutdown_report))
+        return "\n".join(lines)
+
+
+def run_load(concurrency=500, requests=500, service='course_manager'):
+    """
+    Runs a load test against the Container Runtime, configured by the CONTAINER_BACKEND and SIMULATED_*
+    environment variables (see main for setting these from the command line).
+    :param concurrency: the number of threads sending service requests at the same time
+    :param requests: the number of service requests, each one for a different user
+    :param service: the requested service
+    :return: the LoadReport
+    """
+    # Imported here so the configuration is read after the environment variables are set
+    from cops_platform.container_runtime.app import create_app, db, get_docker_client
+    from cops_platform.container_runtime.app.utils.shutdown import get_shutdown_coordinator
+    from cops_platform.container_runtime.app.utils.tracing import get_tracer
+
+    report = LoadReport()
+    app = create_app(os.getenv('FLASK_CONFIG') or 'simulated')
+    usernames = ["load_student" + str(i) for i in range(requests)]
+    with app.app_context():
+        __create_users(db, usernames)
+
+    # Each thread sends the requests of every concurrency-th user
+    barrier = threading.Barrier(concurrency + 1)
+    lock = threading.Lock()
+
+    def send(assigned):
+        client = app.test_client()
+        barrier.wait()
+        for username in assigned:
+            start = time.monotonic()
+            response = client.post('/service_request', data={'service': service, 'username': username})
+            elapsed = time.monotonic() - start
+            with lock:
+                report.statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    report.latencies.append(elapsed)
+
+    threads = [threading.Thread(target=send, args=(usernames[index::concurrency],), daemon=True)
+               for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    # Samples the thread count and memory until every request is answered
+    report.start_memory = __resident_memory()
+    done = threading.Event()
+    sampler = threading.Thread(target=__sample, args=(report, done), daemon=True)
+    sampler.start()
+
+    barrier.wait()
+    start = time.monotonic()
+    for thread in threads:
+        thread.join()
+    report.duration = time.monotonic() - start
+    done.set()
+    sampler.join()
+    report.peak_memory = max(report.peak_memory, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+    report.running_containers = len(get_docker_client().containers.list())
+    report.phases = get_tracer().summarize('service_request').get('service_request', {})
+    report.shutdown_report = get_shutdown_coordinator().shutdown(get_docker_client())
+    return report
+
+
+def main(arguments):
+    """
+    Sets the environment variables of the simulated backend from the command line arguments,
+    then runs the load test and prints the report.
+    :param arguments: the parsed command line arguments
+    """
+    os.environ["CONTAINER_BACKEND"] = "simulated"
+    os.environ["SIMULATED_START_LATENCY"] = str(arguments.start_latency)
+    os.environ["SIMULATED_START_JITTER"] = str(arguments.start_jitter)
+    os.environ["SIMULATED_CRASH_RATE"] = str(arguments.crash_rate)
+    os.environ["SIMULATED_RUN_FAILURE_RATE"] = str(arguments.run_failure_rate)
+    os.environ["SIMULATED_LOGIN_FAILURE_RATE"] = str(arguments.login_failure_rate)
+    os.environ["SIMULATED_SEED"] = str(arguments.seed)
+    os.environ["WARM_POOL_SIZE"] = str(arguments.warm_pool)
+    # Every user needs a host port for their container
+    port_start = int(os.getenv("SERVICE_PORT_START") or 8000)
+    os.environ.setdefault("SERVICE_PORT_END", str(port_start + arguments.requests + 3 * arguments.warm_pool + 100))
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault("SIMULATED_DATABASE_URL", 'sqlite:///' + os.path.join(directory, 'load.db'))
+        print(run_load(arguments.concurrency, arguments.requests))
+
+
+def __create_users(db, usernames):
+    """
+    Private function to create the user tables queried by the Mock IAM, with a student for each username.
+    :param db: the database of the Container Runtime app
+    :param usernames: the usernames of the students
+    """
+    for table in ('student', 'instructor', 'coordinator'):
+        db.session.execute("CREATE TABLE IF NOT EXISTS " + table +
+                           " (id INTEGER PRIMARY KEY, username VARCHAR(60) UNIQUE NOT NULL)")
+    db.session.execute("DELETE FROM student")
+    db.session.execute("INSERT INTO student (username) VALUES (:username)",
+                       [{'username': username} for username in usernames])
+    db.session.commit()
+    db.session.remove()
+
+
+def __sample(report, done):
+    """
+    Private function to record the peak thread count and memory until the test is done.
+    :param report: the LoadReport the peaks are recorded in
+    :param done: set once every request has been answered
+    """
+    while not done.wait(SAMPLE_INTERVAL):
+        report.peak_threads = max(report.peak_threads, threading.active_count())
+        report.peak_memory = max(report.peak_memory, __resident_memory())
+
+
+def __resident_memory():
+    """
+    Private function to get the current resident memory of the process.
+    :return: the resident memory in megabytes
+    """
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+# If this is run as a python script, calls its main method
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load tests the Container Runtime with simulated containers.")
+    parser.add_argument('--concurrency', type=int, default=500, help="the number of concurrent users")
+    parser.add_argument('--requests', type=int, default=500, help="the total number of service requests")
+    parser.add_argument('--start-latency', type=float, default=1.0,
+                        help="the average number of seconds a container takes to be ready")
+    parser.add_argument('--start-jitter', type=float, default=0.5,
+                        help="the fraction each container's start time is randomly changed by")
+    parser.add_argument('--crash-rate', type=float, default=0.0,
+                        help="the fraction of the containers that crash before they are ready")
+    parser.add_argument('--run-failure-rate', type=float, default=0.0,
+                        help="the fraction of the containers that fail to be created")
+    parser.add_argument('--login-failure-rate', type=float, default=0.0,
+                        help="the fraction of the logins to the service that fail")
+    parser.add_argument('--warm-pool', type=int, default=0, help="the number of warm containers for each role")
+    parser.add_argument('--seed', type=int, default=316, help="the seed of the simulated start times and failures")
+    main(parser.parse_args())
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.logging_util import get_module_logger, init_logging, shutdown_logging
+
+
+def logging_config(**settings):
+    """
+    Builds the LOG_* settings of a config, with the given settings replacing the defaults.
+    """
+    config = {'LOG_LEVEL': 'DEBUG', 'LOG_FORMAT': 'text', 'LOG_FILE': None, 'LOG_FILE_MAX_BYTES': 10 * 1024 * 1024,
+              'LOG_FILE_BACKUPS': 5, 'LOG_QUEUE_SIZE': 10000}
+    config.update(settings)
+    return config
+
+
+class LoggingUtilTestCase(unittest.TestCase):
+    """
+    Unit tests for the Logging Util.
+    """
+
+    def test_lines_logged_once_as_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, 'container_runtime.log')
+            init_logging(logging_config(LOG_FILE=log_file, LOG_FORMAT='json'))
+            try:
+                # Asking for the logger of a module again does not add another handler
+                get_module_logger('logging_util_tests')
+                logger = get_module_logger('logging_util_tests')
+                self.assertEqual(len(logger.handlers), 1)
+                logger.warning("Port %d is not available", 8000)
+
+                # Writes every queued line to the file before reading it
+                shutdown_logging()
+                with open(log_file) as log:
+                    lines = [json.loads(line) for line in log]
+            finally:
+                init_logging(logging_config())
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['level'], 'WARNING')
+        self.assertEqual(lines[0]['message'], "Port 8000 is not available")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import socket
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.port_allocator import PortAllocator, NoPortAvailableError
+
+
+class PortAllocatorTestCase(unittest.TestCase):
+    """
+    Unit tests for the Port Allocator.
+    """
+
+    def test_allocate_and_release(self):
+        allocator = PortAllocator(18000, 18002)
+        ports = [allocator.allocate() for _ in range(3)]
+        self.assertEqual(sorted(ports), [18000, 18001, 18002])
+
+        # Every port in the range is in use
+        with self.assertRaises(NoPortAvailableError):
+            allocator.allocate()
+
+        # A released port is reused
+        allocator.release(18001)
+        self.assertEqual(allocator.allocate(), 18001)
+
+    def test_release_outside_range_or_twice(self):
+        allocator = PortAllocator(18000, 18001)
+        port = allocator.allocate()
+        allocator.release(port)
+        allocator.release(port)
+        allocator.release(19000)
+        self.assertEqual(len(allocator.free), 2)
+
+    def test_skips_port_in_use_on_host(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('0.0.0.0', 0))
+            sock.listen()
+            used_port = sock.getsockname()[1]
+
+            allocator = PortAllocator(used_port, used_port + 1)
+            self.assertEqual(allocator.allocate(), used_port + 1)
+            with self.assertRaises(NoPortAvailableError):
+                allocator.allocate()
@@ -0,0 +1,56 @@
+import time
+import unittest
+from threading import Event
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.readiness import wait_for_log_message, ContainerNotReadyError
+
+
+class FakeLogStream:
+    """
+    Log stream that yields the given chunks and then blocks, like a followed Docker log stream.
+    """
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = Event()
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        self.closed.wait()
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeContainer:
+    def __init__(self, chunks):
+        self.name = 'fake_container'
+        self.stream = FakeLogStream(chunks)
+
+    def logs(self, stream, follow):
+        return self.stream
+
+
+class ReadinessTestCase(unittest.TestCase):
+    """
+    Unit tests for the container readiness detection.
+    """
+
+    def test_log_message_found(self):
+        container = FakeContainer([b'Starting\n', b' * Running on http://0.0.0.0:5000/\n'])
+        wait_for_log_message(container, 'Running', time.monotonic() + 5)
+        self.assertTrue(container.stream.closed.is_set())
+
+    def test_log_message_split_between_chunks(self):
+        container = FakeContainer([b' * Run', b'ning on http://0.0.0.0:5000/\n'])
+        wait_for_log_message(container, 'Running', time.monotonic() + 5)
+
+    def test_log_message_timeout(self):
+        container = FakeContainer([b'Starting\n'])
+        start = time.monotonic()
+        with self.assertRaises(ContainerNotReadyError):
+            wait_for_log_message(container, 'Running', start + 0.2)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertTrue(container.stream.closed.is_set())
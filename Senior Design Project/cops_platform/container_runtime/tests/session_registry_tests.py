@@ -0,0 +1,40 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.session_registry import SessionRegistry
+
+
+class SessionRegistryTestCase(unittest.TestCase):
+    """
+    Unit tests for the Session Registry.
+    """
+
+    def test_reserve_activate_release(self):
+        registry = SessionRegistry()
+        self.assertIsNotNone(registry.reserve('course_manager', 'student'))
+
+        # A user can only have one session for each service
+        self.assertIsNone(registry.reserve('course_manager', 'student'))
+        self.assertIsNotNone(registry.reserve('other_service', 'student'))
+
+        registry.activate('course_manager', 'student', 'abc123', 8000, '172.17.0.2')
+        session = registry.get('course_manager', 'student')
+        self.assertEqual(session.container_id, 'abc123')
+        self.assertEqual(session.port, 8000)
+        self.assertEqual(session.ip, '172.17.0.2')
+        self.assertIsNotNone(session.last_health_check)
+        self.assertEqual(len(registry.list('course_manager')), 1)
+        self.assertEqual(len(registry), 2)
+
+        self.assertIsNotNone(registry.release('course_manager', 'student'))
+        self.assertIsNone(registry.get('course_manager', 'student'))
+        self.assertIsNone(registry.release('course_manager', 'student'))
+        self.assertIsNotNone(registry.reserve('course_manager', 'student'))
+
+    def test_concurrent_reserve(self):
+        registry = SessionRegistry()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: registry.reserve('course_manager', 'student'), range(100)))
+        self.assertEqual(len([session for session in results if session is not None]), 1)
@@ -0,0 +1,70 @@
+import time
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.shutdown import ShutdownCoordinator, ShutdownReport
+
+
+class FakeContainer:
+    """
+    Container that takes the given number of seconds to stop.
+    """
+    def __init__(self, name, stop_seconds, error=None):
+        self.name = name
+        self.stop_seconds = stop_seconds
+        self.error = error
+        self.stopped = False
+
+    def stop(self, timeout):
+        time.sleep(self.stop_seconds)
+        if self.error:
+            raise self.error
+        self.stopped = True
+
+
+class ShutdownCoordinatorTestCase(unittest.TestCase):
+    """
+    Unit tests for the Shutdown Coordinator.
+    """
+
+    def test_containers_stopped_concurrently(self):
+        coordinator = ShutdownCoordinator(max_workers=10, deadline=5, stop_timeout=1)
+        containers = [FakeContainer('container' + str(i), 0.2) for i in range(10)]
+
+        report = coordinator.stop_containers(containers)
+        self.assertTrue(report.is_clean())
+        self.assertEqual(len(report.stopped), 10)
+        # Stopping one at a time would take 2 seconds
+        self.assertLess(report.duration, 1)
+
+    def test_failed_and_unfinished_reported(self):
+        coordinator = ShutdownCoordinator(max_workers=3, deadline=0.3, stop_timeout=1)
+        containers = [FakeContainer('fast', 0), FakeContainer('broken', 0, error=RuntimeError("error")),
+                      FakeContainer('slow', 2)]
+
+        report = coordinator.stop_containers(containers)
+        self.assertFalse(report.is_clean())
+        self.assertEqual(report.stopped, ['fast'])
+        self.assertEqual([name for name, _ in report.failed], ['broken'])
+        self.assertEqual(report.unfinished, ['slow'])
+        self.assertLess(report.duration, 1)
+
+    def test_queued_stops_cancelled_at_deadline(self):
+        coordinator = ShutdownCoordinator(max_workers=2, deadline=0.3, stop_timeout=1)
+        containers = [FakeContainer('container' + str(i), 0.5) for i in range(10)]
+
+        report = coordinator.stop_containers(containers)
+        self.assertLess(report.duration, 0.5)
+        self.assertEqual(len(report.unfinished), 10)
+
+        # Only the stops already running when the deadline passed are finished, the queued ones never run
+        time.sleep(1)
+        self.assertEqual(len([container for container in containers if container.stopped]), 2)
+
+    def test_labels_not_cleared_reported(self):
+        report = ShutdownReport()
+        self.assertTrue(report.is_clean())
+        report.labeled = ['172.17.0.2']
+        self.assertFalse(report.is_clean())
+        self.assertIn("172.17.0.2", str(report))
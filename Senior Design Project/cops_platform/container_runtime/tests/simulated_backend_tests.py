@@ -0,0 +1,96 @@
+import time
+import unittest
+from dotenv import load_dotenv
+load_dotenv()
+
+import docker
+import requests
+from cops_platform.container_runtime.app.utils.simulated_backend import SimulatedDockerClient
+from cops_platform.container_runtime.app.utils.readiness import wait_for_log_message, ContainerNotReadyError
+
+
+class SimulatedBackendTestCase(unittest.TestCase):
+    """
+    Unit tests for the simulated container backend.
+    """
+
+    def setUp(self):
+        self.client = SimulatedDockerClient(start_latency=0.1, start_jitter=0, api_latency=0, seed=1)
+        self.session = requests.Session()
+        self.session.mount('http://', self.client.service_adapter)
+
+    def test_container_ready_after_start_latency(self):
+        container = self.client.containers.run('course_manager_test', ports={'5000/tcp': 8001})
+        start = time.monotonic()
+        wait_for_log_message(container, 'Running', time.monotonic() + 2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertTrue(container.is_ready())
+
+    def test_crashed_container_not_ready(self):
+        client = SimulatedDockerClient(start_latency=0.05, api_latency=0, crash_rate=1)
+        container = client.containers.run('course_manager_test', ports={'5000/tcp': 8001})
+        start = time.monotonic()
+        with self.assertRaises(ContainerNotReadyError):
+            wait_for_log_message(container, 'Running', time.monotonic() + 5)
+        # The crash ends the log stream instead of waiting until the deadline
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(container.status, 'exited')
+
+    def test_run_failure(self):
+        client = SimulatedDockerClient(api_latency=0, run_failure_rate=1)
+        with self.assertRaises(docker.errors.APIError):
+            client.containers.run('course_manager_test')
+
+    def test_ips_assigned_and_released(self):
+        first = self.client.containers.run('course_manager_test')
+        second = self.client.containers.run('course_manager_test')
+        first_ip = self.client.containers.get(first.name).attrs['NetworkSettings']['IPAddress']
+        self.assertNotEqual(first_ip, second.attrs['NetworkSettings']['IPAddress'])
+
+        first.stop()
+        self.assertEqual(first.attrs['NetworkSettings']['IPAddress'], '')
+        self.assertEqual(self.client.containers.list(), [second])
+        self.client.containers.prune()
+        with self.assertRaises(docker.errors.NotFound):
+            self.client.containers.get(first.id)
+
+        # The ip of the stopped container is reused
+        third = self.client.containers.run('course_manager_test')
+        self.assertEqual(third.attrs['NetworkSettings']['IPAddress'], first_ip)
+
+    def test_connect_with_ip(self):
+        ipam = docker.types.IPAMConfig(pool_configs=[docker.types.IPAMPool(subnet='172.30.0.0/16',
+                                                                           gateway='172.30.0.1')])
+        self.client.networks.create('pool', driver='bridge', ipam=ipam)
+        container = self.client.containers.create('course_manager_test', network='pool')
+        network = self.client.networks.get('pool')
+        network.disconnect(container)
+        network.connect(container, ipv4_address='172.30.0.9')
+        container.start()
+        self.assertEqual(container.attrs['NetworkSettings']['Networks']['pool']['IPAddress'], '172.30.0.9')
+
+        other = self.client.containers.create('course_manager_test', network='bridge')
+        with self.assertRaises(docker.errors.APIError):
+            network.connect(other, ipv4_address='172.30.0.9')
+
+    def test_service_login_and_health_check(self):
+        container = self.client.containers.run('course_manager_test', ports={'5000/tcp': 8001})
+
+        # The service does not accept connections until the container is ready
+        with self.assertRaises(requests.ConnectionError):
+            self.session.post('http://127.0.0.1:8001/api/login', data={'username': 'student'})
+
+        time.sleep(0.15)
+        self.assertEqual(self.session.get('http://127.0.0.1:8001/api/health_check').status_code, 400)
+        response = self.session.post('http://127.0.0.1:8001/api/login', data={'username': 'student'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.cookies.get('session'))
+        self.assertEqual(self.session.get('http://127.0.0.1:8001/api/health_check').status_code, 200)
+
+        container.stop()
+        with self.assertRaises(requests.ConnectionError):
+            self.session.get('http://127.0.0.1:8001/api/health_check')
+
+
+if __name__ == '__main__':
+    unittest.main()
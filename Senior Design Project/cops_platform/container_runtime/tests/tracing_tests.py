@@ -0,0 +1,200 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils.tracing import Tracer, span, current_trace, new_request_id
+
+
+class TracerTestCase(unittest.TestCase):
+    """
+    Unit tests for the Tracer.
+    """
+
+    def test_spans_recorded_in_trace(self):
+        tracer = Tracer(buffer_size=10)
+        with tracer.trace('service_request', 'abc123', service='course_manager') as recorded:
+            self.assertIs(current_trace(), recorded)
+            with span('port_allocation') as port_allocation:
+                port_allocation.attributes['port'] = 8000
+            with span('readiness'):
+                with span('probe'):
+                    pass
+        self.assertIsNone(current_trace())
+
+        self.assertEqual(recorded.id, 'abc123')
+        self.assertEqual([timed.name for timed in recorded.spans], ['port_allocation', 'readiness', 'probe'])
+        self.assertEqual(recorded.spans[0].attributes, {'port': 8000})
+        self.assertGreaterEqual(recorded.duration, recorded.spans[1].duration)
+        self.assertEqual(tracer.query(), [recorded])
+
+    def test_spans_outside_trace_not_recorded(self):
+        with span('container_run') as container_run:
+            container_run.attributes['image'] = 'course_manager_test'
+        self.assertIsNone(container_run.duration)
+
+        tracer = Tracer(enabled=False)
+        with tracer.trace('service_request') as recorded:
+            self.assertIsNone(current_trace())
+        self.assertIsNotNone(recorded.id)
+        self.assertEqual(len(tracer), 0)
+
+    def test_errors_recorded(self):
+        tracer = Tracer()
+        with self.assertRaises(RuntimeError):
+            with tracer.trace('service_request'):
+                with span('login'):
+                    raise RuntimeError("connection refused")
+
+        recorded = tracer.query(errors_only=True)[0]
+        self.assertEqual(recorded.error, "RuntimeError: connection refused")
+        self.assertEqual(recorded.spans[0].error, "RuntimeError: connection refused")
+
+    def test_rolling_buffer_for_each_name(self):
+        tracer = Tracer(buffer_size=3)
+        for i in range(5):
+            with tracer.trace('service_request', 'request' + str(i)):
+                pass
+        with tracer.trace('health_check'):
+            pass
+
+        self.assertEqual(len(tracer), 4)
+        self.assertEqual([recorded.id for recorded in tracer.query('service_request')],
+                         ['request4', 'request3', 'request2'])
+        self.assertEqual(len(tracer.query(limit=2)), 2)
+        self.assertEqual(tracer.query(trace_id='request3')[0].id, 'request3')
+        self.assertEqual(tracer.query(min_duration=60), [])
+
+    def test_concurrent_traces(self):
+        tracer = Tracer(buffer_size=100)
+
+        def traced(i):
+            with tracer.trace('service_request', 'request' + str(i)) as recorded:
+                with span('phase' + str(i)):
+                    pass
+            return recorded
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            traces = list(executor.map(traced, range(50)))
+        # Each thread only records the spans of its own trace
+        for i, recorded in enumerate(traces):
+            self.assertEqual([timed.name for timed in recorded.spans], ['phase' + str(i)])
+        self.assertEqual(len(tracer), 50)
+
+    def test_summarize_and_export(self):
+        tracer = Tracer()
+        for _ in range(4):
+            with tracer.trace('service_request'):
+                with span('readiness'):
+                    pass
+                with span('login'):
+                    pass
+
+        summary = tracer.summarize()['service_request']
+        self.assertEqual(set(summary), {'total', 'readiness', 'login'})
+        self.assertEqual(summary['login']['count'], 4)
+        self.assertLessEqual(summary['readiness']['p50_ms'], summary['readiness']['max_ms'])
+
+        stream = io.StringIO()
+        self.assertEqual(tracer.export(stream), 4)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual([timed['name'] for timed in lines[0]['spans']], ['readiness', 'login'])
+
+    def test_request_id(self):
+        self.assertEqual(new_request_id('abc-123'), 'abc-123')
+        self.assertNotEqual(new_request_id('bad id\r\nSet-Cookie: x'), 'bad id\r\nSet-Cookie: x')
+        self.assertNotEqual(new_request_id(), new_request_id())
+
+
+class ServiceRequestTracingTestCase(unittest.TestCase):
+    """
+    Tests the traces of service requests to the Container Runtime with the simulated container backend.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from cops_platform.container_runtime.app import create_app, db
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.app = create_app('simulated')
+        # The engine is created on its first use, so this replaces the database of the config
+        cls.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(cls.directory.name, 'tracing.db')
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            for table in ('student', 'instructor', 'coordinator'):
+                db.session.execute("CREATE TABLE " + table +
+                                   " (id INTEGER PRIMARY KEY, username VARCHAR(60) UNIQUE NOT NULL)")
+            db.session.execute("INSERT INTO student (username) VALUES ('traced_student')")
+            db.session.commit()
+            db.session.remove()
+
+    @classmethod
+    def tearDownClass(cls):
+        from cops_platform.container_runtime.app import get_docker_client
+        from cops_platform.container_runtime.app.utils.shutdown import get_shutdown_coordinator
+        get_shutdown_coordinator().shutdown(get_docker_client())
+        cls.directory.cleanup()
+
+    def test_service_request_traced(self):
+        from cops_platform.container_runtime.app.utils.http_client import get_http_client
+        http_client = get_http_client()
+        login_headers = []
+        post = http_client.post
+
+        def recording_post(url, **kwargs):
+            login_headers.append(kwargs.get('headers'))
+            return post(url, **kwargs)
+
+        http_client.post = recording_post
+        try:
+            response = self.client.post('/service_request', data={'service': 'course_manager',
+                                                                   'username': 'traced_student'},
+                                        headers={'X-Request-ID': 'traced-request-1'})
+        finally:
+            del http_client.post
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Request-ID'], 'traced-request-1')
+        # The request id is carried into the login request of the service
+        self.assertEqual(login_headers, [{'X-Request-ID': 'traced-request-1'}])
+
+        response = self.client.get('/admin/traces', query_string={'id': 'traced-request-1'})
+        self.assertEqual(response.status_code, 200)
+        traces = json.loads(response.data)['traces']
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]['attributes']['status_code'], 200)
+        self.assertEqual([timed['name'] for timed in traces[0]['spans']],
+                         ['authorization', 'warm_pool', 'port_allocation', 'container_run', 'readiness', 'labeling',
+                          'login'])
+
+        response = self.client.get('/admin/traces', query_string={'name': 'service_request', 'format': 'jsonl'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        ids = [json.loads(line)['id'] for line in response.data.decode('utf-8').splitlines()]
+        self.assertIn('traced-request-1', ids)
+
+        response = self.client.get('/admin/traces/summary', query_string={'name': 'service_request'})
+        summary = json.loads(response.data)['summary']['service_request']
+        self.assertGreaterEqual(summary['readiness']['count'], 1)
+        self.assertGreaterEqual(summary['total']['max_ms'], summary['readiness']['max_ms'])
+
+    def test_failed_service_request_traced(self):
+        response = self.client.post('/service_request', data={'service': 'course_manager',
+                                                              'username': 'does_not_exist'},
+                                    headers={'X-Request-ID': 'traced-request-2'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/admin/traces', query_string={'id': 'traced-request-2', 'errors': 'true'})
+        traces = json.loads(response.data)['traces']
+        self.assertEqual(traces[0]['error'], "Given credentials are not valid")
+        self.assertEqual(traces[0]['attributes']['status_code'], 400)
+
+    def test_admin_address_required(self):
+        response = self.client.get('/admin/traces', environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
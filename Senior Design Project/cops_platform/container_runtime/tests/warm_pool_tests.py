@@ -0,0 +1,120 @@
+import itertools
+import time
+import unittest
+from threading import Lock
+from dotenv import load_dotenv
+load_dotenv()
+
+from cops_platform.container_runtime.app.utils import warm_pool
+from cops_platform.container_runtime.app.utils.warm_pool import WarmPool
+
+
+class FakeServiceObject:
+    """
+    Service object of a container at the given host port.
+    """
+    def __init__(self, host_port):
+        self.host_port = host_port
+
+
+class FakeContainer:
+    """
+    Container that is running until it is marked as exited.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.status = 'running'
+        self.removed = False
+
+    def reload(self):
+        pass
+
+    def remove(self, force=False):
+        self.removed = True
+
+
+class FakePortAllocator:
+    """
+    Port allocator that records the released ports.
+    """
+    def __init__(self):
+        self.released = []
+
+    def release(self, port):
+        self.released.append(port)
+
+
+class WarmPoolTestCase(unittest.TestCase):
+    """
+    Unit tests for the Warm Pool, with the containers started by a stub instead of Docker.
+    """
+
+    def setUp(self):
+        self.lock = Lock()
+        self.started = []
+        self.cleared = []
+        self.port_allocator = FakePortAllocator()
+        self.ports = itertools.count(8000)
+
+        def start_service_container(service_class, role, env):
+            with self.lock:
+                port = next(self.ports)
+                container = FakeContainer('container' + str(port))
+                self.started.append(container)
+            return FakeServiceObject(port), container, '172.17.0.' + str(port - 7998)
+
+        # Replaces the helpers the warm pool starts containers and releases their ips and ports with
+        self.originals = (warm_pool.start_service_container, warm_pool.clear_ip, warm_pool.get_port_allocator)
+        warm_pool.start_service_container = start_service_container
+        warm_pool.clear_ip = self.cleared.append
+        warm_pool.get_port_allocator = lambda: self.port_allocator
+
+        self.pool = WarmPool(service_class=None, role='student', size=2, env={})
+        self.pool.start()
+        self.wait_until(lambda: self.pool.ready.qsize() == 2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.pool.join(1)
+        warm_pool.start_service_container, warm_pool.clear_ip, warm_pool.get_port_allocator = self.originals
+
+    def wait_until(self, condition, timeout=2):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_refilled_after_acquire(self):
+        service_object, container, container_ip = self.pool.acquire()
+        self.assertIs(container, self.started[0])
+        self.assertEqual(service_object.host_port, 8000)
+        self.assertEqual(container_ip, '172.17.0.2')
+
+        # A new container is started to replace the one taken out of the pool
+        self.wait_until(lambda: len(self.started) == 3 and self.pool.ready.qsize() == 2)
+
+    def test_dead_container_skipped(self):
+        self.started[0].status = 'exited'
+
+        service_object, container, container_ip = self.pool.acquire()
+        self.assertIs(container, self.started[1])
+
+        # The ip and port of the exited container are released, and it is removed
+        self.assertEqual(self.cleared, ['172.17.0.2'])
+        self.assertEqual(self.port_allocator.released, [8000])
+        self.assertTrue(self.started[0].removed)
+        self.assertFalse(self.started[1].removed)
+
+    def test_shutdown_stops_refilling(self):
+        self.pool.shutdown()
+        self.pool.join(1)
+        self.assertFalse(self.pool.is_alive())
+
+        # Containers can still be taken out of the pool, but it is not refilled
+        self.assertIsNotNone(self.pool.acquire())
+        time.sleep(0.1)
+        self.assertEqual(len(self.started), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,7 +17,9 @@ from flask_cors import CORS
 
 from .extensions import api
 from ..config import config
+import click
 import os
+import sys
 
 # Global object for communicating with the database
 db = SQLAlchemy()
@@ -25,6 +27,8 @@ db = SQLAlchemy()
 ROLE = None
 # Global static value representing logged in user's username
 USERNAME = None
+# Paths of the endpoints that do not end or refresh the user's session
+SESSIONLESS_PATHS = ("/api/health_check", "/api/metrics")
 
 
 def create_app(config_name='default', role='student'):
@@ -70,17 +74,40 @@ def create_app(config_name='default', role='student'):
     # Initializes a randomized secret key for this session cookie
     app.secret_key = os.urandom(16)
 
+    # Configures the queued logging of the process (see the logging_util module),
+    # creates the cache of responses to the schedule and account endpoints, the metrics of every request,
+    # and the profiler of the SQL statements run by each request (if enabled)
+    # Imported here since these require the app to be initialized
+    from .utils.logging_util import init_logging
+    from .utils.response_cache import init_response_cache
+    from .utils.request_metrics import init_request_metrics, get_request_metrics
+    from .utils.query_profiler import init_query_profiler, get_query_profiler
+    init_logging(app.config)
+    init_response_cache(app.config)
+    init_request_metrics(app.config)
+    init_query_profiler(app.config)
+
     # Registers the api endpoints for this app
     __register_api(app)
 
+    # Registers the command line commands for this app
+    __register_commands(app)
+
     @app.before_request
     def before_request():
         """
         Automatically ends the session after the designated time of inactivity (default is 20 minutes).
         Sets the USERNAME to none if the user's session is no longer active.
+        Records the start of the request for its metrics, and starts its query profile if the profiler is enabled.
         """
+        get_request_metrics().start_request()
+        query_profiler = get_query_profiler()
+        if query_profiler is not None:
+            query_profiler.start_request()
+
         # NOTE: If an unauthenticated request (i.e. a request sent without a session cookie)
-        # is sent to a REST endpoint for course manager (other than the health_check endpoint or an OPTION method)
+        # is sent to a REST endpoint for course manager (other than the health_check and metrics endpoints
+        # or an OPTION method)
         # this will mark this USERNAME value as None. This means the next health check will fail
         # and shutdown the container running Course Manager. This is likely not behaviour you would
         # want in a real application because of the potential of Denial of Service attacks. However,
@@ -89,7 +116,7 @@ def create_app(config_name='default', role='student'):
         # Ignoring any OPTIONS method due to this being called from the front-end when a PUT or DELETE request was sent.
         # This was causing issues since it doesn't have access to the session cookie and was causing the service to be
         # flagged as disconnected.
-        if 'username' not in session and request.path != "/api/health_check" and request.method != "OPTIONS":
+        if 'username' not in session and request.path not in SESSIONLESS_PATHS and request.method != "OPTIONS":
             global USERNAME
             USERNAME = None
 
@@ -99,12 +126,21 @@ def create_app(config_name='default', role='student'):
         Session cookie time limit is refreshed every time a request is made by the user.
         This is used for tracking inactivity so it known that the user is still actively making requests
         to this service.
+        Records the latency, status code, and database queries of the request in its metrics.
+        Logs the query profile of the request if the profiler is enabled, and adds it to a header in debug mode.
         """
-        if request.path != "/api/health_check":
+        if request.path not in SESSIONLESS_PATHS:
             session.permanent = True
             session['username'] = USERNAME
             session.modified = True
 
+        get_request_metrics().end_request(request.url_rule.rule if request.url_rule is not None else None,
+                                          request.method, res.status_code)
+        query_profiler = get_query_profiler()
+        if query_profiler is not None:
+            profile = query_profiler.end_request(request.method, request.path)
+            if profile is not None and app.debug:
+                res.headers['X-Query-Profile'] = profile.header()
         return res
 
     return app
@@ -125,20 +161,73 @@ def __register_api(app):
 
     # Imports for controller classes must be done after app is initialized
     from .controllers.user_controller import UserAccount, UserLogin, \
-        UserHome, UserLogout
+        UserHome, UserLogout, BulkUserAccount
     from .controllers.health_check_controller import HealthCheck
-    from .controllers.course_controller import CourseModify, EnrollStudent, CourseScheduleView, CourseGradeModify
+    from .controllers.metrics_controller import Metrics
+    from .controllers.course_controller import CourseModify, EnrollStudent, CourseScheduleView, CourseGradeModify, \
+        BulkEnrollStudents, BulkCourseGradeModify, CourseRosterView
 
     # Adds API routes from the controller classes to the app
     api.add_resource(UserAccount, "/api/user")
+    api.add_resource(BulkUserAccount, "/api/user/bulk")
     api.add_resource(UserLogin, "/api/login")
     api.add_resource(UserLogout, "/api/logout")
     api.add_resource(UserHome, "/", "/index")
     api.add_resource(HealthCheck, "/api/health_check")
+    api.add_resource(Metrics, "/api/metrics")
     api.add_resource(CourseModify, "/api/course")
     api.add_resource(EnrollStudent, "/api/mapping")
+    api.add_resource(BulkEnrollStudents, "/api/mapping/bulk")
     api.add_resource(CourseGradeModify, "/api/mapping/grade")
+    api.add_resource(BulkCourseGradeModify, "/api/mapping/grade/bulk")
     api.add_resource(CourseScheduleView, "/api/schedule")
+    api.add_resource(CourseRosterView, "/api/roster")
+
+
+def __register_commands(app):
+    """
+    Private method to register the command line commands for this app.
+    Automatically called in the create_app method.
+    Run with "flask <command>" with FLASK_APP set.
+
+    Parameters
+    ----------
+    app : Flask
+        The Flask app the commands are registered for
+    """
+
+    @app.cli.command('rebuild-gpa')
+    def rebuild_gpa_command():
+        """
+        Recalculates the GPA totals of every student from their grades.
+        """
+        from .utils.gpa_util import rebuild_gpa
+        print("Rebuilt the GPA totals of " + str(rebuild_gpa()) + " students")
+
+    @app.cli.command('migrate')
+    @click.option('--offline', is_flag=True, help="Build indexes with a lock on the table instead of concurrently.")
+    def migrate_command(offline):
+        """
+        Applies every pending migration to the database.
+        """
+        from .utils.migration_util import migrate, get_current_version
+        applied = migrate(online=not offline)
+        print("Applied " + str(len(applied)) + " migrations, the database is at version " +
+              str(get_current_version()))
+
+    @app.cli.command('check-seq-scans')
+    def check_seq_scans_command():
+        """
+        Reports the hot path queries that scan the course, mapping, or student tables sequentially.
+        Exits with status 1 if there are any.
+        """
+        from .utils.scan_util import check_sequential_scans
+        findings = check_sequential_scans()
+        for name, table in findings:
+            print("Query " + name + " scans table " + table + " sequentially")
+        if findings:
+            sys.exit(1)
+        print("Every hot path query uses an index")
 
 
 def get_role():
@@ -2,16 +2,22 @@
 Course Controller
 
 Controller class for all course related functionality in Course Manager.
-Contains endpoints to handle course modification, grade or roster modification
-and viewing course schedules.
+Contains endpoints to handle course modification, grade or roster modification (one at a time or in bulk),
+viewing course schedules, and paging through the roster of a course.
 
 """
-from flask_restful import Resource, reqparse, abort
+from flask import current_app, Response, stream_with_context
+from flask_restful import Resource, reqparse, abort, inputs
 import datetime
+import itertools
+import json
 from sqlalchemy.exc import IntegrityError, InvalidRequestError
 from ...app.utils.controller_util import abort_if_user_not_logged_in, \
     check_course_student_mapping, check_user_credentials, abort_if_access_denied
+from ...app.utils.response_cache import get_response_cache
+from ...app.utils.bulk_util import read_rows, in_batches, insert_ignoring_conflicts
 from ..models import Course, CourseStudentMapping, Student, Instructor
+from ..models.student_gpa import update_totals_in_bulk
 from ...app import db, get_role, get_username
 
 
@@ -56,6 +62,9 @@ class CourseModify(Resource):
             db.session.add(course)
             db.session.commit()
 
+            # Invalidates the cached schedules
+            get_response_cache().bump(('courses',))
+
         # Returns error message when exception occurs
         except IntegrityError:
             abort(400, message="A course with this name already exists.")
@@ -97,6 +106,9 @@ class CourseModify(Resource):
             db.session.delete(course)
             db.session.commit()
 
+            # Invalidates the cached schedules, and the cached GPAs since the course's grades were deleted with it
+            get_response_cache().bump(('courses',))
+
         # Returns error message when exception occurs
         except Exception as inst:
             abort_if_access_denied(inst)
@@ -147,6 +159,9 @@ class EnrollStudent(Resource):
             db.session.add(mapping)
             db.session.commit()
 
+            # Invalidates the cached responses of the student and of the course's roster
+            get_response_cache().bump(('user', student.username), ('course', course.id))
+
         # Returns error message when exception occurs
         except IntegrityError:
             abort(400, message="The student is already enrolled in this course")
@@ -158,6 +173,104 @@ class EnrollStudent(Resource):
         return "Student successfully enrolled!"
 
 
+class BulkEnrollStudents(Resource):
+    """
+    Bulk Student Enrollment Resource
+    """
+    def post(self):
+        """
+        Handles enrolling many students in courses in a single request and a single transaction.
+        The body of the request is either a JSON list of {"username", "course_name"} objects or
+        [username, course_name] pairs, or CSV with a "username,course_name" header row.
+        Students and courses are looked up for each batch of rows with one query each, and the new enrollments of
+        each batch are inserted with one statement. Rows for students already enrolled in the course are skipped.
+        POST request
+        :return: Response contains the number of students enrolled and the result of each row, in order
+        """
+        # Returns error message is user not authenticated
+        abort_if_user_not_logged_in()
+
+        results = []
+        # The dependency keys of the cached responses changed by the new enrollments
+        changed = set()
+
+        try:
+            rows = read_rows(('username', 'course_name'))
+            for batch in in_batches(rows, current_app.config['BULK_BATCH_SIZE']):
+                self.__enroll_batch(batch, results, changed)
+
+            # Commits every enrollment at once
+            db.session.commit()
+
+        # Returns error message when exception occurs
+        except Exception as inst:
+            abort_if_access_denied(inst)
+            abort(400, message="Error with enrolling students")
+
+        # Invalidates the cached responses of the enrolled students and of the courses' rosters
+        if changed:
+            get_response_cache().bump(*changed)
+
+        # Returns the result of each row
+        enrolled = sum(1 for result in results if result['status'] == 'enrolled')
+        return {"enrolled": enrolled, "results": results}
+
+    @staticmethod
+    def __enroll_batch(batch, results, changed):
+        """
+        Private method to look up the students and courses of a batch of rows and insert their new enrollments.
+        :param batch: list of the rows, None for a row that could not be read
+        :param results: list the result of each row is appended to
+        :param changed: set the dependency keys of the changed cached responses are added to
+        """
+        usernames = {row['username'] for row in batch if row is not None and row['username']}
+        course_names = {row['course_name'] for row in batch if row is not None and row['course_name']}
+
+        # Looks up the ids of every student and course in this batch with one query each
+        student_ids = dict(Student.query.with_entities(Student.username, Student.id).
+                           filter(Student.username.in_(usernames))) if usernames else {}
+        course_ids = dict(Course.query.with_entities(Course.name, Course.id).
+                          filter(Course.name.in_(course_names))) if course_names else {}
+
+        # Finds the students in this batch already enrolled in the courses in this batch
+        enrolled = set()
+        if student_ids and course_ids:
+            enrolled = set(CourseStudentMapping.query.
+                           with_entities(CourseStudentMapping.student_id, CourseStudentMapping.course_id).
+                           filter(CourseStudentMapping.student_id.in_(student_ids.values()),
+                                  CourseStudentMapping.course_id.in_(course_ids.values())))
+
+        new_mappings = []
+        for row in batch:
+            if row is None or not row['username'] or not row['course_name']:
+                results.append({"row": len(results), "status": "invalid",
+                                "message": "A username and course name are required."})
+                continue
+
+            result = {"row": len(results), "username": row['username'], "course_name": row['course_name']}
+            results.append(result)
+            student_id = student_ids.get(row['username'])
+            course_id = course_ids.get(row['course_name'])
+
+            if student_id is None:
+                result['status'] = "unknown_student"
+            elif course_id is None:
+                result['status'] = "unknown_course"
+            elif (student_id, course_id) in enrolled:
+                result['status'] = "already_enrolled"
+            else:
+                result['status'] = "enrolled"
+                # Also skips the same enrollment appearing again later in the request
+                enrolled.add((student_id, course_id))
+                new_mappings.append({"student_id": student_id, "course_id": course_id})
+                changed.update((('user', row['username']), ('course', course_id)))
+
+        # Inserts every new enrollment in this batch with one statement
+        # New enrollments have no grade, so the students' GPA totals are unchanged
+        if new_mappings:
+            db.session.execute(insert_ignoring_conflicts(CourseStudentMapping.__table__), new_mappings)
+
+
 class CourseGradeModify(Resource):
     """
     Course Grade Modification resource
@@ -201,6 +314,9 @@ class CourseGradeModify(Resource):
             mapping.grade = args.grade
             db.session.commit()
 
+            # Invalidates the cached schedule and account details of the student
+            get_response_cache().bump(('user', student.username))
+
         # Returns error message when exception occurs
         except InvalidRequestError:
             abort(400, message="Grade modification failed. Invalid parameters were provided in this request.")
@@ -212,6 +328,129 @@ class CourseGradeModify(Resource):
         return "Student's grade successfully modified!"
 
 
+class BulkCourseGradeModify(Resource):
+    """
+    Bulk Course Grade Modification resource
+    """
+
+    def put(self):
+        """
+        Handles updating the grades of many students in a course in a single request and a single transaction.
+        Requires the name of the course is passed in as the "course_name" query parameter.
+        The body of the request is either CSV with a "username,grade" header row, JSON Lines
+        (Content-Type application/x-ndjson) of {"username", "grade"} objects or [username, grade] pairs,
+        or a JSON list of these rows. CSV and JSON Lines bodies are read in chunks as they are received.
+        The grades of each chunk are applied with a single UPDATE statement.
+        PUT request
+        :return: Response contains the number of grades updated and the error of each row that was not applied
+        """
+        # Returns error message is user not authenticated
+        abort_if_user_not_logged_in()
+
+        # Only the rows that could not be applied are reported, so the response stays small for large uploads
+        errors = []
+        updated = 0
+        # The dependency keys of the cached responses changed by the new grades
+        changed = set()
+
+        try:
+            # Retrieves the name of the course from the query parameters of this request
+            parser = reqparse.RequestParser()
+            parser.add_argument('course_name', location='args')
+            args = parser.parse_args()
+
+            # Retrieves the id of the matching course based on the passed in course name
+            course = Course.query.with_entities(Course.id).filter_by(name=args.course_name).first()
+
+            # Course does not exist with this name. Return error response.
+            if course is None:
+                abort(400, message="Grade modification failed. A course with name does not exist in the system.")
+
+            rows = read_rows(('username', 'grade'))
+            row_number = 0
+            for chunk in in_batches(rows, current_app.config['BULK_BATCH_SIZE']):
+                updated += self.__update_chunk(course.id, chunk, row_number, errors, changed)
+                row_number += len(chunk)
+
+            # Commits every grade at once
+            db.session.commit()
+
+        # Returns error message when exception occurs
+        except Exception as inst:
+            abort_if_access_denied(inst)
+            abort(400, message="Error with modifying students' grades")
+
+        # Invalidates the cached schedules and account details of the students
+        if changed:
+            get_response_cache().bump(*changed)
+
+        # Returns the number of grades updated and the rows that were not
+        return {"updated": updated, "errors": errors}
+
+    @staticmethod
+    def __update_chunk(course_id, chunk, row_number, errors, changed):
+        """
+        Private method to apply the grades of a chunk of rows with a single UPDATE statement,
+        along with the GPA totals of the students.
+        :param course_id: the id of the course
+        :param chunk: list of the rows, None for a row that could not be read
+        :param row_number: the number of the first row in this chunk
+        :param errors: list the error of each row that is not applied is appended to
+        :param changed: set the dependency keys of the changed cached responses are added to
+        :return: the number of rows applied
+        """
+        usernames = {row['username'] for row in chunk if row is not None and row['username']}
+
+        # Looks up the id and current grade of every student in this chunk enrolled in the course with one query
+        # NOTE: For SELinux this requires an Instructor user to have read access to the id and username columns
+        # of the Student table
+        enrolled = {}
+        if usernames:
+            enrolled = {username: (student_id, grade) for username, student_id, grade in
+                        CourseStudentMapping.query.
+                        join(Student, Student.id == CourseStudentMapping.student_id).
+                        with_entities(Student.username, Student.id, CourseStudentMapping.grade).
+                        filter(CourseStudentMapping.course_id == course_id, Student.username.in_(usernames))}
+
+        # The new grade of each student, with their grade before this chunk
+        grades = {}
+        applied = 0
+        for index, row in enumerate(chunk, start=row_number):
+            if row is None or not row['username']:
+                errors.append({"row": index, "status": "invalid", "message": "A username is required."})
+                continue
+            try:
+                grade = float(row['grade'])
+            except (TypeError, ValueError):
+                errors.append({"row": index, "username": row['username'], "status": "invalid_grade",
+                               "message": "The grade must be a number."})
+                continue
+            if row['username'] not in enrolled:
+                errors.append({"row": index, "username": row['username'], "status": "not_enrolled",
+                               "message": "Student is not enrolled in this course as found in the system"})
+                continue
+
+            # A student appearing again in the same chunk only keeps their last grade
+            student_id, old_grade = enrolled[row['username']]
+            grades[student_id] = (old_grade, grade)
+            changed.add(('user', row['username']))
+            applied += 1
+
+        if grades:
+            # Sets the grade of every student in this chunk with one UPDATE statement
+            table = CourseStudentMapping.__table__
+            new_grades = {student_id: grade for student_id, (_, grade) in grades.items()}
+            db.session.execute(table.update().
+                               where(table.c.course_id == course_id).
+                               where(table.c.student_id.in_(list(new_grades))).
+                               values(grade=db.case(new_grades, value=table.c.student_id)))
+
+            # The grades are set without the ORM, so the GPA totals are updated here as well
+            update_totals_in_bulk(db.session.connection(), grades)
+
+        return applied
+
+
 class CourseScheduleView(Resource):
     """
     Course Schedule Viewing resource
@@ -221,18 +460,37 @@ class CourseScheduleView(Resource):
         Handles retrieving the course schedules for the user.
         Processes the course schedule based on the currently logged in user
         and their role.
+        For an instructor, the "stream" query parameter streams the schedule course by course instead,
+        so the students of every course are never held in memory at once.
         :return: a list of course schedule objects
         """
         # Returns error message is user not authenticated
         abort_if_user_not_logged_in()
 
+        parser = reqparse.RequestParser()
+        parser.add_argument('stream', type=inputs.boolean, location='args', default=False)
+        if parser.parse_args().stream and get_role() == 'instructor':
+            return self.__stream_instructor_schedule()
+
+        # Returns the cached schedule if none of the data it was built from has changed since
+        cache = get_response_cache()
+        cache_key = (get_role(), get_username(), 'schedule')
+        schedule = cache.get(cache_key)
+        if schedule is not None:
+            return schedule, 200
+        # Any change committed after this point invalidates the schedule built below
+        version = cache.current_version()
+
         try:
             # Initializes course schedule list
             schedule = []
+            # The data the schedule is built from, for invalidating the cached schedule
+            dependencies = [('courses',)]
             # Obtains the role of this user
             role = get_role()
             # Obtains the username of this user
             username = get_username()
+            dependencies.append(('user', username))
 
             # Processes the course schedule for a student
             if role == 'student':
@@ -240,26 +498,23 @@ class CourseScheduleView(Resource):
                 # Retrieves the user object for this logged in student
                 user = check_user_credentials(username, role)
 
-                # Retrieves the course student mappings for this student
-                mappings = user.course_mappings
+                # Retrieves every course this student is enrolled in, along with its instructor's name and the
+                # student's grade, with a single query joining the course student mappings, courses and instructors
+                # NOTE: For SELinux this requires a Student user to have read access to both the id and name
+                # columns for the Instructor table
+                rows = CourseStudentMapping.query.\
+                    join(Course, Course.id == CourseStudentMapping.course_id).\
+                    join(Instructor, Instructor.id == Course.instructor_id).\
+                    with_entities(Course.name, Course.days, Course.start_time, Course.end_time,
+                                  Instructor.name, CourseStudentMapping.grade).\
+                    filter(CourseStudentMapping.student_id == user.id).\
+                    order_by(CourseStudentMapping.id).all()
 
                 # Creates a course object to add to the schedule for each course mapping
-                for course_mapping in mappings:
-
-                    # Retrieves the Course object that corresponds to this mapping
-                    course_id = course_mapping.course_id
-                    course = Course.query.filter_by(id=course_id).first()
-
-                    # Retrieves the Instructor name for this course
-                    # NOTE: For SELinux this requires a Student user to have read access to both the id and name
-                    # columns for the Instructor table
-                    instruct_name = Instructor.query.with_entities(Instructor.name).filter_by(id=course.instructor_id).\
-                        first()[0]
-
-                    # Creates an object with all of the course fields
-                    course_fields = {"name": course.name, "days": course.days,
-                                     "start_time": str(course.start_time), "end_time": str(course.end_time),
-                                     "instruct_name": instruct_name, "grade": course_mapping.grade}
+                for name, days, start_time, end_time, instruct_name, grade in rows:
+                    course_fields = {"name": name, "days": days,
+                                     "start_time": str(start_time), "end_time": str(end_time),
+                                     "instruct_name": instruct_name, "grade": grade}
 
                     # Appends this course object to the student's schedule list
                     schedule.append(course_fields)
@@ -270,35 +525,153 @@ class CourseScheduleView(Resource):
                 # Retrieves the user object for this logged in instructor
                 user = check_user_credentials(username, role)
 
-                # Retrieves the courses this instructor teaches
-                courses = user.courses
-
-                # Adds a course object to the schedule for each course
-                for course in courses:
-                    # Initializes list of students for this course
-                    students = []
-                    # Retrieves all of the course student mappings for this course
-                    student_mappings = CourseStudentMapping.query.filter_by(course_id=course.id).all()
-
-                    # Adds each student name that is enrolled in this course to the list
-                    for stu in student_mappings:
-                        # NOTE: For SELinux this requires an Instructor user to have read access to both the id and name
-                        # columns for the Student table
-                        name = Student.query.with_entities(Student.name).filter_by(id=stu.student_id).first()[0]
-                        students.append(name)
-
-                    # Creates an object with all of the course fields
-                    course_fields = {"name": course.name, "days": course.days,
-                                     "start_time": str(course.start_time), "end_time": str(course.end_time),
-                                     "students": students}
-
-                    # Appends this course object to the instructor's schedule list
-                    schedule.append(course_fields)
+                # Retrieves every course this instructor teaches along with the name of each student enrolled in it,
+                # with a single query joining the courses, course student mappings and students
+                # Outer joins keep the courses that have no students enrolled
+                # NOTE: For SELinux this requires an Instructor user to have read access to both the id and name
+                # columns for the Student table
+                rows = self.__instructor_schedule_query(user.id).all()
+
+                # Groups the rows into a course object for each course, with the list of its students' names
+                courses = {}
+                for course_id, name, days, start_time, end_time, student_name in rows:
+                    course_fields = courses.get(course_id)
+                    if course_fields is None:
+                        dependencies.append(('course', course_id))
+                        course_fields = {"name": name, "days": days,
+                                         "start_time": str(start_time), "end_time": str(end_time),
+                                         "students": []}
+                        courses[course_id] = course_fields
+
+                        # Appends this course object to the instructor's schedule list
+                        schedule.append(course_fields)
+
+                    if student_name is not None:
+                        course_fields["students"].append(student_name)
 
         # Returns error message if an exception occurs
         except Exception as inst:
             abort_if_access_denied(inst)
             abort(400, message="Error with viewing the schedule of this user")
 
+        cache.put(cache_key, schedule, dependencies, version)
+
         # Returns the course schedule as JSON, along with a success status
         return schedule, 200
+
+    @staticmethod
+    def __instructor_schedule_query(instructor_id):
+        """
+        Private method to build the query for every course the instructor teaches along with the name of each
+        student enrolled in it, with a single query joining the courses, course student mappings and students.
+        Outer joins keep the courses that have no students enrolled.
+        NOTE: For SELinux this requires an Instructor user to have read access to both the id and name
+        columns for the Student table
+        :param instructor_id: the id of the instructor
+        :return: the query of (course id, name, days, start time, end time, student name) rows, ordered by course
+        """
+        return Course.query.\
+            outerjoin(CourseStudentMapping, CourseStudentMapping.course_id == Course.id).\
+            outerjoin(Student, Student.id == CourseStudentMapping.student_id).\
+            with_entities(Course.id, Course.name, Course.days, Course.start_time, Course.end_time, Student.name).\
+            filter(Course.instructor_id == instructor_id).\
+            order_by(Course.id, CourseStudentMapping.id)
+
+    def __stream_instructor_schedule(self):
+        """
+        Private method to stream the schedule of the logged in instructor as a JSON list, one course at a time.
+        The rows are fetched from the database in pages of ROSTER_PAGE_SIZE as the response is written,
+        so the memory used does not grow with the number of students enrolled.
+        :return: the streaming response, with the same JSON as the non-streaming schedule
+        """
+        try:
+            user = check_user_credentials(get_username(), 'instructor')
+            rows = self.__instructor_schedule_query(user.id).yield_per(current_app.config['ROSTER_PAGE_SIZE'])
+            rows = iter(rows)
+            # Reads the first page before the response starts, so an error can still be returned as a response
+            first = next(rows, None)
+        except Exception as inst:
+            abort_if_access_denied(inst)
+            abort(400, message="Error with viewing the schedule of this user")
+
+        def generate():
+            if first is None:
+                yield "[]"
+                return
+            current_course = None
+            for course_id, name, days, start_time, end_time, student_name in itertools.chain([first], rows):
+                if course_id != current_course:
+                    # Closes the previous course's students list and opens this course,
+                    # leaving the course object open (without its closing brace) for its students list
+                    yield ("[" if current_course is None else "]},") + \
+                        json.dumps({"name": name, "days": days, "start_time": str(start_time),
+                                    "end_time": str(end_time)})[:-1] + ', "students": ['
+                    current_course = course_id
+                    separator = ""
+                if student_name is not None:
+                    yield separator + json.dumps(student_name)
+                    separator = ", "
+            yield "]}]"
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+class CourseRosterView(Resource):
+    """
+    Course Roster Viewing resource
+    """
+    def get(self):
+        """
+        Handles retrieving one page of the roster of a course the logged in instructor teaches.
+        Requires the name of the course is passed in as the "course_name" query parameter.
+        Pages are found by the id of the last student of the previous page (the "after" query parameter),
+        so every page costs the same no matter how far into the roster it is.
+        The "limit" query parameter sets the number of students in a page (defaults to ROSTER_PAGE_SIZE).
+        :return: the page of students (ordered by id) and the "next" cursor for the following page,
+        which is None on the last page
+        """
+        # Returns error message is user not authenticated
+        abort_if_user_not_logged_in()
+
+        # Only instructors have rosters
+        if get_role() != 'instructor':
+            abort(400, message="Only instructors can view the roster of a course.")
+
+        try:
+            # Retrieves the arguments from the query parameters of this request
+            parser = reqparse.RequestParser()
+            parser.add_argument('course_name', location='args')
+            parser.add_argument('after', type=int, location='args', default=0)
+            parser.add_argument('limit', type=int, location='args')
+            args = parser.parse_args()
+            limit = min(max(args.limit or current_app.config['ROSTER_PAGE_SIZE'], 1),
+                        current_app.config['ROSTER_MAX_PAGE_SIZE'])
+
+            # Retrieves the course if it is taught by the logged in instructor
+            user = check_user_credentials(get_username(), 'instructor')
+            course = Course.query.with_entities(Course.id).\
+                filter_by(name=args.course_name, instructor_id=user.id).first()
+
+            # Course does not exist with this name for this instructor. Return error response.
+            if course is None:
+                abort(400, message="A course with this name is not taught by this user.")
+
+            # Retrieves one more student than the page holds, to know whether there is a following page
+            # NOTE: For SELinux this requires an Instructor user to have read access to both the id and name
+            # columns for the Student table
+            students = CourseStudentMapping.query.\
+                join(Student, Student.id == CourseStudentMapping.student_id).\
+                with_entities(Student.id, Student.name).\
+                filter(CourseStudentMapping.course_id == course.id, Student.id > args.after).\
+                order_by(Student.id).limit(limit + 1).all()
+
+        # Returns error message if an exception occurs
+        except Exception as inst:
+            abort_if_access_denied(inst)
+            abort(400, message="Error with viewing the roster of this course")
+
+        page = [{"id": student_id, "name": name} for student_id, name in students[:limit]]
+        next_cursor = page[-1]["id"] if len(students) > limit else None
+
+        # Returns the page of the roster as JSON, along with a success status
+        return {"course_name": args.course_name, "students": page, "next": next_cursor}, 200
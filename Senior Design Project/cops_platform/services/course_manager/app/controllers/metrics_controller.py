@@ -0,0 +1,27 @@
+from flask import Response
+from flask_restful import Resource
+from ...app.utils.request_metrics import get_request_metrics
+from ...app.utils.response_cache import get_response_cache
+
+
+class Metrics(Resource):
+    """
+    Exposes the request metrics of the running service in the Prometheus text format.
+    Like the health check, it does not require a logged in user and does not refresh the user's session.
+    """
+
+    def get(self):
+        """
+        GET request to the metrics endpoint: "/api/metrics"
+        :return: The latency, status code, in flight, and database query metrics of each route, along with the
+        counters of the response cache.
+        """
+        stats = get_response_cache().stats()
+        extra = [("course_manager_response_cache_hits_total", "counter", "Number of cached responses used.",
+                  stats['hits']),
+                 ("course_manager_response_cache_misses_total", "counter", "Number of responses not in the cache.",
+                  stats['misses']),
+                 ("course_manager_response_cache_evictions_total", "counter",
+                  "Number of cached responses evicted since the cache was full.", stats['evictions']),
+                 ("course_manager_response_cache_size", "gauge", "Number of cached responses.", stats['size'])]
+        return Response(get_request_metrics().render(extra), mimetype="text/plain; version=0.0.4")
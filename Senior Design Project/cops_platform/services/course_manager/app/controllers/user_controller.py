@@ -2,12 +2,12 @@
 User Controller
 
 Controller class for all user related functionality in Course Manager.
-Contains endpoints to handle logging in, logging out, viewing account details, adding a new user,
-and deleting an existing user.
+Contains endpoints to handle logging in, logging out, viewing account details, adding a new user
+(one at a time or in bulk), and deleting an existing user.
 
 """
 
-from flask import session, request, abort
+from flask import session, request, abort, current_app
 from flask_restful import Resource, reqparse, abort
 from sqlalchemy.exc import IntegrityError
 from markupsafe import escape
@@ -15,6 +15,10 @@ from ..models import Student, Instructor, Coordinator
 from ...app import db, get_role, set_username
 from ...app.utils.controller_util import check_user_credentials, \
     abort_if_user_not_logged_in, abort_if_access_denied
+from ...app.utils.gpa_util import get_gpa
+from ...app.utils.response_cache import get_response_cache
+from ...app.utils.bulk_util import read_rows
+from ...app.utils.provision_util import provision_users, DuplicateUserError, ON_DUPLICATE_SKIP, ON_DUPLICATE_FAIL
 
 
 class UserHome(Resource):
@@ -100,21 +104,32 @@ class UserAccount(Resource):
         # Returns error message is user not authenticated
         abort_if_user_not_logged_in()
 
+        # Returns the cached account details if they have not changed since
+        cache = get_response_cache()
+        cache_key = (role, session["username"], 'user')
+        acct_details = cache.get(cache_key)
+        if acct_details is not None:
+            return acct_details
+        # Any change committed after this point invalidates the account details built below
+        version = cache.current_version()
+        dependencies = [('user', session["username"])]
+
         # Retrieves the user from the database
         user = check_user_credentials(session["username"], role)
 
         # Account details to been send back as JSON
         acct_details = {'id': user.id, 'username': user.username, 'name': user.name}
 
-        # If this user is a student, calculates their GPA and adds to account details
-        # NOTE: The gpa field is currently not being used in the database. Since instructor's
-        # do not have write access to the Student's table and columns with our current SELinux
-        # policy, the student's gpa could not be updated when a single grade is modified by
-        # an Instructor. This is why we are re-calculating this every time the Student requests
-        # their account details. Would likely want to update how this policy works.
+        # If this user is a student, adds their GPA to account details
+        # NOTE: The gpa field of the Student table is not used. Since instructor's do not have write access to the
+        # Student's table and columns with our current SELinux policy, the running totals of each student's grades
+        # are kept in the separate student_gpa table, which is updated whenever a grade is modified.
         if role == "student":
-            gpa = calculate_gpa(user)
-            acct_details['gpa'] = gpa
+            acct_details['gpa'] = get_gpa(user.id)
+            # Deleting a course deletes its grades
+            dependencies.append(('courses',))
+
+        cache.put(cache_key, acct_details, dependencies, version)
 
         # Returns the user's account details
         return acct_details
@@ -151,6 +166,9 @@ class UserAccount(Resource):
             db.session.add(user)
             db.session.commit()
 
+            # Invalidates any cached responses for this username
+            get_response_cache().bump(('user', args.username))
+
         # Returns error message when exception occurs
         except IntegrityError:
             abort(400, message="Failed to add a new user. A user with this username already exists in the system.")
@@ -186,6 +204,10 @@ class UserAccount(Resource):
             db.session.delete(user)
             db.session.commit()
 
+            # Invalidates the cached responses of this user, and every cached schedule since the user's courses
+            # or enrollments were deleted with them
+            get_response_cache().bump(('user', args.username), ('courses',))
+
         # Returns error message when exception occurs
         except Exception as inst:
             abort_if_access_denied(inst)
@@ -195,26 +217,52 @@ class UserAccount(Resource):
         return "User successfully deleted!"
 
 
-def calculate_gpa(user):
+class BulkUserAccount(Resource):
     """
-    Calculates the gpa for the student.
-    NOTE: Is not an accurate GPA calculator. Is merely mocking
-    how this could work in a real application.
-    :param user: the student user
-    :return: the gpa for this student
+    Handles requests for adding user accounts in bulk.
     """
-    num_classes = len(user.course_mappings)
-    total_grade_amt = 0.0
 
-    # Obtains all the course mappings for the student
-    for mapping in user.course_mappings:
-        if mapping.grade is None:
-            num_classes = num_classes - 1
-        else:
-            total_grade_amt = total_grade_amt + mapping.grade
+    def post(self):
+        """
+        Handles adding many new users to the Course Manager system in a single request and a single transaction.
+        The body of the request is either CSV with a "username,name,role" header row, JSON Lines
+        (Content-Type application/x-ndjson) of {"username", "name", "role"} objects or [username, name, role] lists,
+        or a JSON list of these rows. CSV and JSON Lines bodies are read in batches as they are received.
+        The "on_duplicate" query parameter sets whether users that already exist are skipped ("skip", the default)
+        or fail the whole request ("fail").
+        POST request
+        :return: Response contains the number of users created for each role, the number skipped,
+        the error of each row that could not be read, and the throughput
+        """
+
+        # Aborts if the user is not authenticated
+        abort_if_user_not_logged_in()
+
+        try:
+            # Retrieves how duplicates are handled from the query parameters of this request
+            parser = reqparse.RequestParser()
+            parser.add_argument('on_duplicate', location='args', default=ON_DUPLICATE_SKIP,
+                                choices=(ON_DUPLICATE_SKIP, ON_DUPLICATE_FAIL))
+            args = parser.parse_args()
+
+            rows = read_rows(('username', 'name', 'role'))
+            report, created = provision_users(rows, current_app.config['BULK_BATCH_SIZE'], args.on_duplicate)
+
+            # Commits every user at once
+            db.session.commit()
+
+        # Returns error message when exception occurs
+        except DuplicateUserError as inst:
+            # None of the users are created
+            db.session.rollback()
+            abort(400, message="Failed to add users. " + str(inst))
+        except Exception as inst:
+            abort_if_access_denied(inst)
+            abort(400, message="Error with adding users.")
 
-    # Return 0.0 if student has no classes or grades for these classes
-    if num_classes <= 0:
-        return 0.0
+        # Invalidates any cached responses for these usernames
+        if created:
+            get_response_cache().bump(*(('user', username) for _, username in created))
 
-    return total_grade_amt/num_classes
+        # Returns the results of adding the users
+        return report.to_dict()
@@ -3,4 +3,5 @@ from ..models.course import Course
 from ..models.course_student_mapping import CourseStudentMapping
 from ..models.coordinator import Coordinator
 from ..models.instructor import Instructor
-
+from ..models.student_gpa import StudentGpa
+from ..models.schema_version import SchemaVersion
@@ -23,5 +23,6 @@ class Course(db.Model):
     days = db.Column(db.String, nullable=False)
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
-    instructor_id = db.Column(db.Integer, db.ForeignKey('instructor.id'), nullable=False)
+    # Indexed for finding an instructor's courses (schedules and deleting an instructor)
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructor.id'), nullable=False, index=True)
     course_mappings = db.relationship('CourseStudentMapping', backref='mapping', lazy=True, cascade="all, delete-orphan")
@@ -9,8 +9,11 @@ from ...app import db
 
 class CourseStudentMapping(db.Model):
     # Creates a unique constraint for this mapping's student_id and course_id
+    # The unique constraint also indexes the mappings by student_id, since it is the first column
+    # Indexes the mappings by course_id (then student_id for paging through rosters) for rosters and deleting a course
     __table_args__ = (
         db.UniqueConstraint('student_id', 'course_id', name='unique_student_course'),
+        db.Index('ix_course_student_mapping_course_id', 'course_id', 'student_id'),
     )
     """
     Extends the SQLAlchemy model class.
@@ -24,4 +27,5 @@ class CourseStudentMapping(db.Model):
     id = db.Column(db.Integer, primary_key=True, nullable=False)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
-    grade = db.Column(db.Float)
+    # The previous grade is always loaded when the grade is changed, so it can be replaced in the student's GPA totals
+    grade = db.column_property(db.Column(db.Float), active_history=True)
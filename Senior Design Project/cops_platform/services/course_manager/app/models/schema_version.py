@@ -0,0 +1,19 @@
+"""
+Model class that represents the schema_version table in the database.
+
+Imports the db object from the course_manager app class.
+"""
+
+from ...app import db
+
+
+class SchemaVersion(db.Model):
+    """
+    Extends the SQLAlchemy model class.
+
+    SchemaVersion's have the version of a migration that has been applied to the database (primary key),
+    its description, and the time it was applied at.
+    """
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String, nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,109 @@
+"""
+Model class that represents the student_gpa table in the database.
+
+Imports the db object from the course_manager app class.
+
+The running totals in this table are kept up to date by the SQLAlchemy events below whenever a Student is added
+or a CourseStudentMapping is added, has its grade changed, or is deleted. These are separate from the student table
+since Instructors do not have write access to the Student's table and columns with our current SELinux policy.
+"""
+
+from ...app import db
+from .student import Student
+from .course_student_mapping import CourseStudentMapping
+
+
+class StudentGpa(db.Model):
+    """
+    Extends the SQLAlchemy model class.
+
+    StudentGpa's have the id of their student (primary key), the sum of the student's grades (Float value),
+    and the number of the student's courses that have a grade.
+
+    One to one relationship with a Student (foreign key is the student's id)
+    """
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True, nullable=False)
+    grade_sum = db.Column(db.Float, nullable=False, default=0.0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Deletes the totals of a student along with the student
+Student.gpa_totals = db.relationship(StudentGpa, uselist=False, cascade="all, delete-orphan")
+
+
+@db.event.listens_for(Student, 'after_insert')
+def student_inserted(mapper, connection, target):
+    """
+    Adds empty totals for a new student.
+    """
+    connection.execute(StudentGpa.__table__.insert().values(student_id=target.id, grade_sum=0.0, graded_count=0))
+
+
+@db.event.listens_for(CourseStudentMapping, 'after_insert')
+def mapping_inserted(mapper, connection, target):
+    """
+    Adds the grade of a new course student mapping to the totals of its student.
+    """
+    update_totals(connection, target.student_id, None, target.grade)
+
+
+@db.event.listens_for(CourseStudentMapping, 'after_update')
+def mapping_updated(mapper, connection, target):
+    """
+    Replaces the previous grade of a course student mapping with its new grade in the totals of its student.
+    """
+    history = db.inspect(target).attrs.grade.history
+    if not history.has_changes():
+        return
+    old_grade = history.deleted[0] if history.deleted else None
+    update_totals(connection, target.student_id, old_grade, target.grade)
+
+
+@db.event.listens_for(CourseStudentMapping, 'after_delete')
+def mapping_deleted(mapper, connection, target):
+    """
+    Removes the grade of a deleted course student mapping from the totals of its student.
+    """
+    update_totals(connection, target.student_id, target.grade, None)
+
+
+def update_totals(connection, student_id, old_grade, new_grade):
+    """
+    Updates the totals of the student for a grade changing from old_grade to new_grade.
+    The update is done in a single UPDATE statement within the same transaction as the change to the grade.
+    :param connection: the connection of the transaction the grade is changed in
+    :param student_id: the id of the student
+    :param old_grade: the previous grade, None if there was no grade
+    :param new_grade: the new grade, None if there is no longer a grade
+    """
+    update_totals_in_bulk(connection, {student_id: (old_grade, new_grade)})
+
+
+def update_totals_in_bulk(connection, grade_changes):
+    """
+    Updates the totals of many students for their grades changing, with a single UPDATE statement.
+    Used when grades are changed in bulk without the ORM, so the events above are not triggered.
+    :param connection: the connection of the transaction the grades are changed in
+    :param grade_changes: dictionary of each student's id and a tuple of their (old grade, new grade)
+    """
+    grade_sum_changes = {}
+    graded_count_changes = {}
+    for student_id, (old_grade, new_grade) in grade_changes.items():
+        # Grades may be set as strings (ex: "3.5") before they are stored
+        old_grade = None if old_grade is None else float(old_grade)
+        new_grade = None if new_grade is None else float(new_grade)
+
+        grade_change = (new_grade or 0.0) - (old_grade or 0.0)
+        count_change = (new_grade is not None) - (old_grade is not None)
+        if grade_change != 0 or count_change != 0:
+            grade_sum_changes[student_id] = grade_change
+            graded_count_changes[student_id] = count_change
+    if not grade_sum_changes:
+        return
+
+    table = StudentGpa.__table__
+    connection.execute(table.update().where(table.c.student_id.in_(list(grade_sum_changes))).
+                       values(grade_sum=table.c.grade_sum +
+                              db.case(grade_sum_changes, value=table.c.student_id, else_=0.0),
+                              graded_count=table.c.graded_count +
+                              db.case(graded_count_changes, value=table.c.student_id, else_=0)))
@@ -0,0 +1,118 @@
+"""
+Bulk Utils
+
+Contains the helper functions shared by the bulk endpoints, which accept many rows in a single request
+either as a JSON list, or as a JSON Lines or CSV body that is read incrementally from the request stream.
+
+The following functions can be imported from this module:
+    * read_rows - reads the rows of a bulk request as dictionaries
+    * read_lines - reads rows as dictionaries from lines of JSON Lines or CSV
+    * in_batches - groups rows into lists of a maximum size
+    * insert_ignoring_conflicts - builds an insert statement that skips rows violating a unique constraint
+"""
+
+import codecs
+import csv
+import json
+from itertools import islice
+
+from flask import request
+from sqlalchemy.dialects import postgresql
+from ...app import db
+
+# The content types of a JSON Lines body (one JSON row per line)
+JSON_LINES_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+
+def read_rows(fields):
+    """
+    Reads the rows of a bulk request.
+    A JSON body must be a list where each row is either an object with the given fields
+    or a list of values in the order of the given fields. A JSON Lines body has one of these rows on each line.
+    Any other body is read as CSV with a header row.
+    JSON Lines and CSV bodies are read one line at a time so the whole body is never held in memory.
+    :param fields: the names of the fields of each row
+    :return: generator of dictionaries with the given fields, None for a row that could not be read
+    """
+    if request.is_json:
+        rows = request.get_json()
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON list of rows")
+        for row in rows:
+            yield __json_row(row, fields)
+    else:
+        lines = codecs.iterdecode(request.stream, request.mimetype_params.get('charset') or 'utf-8')
+        yield from read_lines(lines, fields, json_lines=request.mimetype in JSON_LINES_TYPES)
+
+
+def read_lines(lines, fields, json_lines=False):
+    """
+    Reads rows from lines of JSON Lines or CSV with a header row, one line at a time.
+    :param lines: iterable of the lines (ex: a request stream or an open file)
+    :param fields: the names of the fields of each row
+    :param json_lines: whether the lines are JSON Lines, otherwise they are CSV
+    :return: generator of dictionaries with the given fields, None for a row that could not be read
+    """
+    if json_lines:
+        for line in lines:
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield __json_row(row, fields)
+    else:
+        for row in csv.DictReader(lines):
+            yield {field: (row.get(field) or '').strip() or None for field in fields}
+
+
+def in_batches(rows, size):
+    """
+    Groups the rows into lists of at most the given size.
+    :param rows: iterable of rows
+    :param size: the maximum number of rows in a batch
+    :return: generator of lists of rows
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_ignoring_conflicts(table):
+    """
+    Builds an insert statement for the table. With Postgres, rows that violate a unique constraint are skipped
+    by the database, which covers rows inserted by another transaction after they were checked for.
+    :param table: the table to insert into
+    :return: the insert statement
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return table.insert()
+
+
+def __json_row(row, fields):
+    """
+    Private function to convert a JSON row to a dictionary with the given fields.
+    :param row: an object with the given fields or a list of values in the order of the given fields
+    :param fields: the names of the fields of the row
+    :return: the dictionary of the row, None if it is not an object or a list of the right length
+    """
+    if isinstance(row, dict):
+        return {field: __to_str(row.get(field)) for field in fields}
+    if isinstance(row, list) and len(row) == len(fields):
+        return {field: __to_str(value) for field, value in zip(fields, row)}
+    return None
+
+
+def __to_str(value):
+    """
+    Private function to convert a JSON value to a stripped string.
+    :param value: the JSON value
+    :return: the value as a string, None if it is empty
+    """
+    if value is None:
+        return None
+    return str(value).strip() or None
@@ -0,0 +1,53 @@
+"""
+GPA Utils
+
+Contains the functions for reading a student's GPA from the running totals of their grades,
+and for rebuilding those totals from the course student mappings.
+
+The following functions can be imported from this module:
+    * get_gpa - gets the gpa of a student from their grade totals
+    * rebuild_gpa - recalculates the grade totals of every student from their course student mappings
+"""
+
+from sqlalchemy import func
+from ...app import db
+from ...app.models import Student, CourseStudentMapping, StudentGpa
+
+
+def get_gpa(student_id):
+    """
+    Gets the gpa for the student from the running totals of their grades.
+    NOTE: Is not an accurate GPA calculator. Is merely mocking
+    how this could work in a real application.
+    :param student_id: the id of the student
+    :return: the gpa for this student, 0.0 if the student has no grades
+    """
+    totals = StudentGpa.query.with_entities(StudentGpa.grade_sum, StudentGpa.graded_count).\
+        filter_by(student_id=student_id).first()
+
+    # Return 0.0 if student has no classes or grades for these classes
+    if totals is None or totals[1] <= 0:
+        return 0.0
+
+    return totals[0]/totals[1]
+
+
+def rebuild_gpa():
+    """
+    Recalculates the grade totals of every student from their course student mappings,
+    fixing any totals that no longer match the grades.
+    :return: the number of students whose totals were rebuilt
+    """
+    # Sums the grades of every student, including students with no courses
+    totals = db.session.query(Student.id, func.coalesce(func.sum(CourseStudentMapping.grade), 0.0),
+                              func.count(CourseStudentMapping.grade)).\
+        outerjoin(CourseStudentMapping, CourseStudentMapping.student_id == Student.id).\
+        group_by(Student.id)
+
+    # Replaces every student's totals within one transaction
+    table = StudentGpa.__table__
+    db.session.execute(table.delete())
+    result = db.session.execute(table.insert().from_select(['student_id', 'grade_sum', 'graded_count'],
+                                                           totals.statement))
+    db.session.commit()
+    return result.rowcount
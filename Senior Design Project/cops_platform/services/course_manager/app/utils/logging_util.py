@@ -1,36 +1,217 @@
-from datetime import datetime
-import logging
+"""
+Logging Util
 
-from pytz import utc
+The logging of the process. Every module logger writes to one shared handler, added at most once to each logger,
+so every line is only written once no matter how many times a module asks for its logger. The shared handler only
+puts the records on a queue, and a single listener thread writes them to the sinks, so the threads handling requests
+never block on writing to the console or a file. If the sinks fall behind and the queue is full, new records are
+dropped (and counted) instead of blocking.
 
+The sinks are the console and, if LOG_FILE is set, a file that is rotated once it reaches LOG_FILE_MAX_BYTES.
+Lines are written as text with UTC timestamps, or as one JSON object per line if LOG_FORMAT is "json".
+
+Module loggers can be created before the app is, they write to the console until init_logging configures the sinks.
+
+The following can be imported from this module:
+    * JsonFormatter - formats each record as a single line JSON object
+    * QueueingHandler - the non-blocking handler shared by every module logger
+    * get_module_logger - gets the logger of a module, writing to the shared handler
+    * init_logging - configures the level, format, and sinks of the process's logging
+    * shutdown_logging - writes every queued record and stops the listener thread
 """
-TODO: Figure out to do logging and where to store logs
-This is an example I came across to help get started
-"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from threading import Lock
+
+# The format of each line of text, and the format of its timestamp
+TEXT_FORMAT = '%(asctime)s [%(name)-12s] %(levelname)-8s %(message)s'
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# The default level of the module loggers, until init_logging sets the configured level
+DEFAULT_LEVEL = logging.DEBUG
+# The levels LOG_LEVEL can be set to
+LEVELS = {name: getattr(logging, name) for name in ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')}
+# The default maximum number of records waiting to be written, until init_logging sets the configured size
+DEFAULT_QUEUE_SIZE = 10000
+
+# The handler shared by every module logger, and the listener thread writing its records to the sinks
+HANDLER = None
+LISTENER = None
+# The names of the loggers returned by get_module_logger, whose level is set by init_logging
+module_loggers = set()
+level = DEFAULT_LEVEL
+logging_lock = Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as a single line JSON object with its UTC timestamp, level, logger, thread, and message,
+    along with the exception (if any).
+    """
+
+    def format(self, record):
+        entry = {'time': time.strftime(TIME_FORMAT, time.gmtime(record.created)) + '.%03dZ' % record.msecs,
+                 'level': record.levelname, 'logger': record.name, 'thread': record.threadName,
+                 'message': record.getMessage()}
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry)
+
+
+class QueueingHandler(logging.handlers.QueueHandler):
+    """
+    Puts each record on the queue of the listener thread without blocking, dropping it if the queue is full.
+    The queue is a SimpleQueue, which can be safely put on from a signal handler (ex: logging while shutting down).
+    """
+
+    def __init__(self, max_size):
+        """
+        Creates a QueueingHandler with an empty queue.
+        :param max_size: the maximum number of records waiting to be written before new records are dropped
+        """
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record):
+        """
+        Merges the arguments of a copy of the record in to its message, and formats its exception, so the record
+        can be written by the listener thread after the arguments have changed. Keeps the other attributes of the
+        record for the formatters of the sinks.
+        :param record: the record
+        :return: the prepared copy of the record
+        """
+        message = record.getMessage()
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        """
+        Puts the record on the queue, or drops it if the queue is full.
+        :param record: the prepared record
+        """
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
 
 
 def get_module_logger(mod_name):
     """
+    Gets the logger of a module, writing to the handler shared by every module logger.
     To use this, do logger = get_module_logger(__name__)
+    :param mod_name: the name of the module
+    :return: the logger
     """
     logger = logging.getLogger(mod_name)
-    handler = logging.StreamHandler()
-
-    formatter = logging.Formatter(
-        '%(asctime)s [%(name)-12s] %(levelname)-8s %(message)s')
-    formatter.converter = utcTimeZone
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    logger.setLevel(logging.DEBUG)
+    with logging_lock:
+        handler = __start(DEFAULT_QUEUE_SIZE)
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+        # Lines are only written by the shared handler, not again by any handler of the root logger
+        logger.propagate = False
+        logger.setLevel(level)
+        module_loggers.add(mod_name)
     return logger
 
 
-"""
-Converts local timezone to UTC in order to have a common server time for timestamps
-"""
-def utcTimeZone(*args):
-    utc_dt = utc.localize(datetime.utcnow())
-    return utc_dt.timetuple()
+def init_logging(config):
+    """
+    Configures the level, format, and sinks of the process's logging from the LOG_* settings of the config.
+    Restarts the listener thread with the new sinks, after writing every record queued for the previous sinks.
+    An unknown LOG_LEVEL is logged as a warning and the default level is used instead, so it does not stop the app.
+    :param config: the config of the app
+    """
+    global level
+    level_name = (config['LOG_LEVEL'] or 'DEBUG').upper()
+    if (config['LOG_FORMAT'] or 'text').lower() == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+
+    sinks = [__stream_sink(formatter)]
+    if config['LOG_FILE']:
+        directory = os.path.dirname(os.path.abspath(config['LOG_FILE']))
+        os.makedirs(directory, exist_ok=True)
+        file_sink = logging.handlers.RotatingFileHandler(config['LOG_FILE'], maxBytes=config['LOG_FILE_MAX_BYTES'],
+                                                         backupCount=config['LOG_FILE_BACKUPS'], delay=True)
+        file_sink.setFormatter(formatter)
+        sinks.append(file_sink)
+
+    with logging_lock:
+        shutdown_logging()
+        handler = __start(config['LOG_QUEUE_SIZE'], sinks)
+        handler.max_size = config['LOG_QUEUE_SIZE']
+        level = LEVELS.get(level_name, DEFAULT_LEVEL)
+        for mod_name in module_loggers:
+            logging.getLogger(mod_name).setLevel(level)
+
+    if level_name not in LEVELS:
+        get_module_logger(__name__).warning("Unknown LOG_LEVEL " + config['LOG_LEVEL'] + ", expected one of " +
+                                            ", ".join(LEVELS) + ". Logging at " +
+                                            logging.getLevelName(DEFAULT_LEVEL) + " instead")
+
+
+def shutdown_logging():
+    """
+    Writes every queued record to the sinks, closes the sinks, and stops the listener thread.
+    The listener is started again by the next call to get_module_logger or init_logging.
+    """
+    global LISTENER
+    listener = LISTENER
+    LISTENER = None
+    if listener is None:
+        return
+    listener.stop()
+    for sink in listener.handlers:
+        sink.close()
+
+
+def __start(max_size, sinks=None):
+    """
+    Private function to create the shared handler, if it has not been created, and start the listener thread
+    writing its records to the given sinks, if it is not running. Must hold the logging lock.
+    :param max_size: the maximum number of records waiting to be written if the handler is created
+    :param sinks: the handlers writing the records if the listener is started, the console as text if None
+    :return: the shared handler
+    """
+    global HANDLER, LISTENER
+    if HANDLER is None:
+        HANDLER = QueueingHandler(max_size)
+    if LISTENER is None:
+        sinks = sinks or [__stream_sink(logging.Formatter(TEXT_FORMAT))]
+        LISTENER = logging.handlers.QueueListener(HANDLER.queue, *sinks, respect_handler_level=True)
+        LISTENER.start()
+    return HANDLER
+
+
+def __stream_sink(formatter):
+    """
+    Private function to create the sink writing to the console, with the timestamps of its lines in UTC.
+    :param formatter: the formatter of the lines
+    :return: the sink
+    """
+    formatter.converter = time.gmtime
+    sink = logging.StreamHandler()
+    sink.setFormatter(formatter)
+    return sink
+
+
+# Writes every queued record before the process exits
+atexit.register(shutdown_logging)
 
 
 # For testing
@@ -0,0 +1,154 @@
+"""
+Migration Utils
+
+A small versioned migration system for changes to the schema of an existing database, such as adding indexes.
+Each migration has a version, and the versions that have been applied are recorded in the schema_version table.
+Running the migrations applies every migration with a newer version than the database, in order.
+
+Indexes are built online on Postgres (CREATE INDEX CONCURRENTLY), so the tables can still be written to while
+the index is being built. Since Postgres does not allow this inside of a transaction, online migrations are run
+with autocommit, and a migration is only recorded as applied once all of its operations have finished.
+
+A new database created by db.create_all() already has every index declared on the models, so the index
+operations skip any index that already exists.
+
+The following can be imported from this module:
+    * CreateIndex - an operation that creates an index
+    * Migration - a versioned set of operations
+    * MIGRATIONS - every migration, in order of version
+    * get_current_version - gets the version of the latest migration applied to the database
+    * get_pending_migrations - gets the migrations that have not been applied to the database
+    * migrate - applies every pending migration
+"""
+
+import datetime
+
+from ...app import db
+from ...app.models import SchemaVersion
+
+
+class CreateIndex:
+    """
+    An operation that creates an index, if it does not already exist.
+    """
+
+    def __init__(self, name, table, columns):
+        """
+        Creates a CreateIndex operation with the passed in parameters.
+        :param name: the name of the index, matching the name of the index declared on the model
+        :param table: the name of the table
+        :param columns: tuple of the names of the indexed columns
+        """
+        self.name = name
+        self.table = table
+        self.columns = columns
+
+    def apply(self, connection, online):
+        """
+        Creates the index.
+        :param connection: the connection to run the statements on
+        :param online: whether to build the index without blocking writes to the table (Postgres only)
+        """
+        columns = ", ".join(self.columns)
+        if online and connection.dialect.name == 'postgresql':
+            # A failed concurrent build leaves behind an invalid index, which is dropped so it can be built again
+            invalid = connection.execute(db.text(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+                "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"), name=self.name).first()
+            if invalid is not None:
+                connection.execute("DROP INDEX CONCURRENTLY IF EXISTS " + self.name)
+            connection.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS " + self.name +
+                               " ON " + self.table + " (" + columns + ")")
+        else:
+            connection.execute("CREATE INDEX IF NOT EXISTS " + self.name + " ON " + self.table + " (" + columns + ")")
+
+    def __str__(self):
+        return "create index " + self.name + " on " + self.table + " (" + ", ".join(self.columns) + ")"
+
+
+class Migration:
+    """
+    A versioned set of operations that change the schema of the database.
+    """
+
+    def __init__(self, version, description, operations):
+        """
+        Creates a Migration with the passed in parameters.
+        :param version: the version of this migration, greater than the version of every earlier migration
+        :param description: the description of the change
+        :param operations: list of the operations (objects with an apply(connection, online) method)
+        """
+        self.version = version
+        self.description = description
+        self.operations = operations
+
+
+# Every migration, in order of version
+# NOTE: The unique constraint on (student_id, course_id) already indexes course_student_mapping by student_id
+MIGRATIONS = [
+    Migration(1, "Index course_student_mapping by course_id for rosters and deleting a course",
+              [CreateIndex('ix_course_student_mapping_course_id', 'course_student_mapping', ('course_id', 'student_id'))]),
+    Migration(2, "Index course by instructor_id for instructor schedules and deleting an instructor",
+              [CreateIndex('ix_course_instructor_id', 'course', ('instructor_id',))]),
+]
+
+
+def get_current_version(engine=None):
+    """
+    Gets the version of the latest migration applied to the database.
+    :param engine: the engine of the database, defaults to the app's engine
+    :return: the version, 0 if no migrations have been applied
+    """
+    engine = engine or db.engine
+    SchemaVersion.__table__.create(engine, checkfirst=True)
+    table = SchemaVersion.__table__
+    return engine.execute(db.select([db.func.coalesce(db.func.max(table.c.version), 0)])).scalar()
+
+
+def get_pending_migrations(engine=None):
+    """
+    Gets the migrations that have not been applied to the database.
+    :param engine: the engine of the database, defaults to the app's engine
+    :return: list of the pending migrations, in order of version
+    """
+    current_version = get_current_version(engine)
+    return [migration for migration in MIGRATIONS if migration.version > current_version]
+
+
+def migrate(engine=None, online=True, log=print):
+    """
+    Applies every pending migration to the database, in order of version.
+    :param engine: the engine of the database, defaults to the app's engine
+    :param online: whether to build indexes without blocking writes to the tables (Postgres only)
+    :param log: function called with a message for each operation
+    :return: list of the versions that were applied
+    """
+    engine = engine or db.engine
+    applied = []
+    for migration in get_pending_migrations(engine):
+        log("Applying migration " + str(migration.version) + ": " + migration.description)
+        if online and engine.dialect.name == 'postgresql':
+            # CREATE INDEX CONCURRENTLY can not run inside of a transaction
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                __apply(migration, connection, online, log)
+        else:
+            with engine.begin() as connection:
+                __apply(migration, connection, online, log)
+        applied.append(migration.version)
+    return applied
+
+
+def __apply(migration, connection, online, log):
+    """
+    Private function to run the operations of a migration and record it as applied.
+    :param migration: the migration
+    :param connection: the connection to run the operations on
+    :param online: whether to build indexes without blocking writes to the tables
+    :param log: function called with a message for each operation
+    """
+    for operation in migration.operations:
+        log("  " + str(operation))
+        operation.apply(connection, online)
+    connection.execute(SchemaVersion.__table__.insert().values(version=migration.version,
+                                                               description=migration.description,
+                                                               applied_at=datetime.datetime.utcnow()))
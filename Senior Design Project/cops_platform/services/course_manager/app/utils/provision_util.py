@@ -0,0 +1,153 @@
+"""
+Provision Utils
+
+Contains the functions for creating many users at once, shared by the bulk user endpoint
+and the provision_users script. Users are inserted into the table for their role in batches,
+with a single multi-row INSERT statement per role for each batch, all within one transaction.
+
+The following can be imported from this module:
+    * DuplicateUserError - raised when a user already exists and duplicates are not skipped
+    * ProvisionReport - the results and throughput of creating the users
+    * provision_users - creates the users from an iterable of rows
+"""
+
+import time
+
+from ...app import db
+from ...app.models import Student, Instructor, Coordinator, StudentGpa
+from ...app.utils.bulk_util import in_batches, insert_ignoring_conflicts
+
+# The model class of each role
+ROLE_MODELS = {'student': Student, 'instructor': Instructor, 'coordinator': Coordinator}
+
+# How rows for users that already exist are handled
+ON_DUPLICATE_SKIP = 'skip'
+ON_DUPLICATE_FAIL = 'fail'
+
+
+class DuplicateUserError(Exception):
+    """
+    Raised when a user already exists and duplicates are not being skipped.
+    """
+
+    def __init__(self, row, username, role):
+        Exception.__init__(self, "Row " + str(row) + ": A " + role + " with the username " + username +
+                           " already exists in the system.")
+
+
+class ProvisionReport:
+    """
+    The results and throughput of creating users.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty ProvisionReport.
+        """
+        # Number of users created for each role
+        self.created = {role: 0 for role in ROLE_MODELS}
+        # Number of rows skipped since the user already exists
+        self.skipped = 0
+        # The error of each row that could not be read
+        self.errors = []
+        self.rows = 0
+        self.seconds = 0.0
+
+    def rows_per_second(self):
+        """
+        :return: the number of rows processed per second
+        """
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self):
+        """
+        :return: the report as a dictionary
+        """
+        return {"created": self.created, "skipped": self.skipped, "errors": self.errors, "rows": self.rows,
+                "seconds": round(self.seconds, 3), "rows_per_second": round(self.rows_per_second(), 1)}
+
+    def __str__(self):
+        created = ", ".join(str(count) + " " + role + "s" for role, count in self.created.items())
+        lines = ["Created " + created + " from " + str(self.rows) + " rows in " + str(round(self.seconds, 2)) +
+                 " seconds (" + str(round(self.rows_per_second(), 1)) + " rows per second)",
+                 "Skipped " + str(self.skipped) + " existing users"]
+        for error in self.errors:
+            lines.append("Row " + str(error["row"]) + ": " + error["message"])
+        return "\n".join(lines)
+
+
+def provision_users(rows, batch_size, on_duplicate=ON_DUPLICATE_SKIP):
+    """
+    Creates a user for each row. Does not commit, so every user is created within the caller's transaction.
+    :param rows: iterable of dictionaries with the username, name, and role of each user,
+    None for a row that could not be read
+    :param batch_size: the maximum number of rows inserted together
+    :param on_duplicate: 'skip' to skip rows for users that already exist, 'fail' to raise a DuplicateUserError
+    :raises DuplicateUserError: if a user already exists and on_duplicate is 'fail'
+    :return: the ProvisionReport and the set of created (role, username) pairs
+    """
+    report = ProvisionReport()
+    created = set()
+    start = time.monotonic()
+
+    for batch in in_batches(rows, batch_size):
+        __provision_batch(batch, report, created, on_duplicate)
+        report.rows += len(batch)
+
+    report.seconds = time.monotonic() - start
+    return report, created
+
+
+def __provision_batch(batch, report, created, on_duplicate):
+    """
+    Private function to insert the users of a batch of rows with one multi-row INSERT statement per role.
+    :param batch: list of the rows
+    :param report: the ProvisionReport the results are added to
+    :param created: set the created (role, username) pairs are added to
+    :param on_duplicate: 'skip' or 'fail'
+    """
+    # The rows of this batch for each role, with the number of each row
+    by_role = {role: [] for role in ROLE_MODELS}
+    for index, row in enumerate(batch, start=report.rows):
+        if row is None or not row['username'] or not row['name']:
+            report.errors.append({"row": index, "message": "A username and name are required."})
+        elif row['role'] not in ROLE_MODELS:
+            report.errors.append({"row": index, "message": "The role must be student, instructor, or coordinator."})
+        else:
+            by_role[row['role']].append((index, row))
+
+    for role, role_rows in by_role.items():
+        if not role_rows:
+            continue
+        model = ROLE_MODELS[role]
+
+        # Finds the users in this batch that already exist with one query
+        usernames = {row['username'] for _, row in role_rows}
+        existing = {username for username, in
+                    model.query.with_entities(model.username).filter(model.username.in_(usernames))}
+
+        values = []
+        for index, row in role_rows:
+            username = row['username']
+            # Also catches the same user appearing again later in the file
+            if username in existing or (role, username) in created:
+                if on_duplicate == ON_DUPLICATE_FAIL:
+                    raise DuplicateUserError(index, username, role)
+                report.skipped += 1
+                continue
+            created.add((role, username))
+            values.append({"username": username, "name": row['name']})
+
+        if not values:
+            continue
+
+        # Inserts every new user of this role with one multi-row INSERT statement
+        db.session.execute(insert_ignoring_conflicts(model.__table__).values(values))
+        report.created[role] += len(values)
+
+        # The students are inserted without the ORM, so their empty GPA totals are added here as well
+        if model is Student:
+            students = Student.query.with_entities(Student.id, db.literal(0.0), db.literal(0)).\
+                filter(Student.username.in_([value["username"] for value in values]))
+            db.session.execute(insert_ignoring_conflicts(StudentGpa.__table__).
+                               from_select(['student_id', 'grade_sum', 'graded_count'], students.statement))
@@ -0,0 +1,275 @@
+"""
+Query Profiler
+
+An opt-in profiler of the SQL statements run by each request, built on the SQLAlchemy engine events.
+Records the number of statements, the total time spent in the database, and the slowest statements of a request,
+and flags a statement shape (the statement with its parameters and IN lists collapsed) that is run many times
+within the same request as a likely N+1 query: a query run once for each row of an earlier query.
+
+When QUERY_PROFILER is enabled, the profile of every request is logged, and added to the X-Query-Profile response
+header when the app is in debug mode. Tests can profile any block of code with profile_queries and check it against
+a budget with QueryProfile.check_budget.
+
+The following can be imported from this module:
+    * QueryBudgetExceeded - raised when a profile is over its budget
+    * QueryProfile - the statements run by a request or block of code
+    * QueryProfiler - profiles every request when enabled
+    * profile_queries - profiles the statements run within a block of code
+    * thread_profiles - gets the profiles being recorded on the current thread
+    * init_query_profiler - creates the global query profiler, if it is enabled
+    * get_query_profiler - gets the global query profiler
+"""
+import re
+import time
+from contextlib import contextmanager
+from threading import Lock, local
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .logging_util import get_module_logger
+
+# The global query profiler used by Course Manager, None if it is not enabled
+QUERY_PROFILER = None
+
+# The number of times a statement shape is run within one profile before it is flagged as a likely N+1 query
+N_PLUS_ONE_THRESHOLD = 5
+# The number of slowest statements kept in a profile
+SLOWEST_COUNT = 3
+
+logger = get_module_logger(__name__)
+
+# The profiles being recorded on each thread, with the start times of the statements being run
+profiler_state = local()
+
+# Whether the engine events have been installed
+installed = False
+install_lock = Lock()
+
+# Collapses a list of bound parameters (ex: "IN (?, ?, ?)") and runs of whitespace
+IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a profile runs more statements, or spends more time in the database, than its budget allows,
+    or runs a likely N+1 query when it is not allowed.
+    """
+    pass
+
+
+class QueryProfile:
+    """
+    The statements run by a request or block of code.
+    """
+
+    def __init__(self, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD, slowest_count=SLOWEST_COUNT):
+        """
+        Creates an empty QueryProfile.
+        :param n_plus_one_threshold: the number of times a statement shape is run before it is flagged
+        :param slowest_count: the number of slowest statements kept
+        """
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slowest_count = slowest_count
+        self.count = 0
+        self.total_time = 0.0
+        # (duration, statement) of the slowest statements, slowest first
+        self.slowest = []
+        # The number of times each statement shape was run
+        self.shapes = {}
+
+    def record(self, statement, duration):
+        """
+        Records a statement that was run.
+        :param statement: the statement, with its parameters bound as placeholders
+        :param duration: the number of seconds the statement took
+        """
+        self.count += 1
+        self.total_time += duration
+        shape = shape_of(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+        if len(self.slowest) < self.slowest_count or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, shape))
+            self.slowest.sort(key=lambda slow: slow[0], reverse=True)
+            del self.slowest[self.slowest_count:]
+
+    def n_plus_one(self):
+        """
+        :return: list of (count, statement shape) of the shapes that were run at least the threshold number of times
+        """
+        return sorted(((count, shape) for shape, count in self.shapes.items() if count >= self.n_plus_one_threshold),
+                      reverse=True)
+
+    def check_budget(self, max_statements=None, max_time=None, allow_n_plus_one=False):
+        """
+        Checks the profile against a budget.
+        :param max_statements: the maximum number of statements, unlimited if None
+        :param max_time: the maximum number of seconds spent in the database, unlimited if None
+        :param allow_n_plus_one: whether likely N+1 queries are allowed
+        :raises QueryBudgetExceeded: if the profile is over the budget
+        """
+        problems = []
+        if max_statements is not None and self.count > max_statements:
+            problems.append(str(self.count) + " statements were run, the budget is " + str(max_statements))
+        if max_time is not None and self.total_time > max_time:
+            problems.append(str(round(self.total_time * 1000, 2)) + " ms was spent in the database, the budget is " +
+                            str(round(max_time * 1000, 2)) + " ms")
+        if not allow_n_plus_one:
+            for count, shape in self.n_plus_one():
+                problems.append("likely N+1 query, run " + str(count) + " times: " + shape)
+        if problems:
+            raise QueryBudgetExceeded("\n".join(problems))
+
+    def header(self):
+        """
+        :return: the summary of the profile for the X-Query-Profile response header
+        """
+        return ("statements=" + str(self.count) + "; time_ms=" + str(round(self.total_time * 1000, 2)) +
+                "; n_plus_one=" + str(len(self.n_plus_one())))
+
+    def __str__(self):
+        lines = [str(self.count) + " statements in " + str(round(self.total_time * 1000, 2)) + " ms"]
+        for duration, shape in self.slowest:
+            lines.append("  slow: " + str(round(duration * 1000, 2)) + " ms " + shape)
+        for count, shape in self.n_plus_one():
+            lines.append("  likely N+1: " + str(count) + " x " + shape)
+        return "\n".join(lines)
+
+
+class QueryProfiler:
+    """
+    Profiles the statements run by every request.
+    """
+
+    def __init__(self, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD, slowest_count=SLOWEST_COUNT):
+        """
+        Creates a QueryProfiler with the passed in parameters, and installs the engine events.
+        :param n_plus_one_threshold: the number of times a statement shape is run before it is flagged
+        :param slowest_count: the number of slowest statements kept for each request
+        """
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slowest_count = slowest_count
+        install()
+
+    def start_request(self):
+        """
+        Starts the profile of the request handled by the current thread.
+        """
+        profile = QueryProfile(self.n_plus_one_threshold, self.slowest_count)
+        profiler_state.request_profile = profile
+        thread_profiles().append(profile)
+
+    def end_request(self, method, path):
+        """
+        Ends and logs the profile of the request handled by the current thread.
+        :param method: the method of the request
+        :param path: the path of the request
+        :return: the profile, None if the profile of the request was not started
+        """
+        profile = getattr(profiler_state, 'request_profile', None)
+        if profile is None:
+            return None
+        profiler_state.request_profile = None
+        profiles = thread_profiles()
+        if profile in profiles:
+            profiles.remove(profile)
+
+        if profile.n_plus_one():
+            logger.warning(method + " " + path + ": " + str(profile))
+        else:
+            logger.info(method + " " + path + ": " + str(profile))
+        return profile
+
+
+@contextmanager
+def profile_queries(n_plus_one_threshold=N_PLUS_ONE_THRESHOLD, slowest_count=SLOWEST_COUNT):
+    """
+    Profiles the statements run on the current thread within the block of code.
+    Ex: with profile_queries() as profile: client.get('/api/schedule')
+    :param n_plus_one_threshold: the number of times a statement shape is run before it is flagged
+    :param slowest_count: the number of slowest statements kept
+    :return: the QueryProfile, which is recorded until the end of the block
+    """
+    install()
+    profile = QueryProfile(n_plus_one_threshold, slowest_count)
+    profiles = thread_profiles()
+    profiles.append(profile)
+    try:
+        yield profile
+    finally:
+        profiles.remove(profile)
+
+
+def shape_of(statement):
+    """
+    Gets the shape of a statement, collapsing its lists of bound parameters and whitespace,
+    so the same query run with different parameters has the same shape.
+    :param statement: the statement
+    :return: the shape of the statement
+    """
+    return IN_LIST.sub("(?)", WHITESPACE.sub(" ", statement).strip())
+
+
+def install():
+    """
+    Installs the engine events that record the statements, once for every engine.
+    """
+    global installed
+    with install_lock:
+        if installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', __before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', __after_cursor_execute)
+        installed = True
+
+
+def thread_profiles():
+    """
+    Gets the profiles being recorded on the current thread.
+    :return: list of the profiles
+    """
+    profiles = getattr(profiler_state, 'profiles', None)
+    if profiles is None:
+        profiles = profiler_state.profiles = []
+    return profiles
+
+
+def __before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Private function to record the start time of a statement, if any profile is being recorded.
+    """
+    if getattr(profiler_state, 'profiles', None):
+        conn.info.setdefault('query_profiler_start', []).append(time.perf_counter())
+
+
+def __after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Private function to record a statement in every profile being recorded on the current thread.
+    """
+    starts = conn.info.get('query_profiler_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for profile in getattr(profiler_state, 'profiles', None) or ():
+        profile.record(statement, duration)
+
+
+def init_query_profiler(config):
+    """
+    Creates the global query profiler if QUERY_PROFILER is enabled.
+    :param config: the config of the Course Manager app
+    """
+    global QUERY_PROFILER
+    QUERY_PROFILER = None
+    if config['QUERY_PROFILER']:
+        QUERY_PROFILER = QueryProfiler(config['QUERY_PROFILER_N_PLUS_ONE_THRESHOLD'],
+                                       config['QUERY_PROFILER_SLOWEST_COUNT'])
+
+
+def get_query_profiler():
+    """
+    Gets the global query profiler
+    :return: the query profiler, None if it is not enabled
+    """
+    return QUERY_PROFILER
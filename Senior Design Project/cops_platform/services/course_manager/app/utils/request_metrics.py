@@ -0,0 +1,214 @@
+"""
+Request Metrics
+
+Low overhead instrumentation of every request to Course Manager: a latency histogram and a histogram of the number
+of database queries for each route, a counter of the responses with each status code, and a gauge of the requests
+currently being handled. The metrics are rendered in the Prometheus text format by the /api/metrics endpoint.
+
+Requests are labeled by the rule of their route (ex: "/api/user"), not their path, so the number of labels stays
+bounded. The database queries are counted by an engine event for the thread handling the request.
+
+The following can be imported from this module:
+    * LATENCY_BUCKETS - the upper bounds (in seconds) of the latency histogram buckets
+    * QUERY_BUCKETS - the upper bounds of the query count histogram buckets
+    * Histogram - a histogram of observed values
+    * RequestMetrics - the metrics of every request
+    * init_request_metrics - creates the global request metrics
+    * get_request_metrics - gets the global request metrics
+"""
+import time
+from bisect import bisect_left
+from threading import Lock, local
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The global request metrics used by Course Manager
+REQUEST_METRICS = None
+
+# The upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# The upper bounds of the query count histogram buckets
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# The start time and number of database queries of the request being handled by each thread
+request_state = local()
+
+
+class Histogram:
+    """
+    A histogram of observed values, with a count for each bucket along with the sum and count of every value.
+    Not thread-safe, it is updated while holding the lock of the RequestMetrics.
+    """
+
+    def __init__(self, buckets):
+        """
+        Creates an empty Histogram.
+        :param buckets: the sorted upper bounds of the buckets, a final +Inf bucket is added
+        """
+        self.buckets = buckets
+        # The number of values in each bucket (not cumulative), the last one is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Adds a value to the histogram.
+        :param value: the value
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """
+    Thread-safe metrics of the requests handled by Course Manager.
+    """
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS, query_buckets=QUERY_BUCKETS):
+        """
+        Creates an empty RequestMetrics.
+        :param latency_buckets: the upper bounds (in seconds) of the latency histogram buckets
+        :param query_buckets: the upper bounds of the query count histogram buckets
+        """
+        self.latency_buckets = latency_buckets
+        self.query_buckets = query_buckets
+        self.lock = Lock()
+        # Histograms keyed by (route, method)
+        self.latencies = {}
+        self.queries = {}
+        # Number of responses keyed by (route, method, status)
+        self.responses = {}
+        self.in_flight = 0
+
+    def start_request(self):
+        """
+        Records the start of a request handled by the current thread.
+        """
+        request_state.queries = 0
+        request_state.start = time.perf_counter()
+        with self.lock:
+            self.in_flight += 1
+
+    def end_request(self, route, method, status):
+        """
+        Records the end of the request handled by the current thread.
+        Does nothing if the start of the request was not recorded.
+        :param route: the rule of the request's route, None if it did not match a route
+        :param method: the method of the request
+        :param status: the status code of the response
+        """
+        start = getattr(request_state, 'start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        queries = request_state.queries
+        request_state.start = None
+
+        key = (route or 'unmatched', method)
+        with self.lock:
+            self.in_flight -= 1
+            latency = self.latencies.get(key)
+            if latency is None:
+                latency = self.latencies[key] = Histogram(self.latency_buckets)
+                self.queries[key] = Histogram(self.query_buckets)
+            latency.observe(elapsed)
+            self.queries[key].observe(queries)
+            response_key = key + (status,)
+            self.responses[response_key] = self.responses.get(response_key, 0) + 1
+
+    def render(self, extra=()):
+        """
+        Renders the metrics in the Prometheus text format.
+        :param extra: iterable of additional (name, type, help, value) metrics without labels
+        :return: the metrics
+        """
+        with self.lock:
+            latencies = [(key, list(histogram.counts), histogram.sum, histogram.count)
+                         for key, histogram in self.latencies.items()]
+            queries = [(key, list(histogram.counts), histogram.sum, histogram.count)
+                       for key, histogram in self.queries.items()]
+            responses = list(self.responses.items())
+            in_flight = self.in_flight
+
+        lines = []
+        self.__render_histogram(lines, 'course_manager_request_duration_seconds',
+                                "Time taken to handle each request, by route.", self.latency_buckets, latencies)
+        self.__render_histogram(lines, 'course_manager_request_db_queries',
+                                "Number of database queries made by each request, by route.", self.query_buckets,
+                                queries)
+
+        lines.append("# HELP course_manager_responses_total Number of responses, by route and status code.")
+        lines.append("# TYPE course_manager_responses_total counter")
+        for (route, method, status), count in sorted(responses):
+            lines.append("course_manager_responses_total" +
+                         self.__labels(route=route, method=method, status=str(status)) + " " + str(count))
+
+        lines.append("# HELP course_manager_requests_in_flight Number of requests currently being handled.")
+        lines.append("# TYPE course_manager_requests_in_flight gauge")
+        lines.append("course_manager_requests_in_flight " + str(in_flight))
+
+        for name, metric_type, help_text, value in extra:
+            lines.append("# HELP " + name + " " + help_text)
+            lines.append("# TYPE " + name + " " + metric_type)
+            lines.append(name + " " + str(value))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __render_histogram(lines, name, help_text, buckets, histograms):
+        """
+        Private function to render a histogram for each (route, method) in the Prometheus text format.
+        :param lines: list the rendered lines are added to
+        :param name: the name of the metric
+        :param help_text: the description of the metric
+        :param buckets: the upper bounds of the buckets
+        :param histograms: list of ((route, method), bucket counts, sum, count)
+        """
+        lines.append("# HELP " + name + " " + help_text)
+        lines.append("# TYPE " + name + " histogram")
+        for (route, method), counts, total, count in sorted(histograms, key=lambda histogram: histogram[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(name + "_bucket" + RequestMetrics.__labels(route=route, method=method, le=str(bound)) +
+                             " " + str(cumulative))
+            labels = RequestMetrics.__labels(route=route, method=method)
+            lines.append(name + "_sum" + labels + " " + repr(float(total)))
+            lines.append(name + "_count" + labels + " " + str(count))
+
+    @staticmethod
+    def __labels(**labels):
+        """
+        Private function to render the labels of a sample.
+        :param labels: the value of each label
+        :return: the rendered labels (ex: {route="/api/user",method="GET"})
+        """
+        return "{" + ",".join(name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                              for name, value in labels.items()) + "}"
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(*args):
+    """
+    Counts a database query made by the request being handled by the current thread.
+    """
+    request_state.queries = getattr(request_state, 'queries', 0) + 1
+
+
+def init_request_metrics(config):
+    """
+    Creates the global request metrics.
+    :param config: the config of the Course Manager app
+    """
+    global REQUEST_METRICS
+    REQUEST_METRICS = RequestMetrics()
+
+
+def get_request_metrics():
+    """
+    Gets the global request metrics
+    :return: the request metrics
+    """
+    return REQUEST_METRICS
@@ -0,0 +1,138 @@
+"""
+Response Cache
+
+A bounded in-process cache of the responses to the read endpoints (course schedules and account details),
+keyed by (role, username, endpoint). The least recently used response is evicted once the cache is full.
+
+Each cached response lists the data it was built from as dependency keys (ex: ('user', 'student') or
+('course', 1)). The write endpoints bump the generation of the keys they change after committing, and a response
+is only used while none of its dependencies have a newer generation than the response itself. Responses also
+expire after a time to live, since other Course Manager containers write to the same database without bumping
+the generations in this process.
+
+The following can be imported from this module:
+    * ResponseCache - the bounded cache of responses invalidated by generation counters
+    * init_response_cache - creates the global response cache
+    * get_response_cache - gets the global response cache
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# The global response cache used by Course Manager
+RESPONSE_CACHE = None
+
+
+class ResponseCache:
+    """
+    Thread-safe least recently used cache of responses, invalidated by the generations of their dependencies.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        Creates a ResponseCache with the passed in parameters.
+        :param max_size: the maximum number of responses to cache
+        :param ttl: the number of seconds a cached response is used for
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = Lock()
+        # (version, expiry time, dependencies, response) keyed by (role, username, endpoint),
+        # ordered from least to most recently used
+        self.entries = OrderedDict()
+        # The version of the latest change, increased by every bump
+        self.version = 0
+        # The version each dependency key was last changed at
+        self.generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def current_version(self):
+        """
+        Gets the version of the latest change. Must be called before the database is read for a response,
+        so that a change committed while the response is being built invalidates it.
+        :return: the current version
+        """
+        with self.lock:
+            return self.version
+
+    def get(self, key):
+        """
+        Gets the cached response for the key, if none of its dependencies have changed since it was built.
+        :param key: tuple of (role, username, endpoint)
+        :return: the cached response. None if it is not cached, has expired, or is out of date.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                version, expiry, dependencies, response = entry
+                if expiry > time.monotonic() and \
+                        all(self.generations.get(dependency, 0) <= version for dependency in dependencies):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, response, dependencies, version):
+        """
+        Caches the response for the key, evicting the least recently used response if the cache is full.
+        :param key: tuple of (role, username, endpoint)
+        :param response: the response
+        :param dependencies: the dependency keys of the data the response was built from
+        :param version: the current version from before the data was read
+        """
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (version, time.monotonic() + self.ttl, tuple(dependencies), response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def bump(self, *dependencies):
+        """
+        Marks the dependency keys as changed, invalidating every cached response built from them.
+        Called after the change has been committed.
+        :param dependencies: the dependency keys that were changed
+        """
+        with self.lock:
+            self.version += 1
+            for dependency in dependencies:
+                self.generations[dependency] = self.version
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Gets the counters of this cache, for tuning its size and time to live.
+        :return: dictionary of the number of hits, misses, evictions, and cached responses
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self.entries)}
+
+
+def init_response_cache(config):
+    """
+    Creates the global response cache.
+    :param config: the config of the Course Manager app
+    """
+    global RESPONSE_CACHE
+    RESPONSE_CACHE = ResponseCache(config['RESPONSE_CACHE_SIZE'], config['RESPONSE_CACHE_TTL'])
+
+
+def get_response_cache():
+    """
+    Gets the global response cache
+    :return: the response cache
+    """
+    return RESPONSE_CACHE
@@ -0,0 +1,114 @@
+"""
+Scan Utils
+
+Checks whether the hot path queries of Course Manager can use an index on the course, course_student_mapping,
+and student tables, instead of scanning every row of them (a sequential scan).
+Each query is explained by the database: EXPLAIN (FORMAT JSON) on Postgres, EXPLAIN QUERY PLAN on SQLite.
+
+On Postgres, sequential scans are disabled for the check, so the planner only picks one when there is no usable
+index. Otherwise, small tables would always be scanned sequentially since it is cheaper than using an index.
+
+The following can be imported from this module:
+    * HOT_PATH_TABLES - the tables checked for sequential scans
+    * get_hot_path_queries - gets the hot path queries by name
+    * check_sequential_scans - reports the hot path queries that scan a checked table sequentially
+"""
+
+import json
+
+from ...app import db
+from ...app.models import Course, CourseStudentMapping, Student, Instructor
+
+# The tables checked for sequential scans
+HOT_PATH_TABLES = ('course', 'course_student_mapping', 'student')
+
+
+def get_hot_path_queries():
+    """
+    Gets the hot path queries, with an example id for each parameter.
+    :return: dictionary of each query's name and its SQLAlchemy query
+    """
+    return {
+        # CourseScheduleView for a student
+        'student_schedule': CourseStudentMapping.query.
+        join(Course, Course.id == CourseStudentMapping.course_id).
+        join(Instructor, Instructor.id == Course.instructor_id).
+        with_entities(Course.name, Instructor.name, CourseStudentMapping.grade).
+        filter(CourseStudentMapping.student_id == 1),
+
+        # CourseScheduleView for an instructor
+        'instructor_schedule': Course.query.
+        outerjoin(CourseStudentMapping, CourseStudentMapping.course_id == Course.id).
+        outerjoin(Student, Student.id == CourseStudentMapping.student_id).
+        with_entities(Course.id, Student.name).
+        filter(Course.instructor_id == 1),
+
+        # CourseRosterView
+        'roster_page': CourseStudentMapping.query.
+        join(Student, Student.id == CourseStudentMapping.student_id).
+        with_entities(Student.id, Student.name).
+        filter(CourseStudentMapping.course_id == 1, Student.id > 0).
+        order_by(Student.id).limit(100),
+
+        # check_course_student_mapping
+        'course_student_mapping': CourseStudentMapping.query.
+        filter_by(student_id=1, course_id=1),
+
+        # Deleting a course deletes its mappings
+        'course_delete_cascade': CourseStudentMapping.query.
+        filter_by(course_id=1),
+
+        # Deleting an instructor deletes their courses
+        'instructor_delete_cascade': Course.query.
+        filter_by(instructor_id=1),
+    }
+
+
+def check_sequential_scans():
+    """
+    Explains every hot path query and finds the ones that scan a checked table sequentially.
+    :return: list of (query name, table name) for each sequential scan, empty if every query can use an index
+    """
+    findings = []
+    for name, query in get_hot_path_queries().items():
+        sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        for table in __scanned_tables(sql):
+            if table in HOT_PATH_TABLES:
+                findings.append((name, table))
+    return findings
+
+
+def __scanned_tables(sql):
+    """
+    Private function to explain a query and find the tables it scans sequentially.
+    :param sql: the query with its parameters bound
+    :return: list of the names of the tables scanned sequentially
+    """
+    if db.engine.dialect.name == 'postgresql':
+        with db.engine.begin() as connection:
+            connection.execute("SET LOCAL enable_seqscan = off")
+            plan = connection.execute("EXPLAIN (FORMAT JSON) " + sql).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [node['Relation Name'] for node in __plan_nodes(plan[0]['Plan'])
+                if node['Node Type'] == 'Seq Scan']
+
+    # SQLite describes a full scan as "SCAN <table>" (or "SCAN TABLE <table>"), without a "USING ... INDEX"
+    tables = []
+    for row in db.engine.execute("EXPLAIN QUERY PLAN " + sql):
+        detail = row[-1]
+        words = detail.split()
+        if words and words[0] == 'SCAN' and 'INDEX' not in detail:
+            tables.append(words[2] if len(words) > 2 and words[1] == 'TABLE' else words[1])
+    return tables
+
+
+def __plan_nodes(node):
+    """
+    Private function to walk every node of a Postgres query plan.
+    :param node: the root node of the plan
+    :return: generator of every node in the plan
+    """
+    yield node
+    for child in node.get('Plans', []):
+        yield from __plan_nodes(child)
@@ -10,6 +10,32 @@ import os
 from datetime import timedelta
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+# Default (pool size, max overflow) of the database connection pool for each role
+# A container runs for a single user, so a student's container only needs one or two connections
+# while an instructor or coordinator may run a bulk request alongside their other requests
+ROLE_POOL_SIZES = {'student': (1, 1), 'instructor': (2, 2), 'coordinator': (2, 3)}
+
+
+def engine_options(role):
+    """
+    Builds the options of the database connection pool from the DB_POOL_* environment variables,
+    defaulting the size of the pool to the one for the given role.
+    :param role: the role of the user for this instance of the running application
+    :return: dictionary of the SQLAlchemy engine options
+    """
+    pool_size, max_overflow = ROLE_POOL_SIZES.get(role, ROLE_POOL_SIZES['student'])
+    return {
+        # Number of connections kept open, and the number of extra connections opened when all of them are in use
+        "pool_size": int(os.environ.get('DB_POOL_SIZE') or pool_size),
+        "max_overflow": int(os.environ.get('DB_MAX_OVERFLOW') or max_overflow),
+        # Number of seconds before a connection is replaced, so idle connections are not closed by the server
+        "pool_recycle": int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        # Number of seconds a request waits for a free connection before failing
+        "pool_timeout": float(os.environ.get('DB_POOL_TIMEOUT') or 10),
+        # Checks each connection before it is used, unless DB_POOL_PRE_PING is "false" or "0"
+        "pool_pre_ping": (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() not in ('false', '0'),
+    }
+
 
 class Config:
     """
@@ -25,6 +51,32 @@ class Config:
     # The permanent lifetime of a session; used to track inactivity of a user
     # Defaults to 20 minutes if no corresponding env is provided
     PERMANENT_SESSION_LIFETIME = os.environ.get('SESSION_LIFETIME') or timedelta(minutes=20)
+    # Maximum number of schedule and account responses cached, and the number of seconds each is cached for
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE') or 256)
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL') or 30)
+    # Maximum number of rows of a bulk request that are looked up and inserted together
+    BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE') or 500)
+    # Number of students in a page of a course roster, and the maximum number a request can ask for
+    # Also the number of rows fetched from the database at a time when streaming a schedule
+    ROSTER_PAGE_SIZE = int(os.environ.get('ROSTER_PAGE_SIZE') or 100)
+    ROSTER_MAX_PAGE_SIZE = int(os.environ.get('ROSTER_MAX_PAGE_SIZE') or 1000)
+    # Whether the SQL statements run by each request are profiled and logged, if QUERY_PROFILER is "true" or "1"
+    # In debug mode, the profile is also sent back in the X-Query-Profile header of the response
+    QUERY_PROFILER = (os.environ.get('QUERY_PROFILER') or 'false').lower() in ('true', '1')
+    # Number of times a statement is run within one request before it is flagged as a likely N+1 query,
+    # and the number of slowest statements logged for each request
+    QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD') or 5)
+    QUERY_PROFILER_SLOWEST_COUNT = int(os.environ.get('QUERY_PROFILER_SLOWEST_COUNT') or 3)
+    # Lowest level of the lines that are logged (ex: "INFO"), and whether they are logged as "text" or "json"
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'DEBUG'
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'text'
+    # File the lines are also logged to, defaults to only logging to the console
+    # The file is rotated once it reaches LOG_FILE_MAX_BYTES, keeping LOG_FILE_BACKUPS of the previous files
+    LOG_FILE = os.environ.get('LOG_FILE')
+    LOG_FILE_MAX_BYTES = int(os.environ.get('LOG_FILE_MAX_BYTES') or 10 * 1024 * 1024)
+    LOG_FILE_BACKUPS = int(os.environ.get('LOG_FILE_BACKUPS') or 5)
+    # Maximum number of lines waiting to be logged, new lines are dropped instead of blocking a request once it is full
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE') or 10000)
 
     @staticmethod
     def init_app(app):
@@ -35,7 +87,7 @@ class PostgresConfig(Config):
     """
     Sets the SQLALCHEMY_DATABASE_URI to the postgres database based on the four required environment variables.
     """
-    POSTGRES_URL = os.environ.get("POSTGRES_URL")  # uses the default port 5432
+    POSTGRES_URL = os.environ.get("POSTGRES_URL")  # host:port, uses the default port 5432 if no port is given
     POSTGRES_USER = os.environ.get("POSTGRES_USER")
     POSTGRES_PW = os.environ.get("POSTGRES_PW")
     POSTGRES_DB = os.environ.get("POSTGRES_DB")
@@ -53,6 +105,10 @@ class PostgresConfig(Config):
     SQLALCHEMY_DATABASE_URI = DB_URL or \
         'sqlite:///' + os.path.join(basedir, 'test.db')
 
+    # Sizes the connection pool for the role of this instance (the sqlite test DB keeps SQLAlchemy's defaults)
+    # POSTGRES_URL may point at the Container Runtime's shared connection multiplexer instead of Postgres
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config.ROLE) if DB_URL else {}
+
 
 class SqliteConfig(Config):
     """
@@ -8,6 +8,10 @@ FLASK_APP=course_manager.py
 
 Use the "flask run" command to start this app.
 
+Use the "flask rebuild-gpa" command to recalculate the GPA totals of every student from their grades.
+Use the "flask migrate" command to apply any pending migrations (such as new indexes) to an existing database.
+Use the "flask check-seq-scans" command to report the hot path queries that can not use an index.
+
 Environment Variables:
 This app takes in many environment variables that can be viewed in the config.py class in the course_manager directory.
 
@@ -0,0 +1,288 @@
+"""
+Endpoint Benchmark
+
+This a script for measuring the latency, throughput, and number of database queries of the main Course Manager
+endpoints against a generated dataset of a configurable size. Each endpoint is driven through the Flask test client
+of an app created for the role that uses it, so the results measure Course Manager itself and not the network.
+
+The results are compared with a stored baseline, so a change that makes an endpoint slower or makes it run more
+queries shows up as a regression. Latency depends on the machine, so the baseline should be saved on the machine
+it is compared on. The number of queries does not, so any increase is reported.
+
+Every request is made with an empty response cache by default, measuring the work done to build each response.
+
+Usage:
+python -m cops_platform.services.course_manager.tests.benchmark.endpoint_benchmark [--students 10000]
+[--courses 500] [--enrollments-per-student 5] [--requests 200] [--warmup 20] [--seed 316] [--cache]
+[--baseline baseline.json] [--save-baseline] [--tolerance 0.25]
+
+This file can also be imported as a module and contains the following
+functions:
+    * run_benchmarks - seeds the database and measures every endpoint
+    * compare_with_baseline - finds the endpoints that regressed since the baseline
+    * format_results - formats the results as a table
+    * main - runs the benchmarks, compares them with the baseline, and prints the results
+"""
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student, Course, Instructor, CourseStudentMapping
+from cops_platform.services.course_manager.app.utils.response_cache import get_response_cache
+from cops_platform.services.course_manager.tests.db.generate_db import reset_database
+from cops_platform.services.course_manager.tests.db.generate_load_data import generate_load_data
+from datetime import time as time_of_day
+from sqlalchemy import event
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# The baseline compared with when no other baseline is given
+DEFAULT_BASELINE = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'baseline.json')
+
+# The name of the course students are enrolled in by the /api/mapping benchmark
+BENCHMARK_COURSE = "BENCH100"
+
+
+def run_benchmarks(students=10000, courses=500, enrollments_per_student=5, requests=200, warmup=20, seed=316,
+                   cache=False, config='testing'):
+    """
+    Resets the database, fills it with generated data, and measures each endpoint.
+    :param students: the number of generated students
+    :param courses: the number of generated courses
+    :param enrollments_per_student: the average number of courses each generated student is enrolled in
+    :param requests: the number of measured requests to each endpoint
+    :param warmup: the number of requests to each endpoint made before measuring
+    :param seed: the seed of the generated data and of the requests
+    :param cache: whether responses are cached between requests, otherwise the response cache is cleared first
+    :param config: the config of the app
+    :return: dictionary of each endpoint's name and its results
+    """
+    rng = random.Random(seed)
+    app = create_app(config)
+    with app.app_context():
+        reset_database()
+        generate_load_data(students, courses, enrollments_per_student, seed=seed)
+        scenarios = __build_scenarios(rng, requests + warmup)
+        db.session.remove()
+
+    results = {}
+    # The role is global to the app, so every endpoint of one role is measured before the next role's app is created
+    for role in ('student', 'instructor', 'coordinator'):
+        app = create_app(config, role)
+        with app.app_context():
+            client = app.test_client()
+            for name, scenario in scenarios.items():
+                if scenario['role'] == role:
+                    results[name] = __measure(client, scenario, warmup, cache)
+            db.session.remove()
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=0.25):
+    """
+    Finds the endpoints that regressed since the baseline.
+    :param results: the results of run_benchmarks
+    :param baseline: the results of an earlier run
+    :param tolerance: the fraction the p95 latency may increase by before it is a regression
+    :return: list of the messages describing each regression
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['queries_per_request'] > before['queries_per_request']:
+            regressions.append(name + ": " + str(result['queries_per_request']) + " queries per request, up from " +
+                               str(before['queries_per_request']))
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(name + ": p95 latency of " + str(result['p95_ms']) + " ms, up from " +
+                               str(before['p95_ms']) + " ms")
+        if result['errors'] > before['errors']:
+            regressions.append(name + ": " + str(result['errors']) + " failed requests, up from " +
+                               str(before['errors']))
+    return regressions
+
+
+def format_results(results):
+    """
+    Formats the results as a table.
+    :param results: the results of run_benchmarks
+    :return: the table
+    """
+    header = "{:<24} {:>9} {:>9} {:>9} {:>10} {:>8} {:>7}".format("endpoint", "p50 ms", "p95 ms", "p99 ms",
+                                                                 "req/s", "queries", "errors")
+    lines = [header, "-" * len(header)]
+    for name, result in results.items():
+        lines.append("{:<24} {:>9} {:>9} {:>9} {:>10} {:>8} {:>7}".format(
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'], result['requests_per_second'],
+            result['queries_per_request'], result['errors']))
+    return "\n".join(lines)
+
+
+def main(arguments):
+    """
+    Runs the benchmarks and prints the results, then saves them as the baseline or compares them with the baseline.
+    :param arguments: the parsed command line arguments
+    :return: the exit status, 1 if an endpoint regressed
+    """
+    results = run_benchmarks(arguments.students, arguments.courses, arguments.enrollments_per_student,
+                             arguments.requests, arguments.warmup, arguments.seed, arguments.cache,
+                             os.getenv('FLASK_CONFIG') or 'testing')
+    print(format_results(results))
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print("Saved the baseline to " + arguments.baseline)
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print("No baseline at " + arguments.baseline + ", run with --save-baseline to save one")
+        return 0
+    with open(arguments.baseline) as file:
+        regressions = compare_with_baseline(results, json.load(file), arguments.tolerance)
+    for regression in regressions:
+        print("Regression in " + regression)
+    if regressions:
+        return 1
+    print("No regressions since the baseline")
+    return 0
+
+
+def __build_scenarios(rng, count):
+    """
+    Private function to build the requests made to each endpoint from the generated data.
+    :param rng: the random number generator
+    :param count: the number of requests to each endpoint
+    :return: dictionary of each endpoint's name and its scenario (role, user, method, path, and request data)
+    """
+    student_count = Student.query.count()
+    students = [rng.randint(1, student_count) for _ in range(count)]
+    usernames = {student_id: username for student_id, username in
+                 Student.query.with_entities(Student.id, Student.username).filter(Student.id.in_(set(students)))}
+
+    # The instructor with the most courses, and the generated student with the most courses
+    instructor = Instructor.query.join(Course, Course.instructor_id == Instructor.id).\
+        with_entities(Instructor.username).group_by(Instructor.id, Instructor.username).\
+        order_by(db.func.count(Course.id).desc()).first().username
+    student = Student.query.join(CourseStudentMapping, CourseStudentMapping.student_id == Student.id).\
+        with_entities(Student.username).group_by(Student.id, Student.username).\
+        order_by(db.func.count(CourseStudentMapping.id).desc()).first().username
+
+    # The course every enrollment request enrolls a different student in
+    course = Course(name=BENCHMARK_COURSE, days="MW", start_time=time_of_day(8, 0), end_time=time_of_day(9, 15),
+                    instructor_id=1)
+    db.session.add(course)
+    db.session.commit()
+    enrolled = list(range(1, min(count, student_count) + 1))
+    enrolled_usernames = [username for username, in Student.query.with_entities(Student.username).
+                          filter(Student.id.in_(enrolled)).order_by(Student.id)]
+
+    # Grades of existing enrollments
+    mappings = CourseStudentMapping.query.join(Student, Student.id == CourseStudentMapping.student_id).\
+        join(Course, Course.id == CourseStudentMapping.course_id).\
+        with_entities(Student.username, Course.name).filter(CourseStudentMapping.course_id != course.id).\
+        order_by(CourseStudentMapping.id).limit(count).all()
+
+    return {
+        'login': {'role': 'student', 'user': None, 'method': 'post', 'path': '/api/login',
+                  'requests': [{'data': {'username': usernames[student_id]}} for student_id in students]},
+        'user': {'role': 'student', 'user': student, 'method': 'get', 'path': '/api/user',
+                 'requests': [{} for _ in range(count)]},
+        'schedule[student]': {'role': 'student', 'user': student, 'method': 'get', 'path': '/api/schedule',
+                              'requests': [{} for _ in range(count)]},
+        'schedule[instructor]': {'role': 'instructor', 'user': instructor, 'method': 'get', 'path': '/api/schedule',
+                                 'requests': [{} for _ in range(count)]},
+        'mapping/grade': {'role': 'instructor', 'user': instructor, 'method': 'put', 'path': '/api/mapping/grade',
+                          'requests': [{'data': {'username': username, 'course_name': course_name,
+                                                 'grade': str(rng.choice((4.0, 3.0, 2.0)))}}
+                                       for username, course_name in mappings]},
+        'mapping': {'role': 'coordinator', 'user': 'coordinator1', 'method': 'post', 'path': '/api/mapping',
+                    'requests': [{'data': {'username': username, 'course_name': BENCHMARK_COURSE}}
+                                 for username in enrolled_usernames]},
+    }
+
+
+def __measure(client, scenario, warmup, cache):
+    """
+    Private function to make the requests of a scenario and measure each one.
+    :param client: the test client of the app for the scenario's role
+    :param scenario: the scenario
+    :param warmup: the number of requests made before measuring
+    :param cache: whether responses are cached between requests
+    :return: dictionary of the latency percentiles (ms), requests per second, queries per request, and errors
+    """
+    if scenario['user'] is not None:
+        client.post('/api/login', data={'username': scenario['user']})
+
+    # Counts every statement sent to the database
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    send = getattr(client, scenario['method'])
+    latencies = []
+    errors = 0
+    measured_queries = 0
+    event.listen(db.engine, 'before_cursor_execute', count_query)
+    try:
+        for index, request in enumerate(scenario['requests']):
+            if not cache:
+                get_response_cache().clear()
+            queries[0] = 0
+            start = time.perf_counter()
+            response = send(scenario['path'], **request)
+            elapsed = time.perf_counter() - start
+            if index < warmup:
+                continue
+            latencies.append(elapsed)
+            measured_queries += queries[0]
+            if response.status_code >= 400:
+                errors += 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_query)
+
+    count = len(latencies)
+    if count == 0:
+        return {'requests': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'requests_per_second': 0.0,
+                'queries_per_request': 0.0, 'errors': 0}
+    latencies.sort()
+    return {'requests': count,
+            'p50_ms': __percentile(latencies, 50), 'p95_ms': __percentile(latencies, 95),
+            'p99_ms': __percentile(latencies, 99),
+            'requests_per_second': round(count / sum(latencies), 1),
+            'queries_per_request': round(measured_queries / count, 2),
+            'errors': errors}
+
+
+def __percentile(latencies, percent):
+    """
+    Private function to get a percentile of the latencies, by the nearest rank.
+    :param latencies: the sorted latencies in seconds
+    :param percent: the percentile
+    :return: the latency at the percentile in milliseconds
+    """
+    rank = max(1, -(-len(latencies) * percent // 100))
+    return round(latencies[int(rank) - 1] * 1000, 3)
+
+
+# If this is run as a python script, calls its main method
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the Course Manager endpoints against a generated dataset "
+                                                 "and compares the results with a baseline. Resets the database.")
+    parser.add_argument('--students', type=int, default=10000, help="the number of generated students")
+    parser.add_argument('--courses', type=int, default=500, help="the number of generated courses")
+    parser.add_argument('--enrollments-per-student', type=int, default=5,
+                        help="the average number of courses each generated student is enrolled in")
+    parser.add_argument('--requests', type=int, default=200, help="the number of measured requests to each endpoint")
+    parser.add_argument('--warmup', type=int, default=20, help="the number of requests made before measuring")
+    parser.add_argument('--seed', type=int, default=316, help="the seed of the generated data and requests")
+    parser.add_argument('--cache', action='store_true', help="keep responses cached between requests")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="the baseline file to compare with")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="the fraction the p95 latency may increase by before it is a regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,42 @@
+import os
+import unittest
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.tests.benchmark.endpoint_benchmark import run_benchmarks, \
+    compare_with_baseline
+
+
+class EndpointBenchmarkTestCase(unittest.TestCase):
+    """
+    Unit tests for the Endpoint Benchmark, run against a small dataset.
+    """
+    def tearDown(self):
+        app = create_app(config_name=os.getenv('FLASK_CONFIG') or 'default')
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_every_endpoint_measured(self):
+        results = run_benchmarks(students=50, courses=10, enrollments_per_student=3, requests=10, warmup=2,
+                                 config=os.getenv('FLASK_CONFIG') or 'default')
+        self.assertEqual(set(results), {'login', 'user', 'schedule[student]', 'schedule[instructor]',
+                                        'mapping/grade', 'mapping'})
+        for name, result in results.items():
+            self.assertEqual(result['requests'], 10, name)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertGreater(result['queries_per_request'], 0, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'], name)
+
+    def test_compare_with_baseline(self):
+        baseline = {'user': {'p95_ms': 2.0, 'queries_per_request': 2.0, 'errors': 0}}
+
+        self.assertEqual(compare_with_baseline({'user': {'p95_ms': 2.4, 'queries_per_request': 2.0, 'errors': 0}},
+                                               baseline), [])
+        self.assertEqual(len(compare_with_baseline({'user': {'p95_ms': 3.0, 'queries_per_request': 2.0,
+                                                             'errors': 0}}, baseline)), 1)
+        self.assertEqual(len(compare_with_baseline({'user': {'p95_ms': 2.0, 'queries_per_request': 3.0,
+                                                             'errors': 1}}, baseline)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
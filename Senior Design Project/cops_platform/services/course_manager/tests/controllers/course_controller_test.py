@@ -1,8 +1,11 @@
+import json
 import unittest
 from datetime import time
 
 from cops_platform.services.course_manager.app import create_app, db
 from cops_platform.services.course_manager.app.models import Student, Course, Instructor, CourseStudentMapping
+from cops_platform.services.course_manager.app.utils.response_cache import get_response_cache
+from cops_platform.services.course_manager.app.utils.gpa_util import get_gpa
 from cops_platform.services.course_manager.tests.db.generate_db import main as reset_database
 
 
@@ -174,6 +177,51 @@ class CourseControllerTestCase(unittest.TestCase):
         response = self.client.get('/api/logout', follow_redirects=True)
         self.assertEqual(response.status, "200 OK")
 
+    def test_bulk_edit_course_grades(self):
+        # Initializes app for testing with instructor role
+        self.setUpCustom('instructor')
+
+        response = self.client.post('/api/login', data=dict(username='instructor'), follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+        course = Course.query.filter_by(name="CSC316").first()
+        for username in ("spencer", "caleb"):
+            student = Student(username=username, name=username)
+            db.session.add(student)
+            db.session.commit()
+            db.session.add(CourseStudentMapping(course_id=course.id, student_id=student.id))
+        db.session.commit()
+
+        # CSV rows are applied, and each row that is not is reported
+        body = "username,grade\nspencer,3.0\ncaleb,abc\nnobody,2.0\nstudent,2.0\n,1.0\n"
+        response = self.client.put('/api/mapping/grade/bulk?course_name=CSC316', data=body, content_type="text/csv")
+        self.assertEqual(response.status, "200 OK")
+        result = response.get_json()
+        self.assertEqual(result["updated"], 2)
+        self.assertEqual([(error["row"], error["status"]) for error in result["errors"]],
+                         [(1, "invalid_grade"), (2, "not_enrolled"), (4, "invalid")])
+
+        # JSON Lines rows are applied, and the students' GPAs follow their new grades
+        body = '{"username": "caleb", "grade": 4}\n["student", "3.5"]\n'
+        response = self.client.put('/api/mapping/grade/bulk?course_name=CSC316', data=body,
+                                   content_type="application/x-ndjson")
+        self.assertEqual(response.get_json(), {"updated": 2, "errors": []})
+
+        grades = dict(CourseStudentMapping.query.join(Student, Student.id == CourseStudentMapping.student_id).
+                      with_entities(Student.username, CourseStudentMapping.grade).
+                      filter(CourseStudentMapping.course_id == course.id))
+        self.assertEqual(grades, {"student": 3.5, "spencer": 3.0, "caleb": 4.0})
+        for username, grade in grades.items():
+            self.assertEqual(get_gpa(Student.query.filter_by(username=username).first().id), grade)
+
+        # A course that does not exist is rejected
+        response = self.client.put('/api/mapping/grade/bulk?course_name=CSC999', data="username,grade\n",
+                                   content_type="text/csv")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/logout', follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
     def test_course_schedule_student(self):
         # Initializes app for testing with coordinator role
         self.setUpCustom('student')
@@ -223,6 +271,61 @@ class CourseControllerTestCase(unittest.TestCase):
 
         self.assertEqual(response.status, "200 OK")
 
+        # Every course is in the schedule, in the order the student enrolled in them
+        schedule = response.get_json()
+        self.assertEqual([course["name"] for course in schedule],
+                         ["CSC316", "course_test1", "course_test2", "course_test3"])
+        self.assertEqual(schedule[0], {"name": "CSC316", "days": "MW", "start_time": "12:30:00",
+                                       "end_time": "02:15:00", "instruct_name": "Instructor", "grade": 4.0})
+        self.assertIsNone(schedule[1]["grade"])
+
+        response = self.client.get('/api/logout', follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+    def test_bulk_enroll_students(self):
+        # Initializes app for testing with coordinator role
+        self.setUpCustom('coordinator')
+
+        response = self.client.post('/api/login', data=dict(username='coordinator'), follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+        for username in ("spencer", "caleb"):
+            db.session.add(Student(username=username, name=username))
+        db.session.commit()
+
+        # Each row of a JSON list gets its own result
+        response = self.client.post('/api/mapping/bulk', json=[
+            {"username": "spencer", "course_name": "CSC316"},
+            ["caleb", "CSC316"],
+            ["student", "CSC316"],
+            ["spencer", "CSC316"],
+            ["nobody", "CSC316"],
+            ["caleb", "CSC999"],
+            {"username": "caleb"}])
+        self.assertEqual(response.status, "200 OK")
+        body = response.get_json()
+        self.assertEqual(body["enrolled"], 2)
+        self.assertEqual([result["status"] for result in body["results"]],
+                         ["enrolled", "enrolled", "already_enrolled", "already_enrolled", "unknown_student",
+                          "unknown_course", "invalid"])
+
+        course = Course.query.filter_by(name="CSC316").first()
+        self.assertEqual(CourseStudentMapping.query.filter_by(course_id=course.id).count(), 3)
+
+        # CSV bodies are read with a header row
+        instructor = Instructor.query.filter_by(username="instructor").first()
+        db.session.add(Course(name="CSC326", days="MW", start_time=time(9, 30), end_time=time(11, 15),
+                              instructor_id=instructor.id))
+        db.session.commit()
+        response = self.client.post('/api/mapping/bulk', data="username,course_name\nspencer,CSC326\ncaleb,CSC326\n",
+                                    content_type="text/csv")
+        self.assertEqual(response.status, "200 OK")
+        self.assertEqual(response.get_json()["enrolled"], 2)
+
+        # A body that is not a list of rows is rejected
+        response = self.client.post('/api/mapping/bulk', json={"username": "spencer"})
+        self.assertEqual(response.status_code, 400)
+
         response = self.client.get('/api/logout', follow_redirects=True)
         self.assertEqual(response.status, "200 OK")
 
@@ -285,6 +388,11 @@ class CourseControllerTestCase(unittest.TestCase):
         db.session.add(mapping6)
         db.session.commit()
 
+        # Course with no students enrolled
+        course = Course(name="CSC401", days="F", start_time=start, end_time=end, instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.commit()
+
         # Logging in to account
         response = self.client.post('/api/login', data=dict(username='instructor'), follow_redirects=True)
         self.assertEqual(response.status, "200 OK")
@@ -293,6 +401,68 @@ class CourseControllerTestCase(unittest.TestCase):
 
         self.assertEqual(response.status, "200 OK")
 
+        # Every course is in the schedule with the names of its students, including the course with no students
+        schedule = {course["name"]: course for course in response.get_json()}
+        self.assertEqual(sorted(schedule), ["CSC316", "CSC326", "CSC331", "CSC401"])
+        self.assertEqual(schedule["CSC316"]["students"], ["Student", "Spencer Yoder"])
+        self.assertEqual(schedule["CSC326"]["students"], ["Spencer Yoder", "Caleb Boswell", "Jeen Shaji"])
+        self.assertEqual(schedule["CSC331"]["students"], ["Spencer Yoder", "Caleb Boswell"])
+        self.assertEqual(schedule["CSC401"], {"name": "CSC401", "days": "F", "start_time": "02:30:00",
+                                              "end_time": "04:15:00", "students": []})
+
+        # The streamed schedule has the same JSON
+        response = self.client.get('/api/schedule?stream=true')
+        self.assertEqual(response.status, "200 OK")
+        self.assertEqual({course["name"]: course for course in json.loads(response.data)}, schedule)
+
+        # The roster of a course is paged through by the id of the last student of each page
+        students = []
+        after = 0
+        while after is not None:
+            response = self.client.get('/api/roster?course_name=CSC326&limit=2&after=' + str(after))
+            self.assertEqual(response.status, "200 OK")
+            page = response.get_json()
+            self.assertLessEqual(len(page["students"]), 2)
+            students.extend(student["name"] for student in page["students"])
+            after = page["next"]
+        self.assertEqual(sorted(students), ["Caleb Boswell", "Jeen Shaji", "Spencer Yoder"])
+
+        response = self.client.get('/api/roster?course_name=CSC401')
+        self.assertEqual(response.get_json()["students"], [])
+
+        # Courses taught by another instructor cannot be viewed
+        response = self.client.get('/api/roster?course_name=CSC999')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/logout', follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+    def test_course_schedule_cache_invalidated(self):
+        # Initializes app for testing with instructor role
+        self.setUpCustom('instructor')
+
+        response = self.client.post('/api/login', data=dict(username='instructor'), follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+        response = self.client.get('/api/schedule')
+        self.assertEqual(response.get_json()[0]["students"], ["Student"])
+
+        # Viewing the schedule again uses the cached schedule
+        response = self.client.get('/api/schedule')
+        self.assertEqual(response.status, "200 OK")
+        self.assertEqual(get_response_cache().stats()['hits'], 1)
+
+        # Enrolling a student in the course invalidates the cached schedule
+        student = Student(username="spencer", name="Spencer Yoder")
+        db.session.add(student)
+        db.session.commit()
+        response = self.client.post('/api/mapping', data=dict(course_name="CSC316", username='spencer'))
+        self.assertEqual(response.status, "200 OK")
+
+        response = self.client.get('/api/schedule')
+        self.assertEqual(response.get_json()[0]["students"], ["Student", "Spencer Yoder"])
+        self.assertEqual(get_response_cache().stats()['hits'], 1)
+
         response = self.client.get('/api/logout', follow_redirects=True)
         self.assertEqual(response.status, "200 OK")
 
@@ -0,0 +1,59 @@
+import unittest
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.tests.db.generate_db import main as reset_database
+
+
+class MetricsControllerTestCase(unittest.TestCase):
+    """
+    Unit tests for the Metrics Controller class.
+    """
+    def setUpCustom(self, role):
+        reset_database()
+        self.app = create_app(config_name='default', role=role)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_metrics(self):
+        self.setUpCustom('student')
+
+        self.client.post('/api/login', data=dict(username='student'))
+        self.client.get('/api/user')
+        self.client.get('/api/user')
+        self.client.get('/api/does_not_exist')
+
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        metrics = response.get_data(as_text=True)
+
+        self.assertIn('course_manager_request_duration_seconds_count{route="/api/user",method="GET"} 2', metrics)
+        self.assertIn('course_manager_request_duration_seconds_bucket{route="/api/user",method="GET",le="+Inf"} 2',
+                      metrics)
+        self.assertIn('course_manager_responses_total{route="/api/login",method="POST",status="200"} 1', metrics)
+        self.assertIn('course_manager_responses_total{route="unmatched",method="GET",status="404"} 1', metrics)
+        # Only the metrics request itself is in flight
+        self.assertIn('course_manager_requests_in_flight 1', metrics)
+        # The second account request is answered from the response cache without any queries
+        self.assertIn('course_manager_request_db_queries_bucket{route="/api/user",method="GET",le="0"} 1', metrics)
+        self.assertIn('course_manager_response_cache_hits_total 1', metrics)
+
+    def test_metrics_does_not_end_session(self):
+        self.setUpCustom('student')
+
+        self.client.post('/api/login', data=dict(username='student'))
+
+        # A request without the session cookie, such as from Prometheus, does not log the user out
+        other_client = self.app.test_client()
+        self.assertEqual(other_client.get('/api/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/api/health_check').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student, Course, CourseStudentMapping
+from cops_platform.services.course_manager.app.utils.query_profiler import profile_queries
+from cops_platform.services.course_manager.tests.db.generate_db import reset_database
+from cops_platform.services.course_manager.tests.db.generate_load_data import generate_load_data
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+    """
+    Query budgets of the main endpoints. The number of statements each request runs must not grow with the
+    amount of data, so every request is checked against a small dataset where an N+1 query would show up.
+    """
+
+    def setUpCustom(self, role):
+        self.app = create_app(config_name='default', role=role)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        reset_database()
+        generate_load_data(students=60, courses=6, enrollments_per_student=4, instructors=1, coordinators=1)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_student_budgets(self):
+        self.setUpCustom('student')
+        self.client.post('/api/login', data=dict(username='student1'))
+
+        with profile_queries() as profile:
+            self.assertEqual(self.client.get('/api/user').status_code, 200)
+        profile.check_budget(max_statements=2)
+
+        with profile_queries() as profile:
+            self.assertEqual(self.client.get('/api/schedule').status_code, 200)
+        profile.check_budget(max_statements=2)
+
+    def test_instructor_budgets(self):
+        self.setUpCustom('instructor')
+        self.client.post('/api/login', data=dict(username='instructor1'))
+
+        # Every generated course and student belongs to this instructor
+        with profile_queries() as profile:
+            self.assertEqual(self.client.get('/api/schedule').status_code, 200)
+        profile.check_budget(max_statements=2)
+
+        with profile_queries() as profile:
+            self.assertEqual(self.client.get('/api/roster', query_string=dict(course_name='CSC100')).status_code,
+                             200)
+        profile.check_budget(max_statements=3)
+
+        mapping = CourseStudentMapping.query.first()
+        username = Student.query.get(mapping.student_id).username
+        course_name = Course.query.get(mapping.course_id).name
+        with profile_queries() as profile:
+            response = self.client.put('/api/mapping/grade', data=dict(username=username, course_name=course_name,
+                                                                       grade='1.5'))
+            self.assertEqual(response.status_code, 200)
+        profile.check_budget(max_statements=6)
+
+    def test_coordinator_budgets(self):
+        self.setUpCustom('coordinator')
+        self.client.post('/api/login', data=dict(username='coordinator1'))
+
+        with profile_queries() as profile:
+            response = self.client.post('/api/user', data=dict(username='new_student', name='New Student',
+                                                               role='student'))
+            self.assertEqual(response.status_code, 200)
+        profile.check_budget(max_statements=2)
+
+        with profile_queries() as profile:
+            response = self.client.post('/api/mapping', data=dict(username='new_student', course_name='CSC100'))
+            self.assertEqual(response.status_code, 200)
+        profile.check_budget(max_statements=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@ import json
 
 from cops_platform.services.course_manager.app import create_app, db
 from cops_platform.services.course_manager.tests.db.generate_db import main as reset_database
-from cops_platform.services.course_manager.app.models import Student, Course, Instructor, CourseStudentMapping
+from cops_platform.services.course_manager.app.models import Student, Course, Instructor, CourseStudentMapping, \
+    Coordinator, StudentGpa
 from datetime import time
 
 
@@ -80,6 +81,40 @@ class UserControllerTestCase(unittest.TestCase):
         response = self.client.get('/api/logout', follow_redirects=True)
         self.assertEqual(response.status, "200 OK")
 
+    def test_bulk_add_users(self):
+        # Initializes app for testing with coordinator role
+        self.setUpCustom('coordinator')
+
+        response = self.client.post('/api/login', data=dict(username='coordinator'), follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
+        # Users are created in the table for their role, and existing users are skipped
+        body = "username,name,role\n" + "".join("student" + str(i) + ",Student " + str(i) + ",student\n"
+                                                 for i in range(5)) + \
+               "teacher,Teacher,instructor\nstudent,Student,student\nstudent0,Student 0,student\nx,X,janitor\n"
+        response = self.client.post('/api/user/bulk', data=body, content_type="text/csv")
+        self.assertEqual(response.status, "200 OK")
+        report = json.loads(response.data)
+        self.assertEqual(report['created'], {"student": 5, "instructor": 1, "coordinator": 0})
+        self.assertEqual(report['skipped'], 2)
+        self.assertEqual([error['row'] for error in report['errors']], [8])
+        self.assertEqual(report['rows'], 9)
+
+        self.assertEqual(Student.query.count(), 6)
+        self.assertIsNotNone(Instructor.query.filter_by(username="teacher").first())
+        # Every new student has GPA totals
+        self.assertEqual(StudentGpa.query.count(), 6)
+
+        # With on_duplicate=fail, a user that already exists fails the whole request and nothing is created
+        body = '["new_coordinator", "New", "coordinator"]\n["teacher", "Teacher", "instructor"]\n'
+        response = self.client.post('/api/user/bulk?on_duplicate=fail', data=body,
+                                    content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(Coordinator.query.filter_by(username="new_coordinator").first())
+
+        response = self.client.get('/api/logout', follow_redirects=True)
+        self.assertEqual(response.status, "200 OK")
+
     def test_delete_user(self):
         # Initializes app for testing with coordinator role
         self.setUpCustom('coordinator')
@@ -16,6 +16,7 @@ functions:
 from cops_platform.services.course_manager.app import create_app, db
 from cops_platform.services.course_manager.app.models import Student, Coordinator, Instructor, CourseStudentMapping, \
     Course
+from cops_platform.services.course_manager.app.utils.migration_util import migrate
 from datetime import time
 import os
 
@@ -40,9 +41,11 @@ def reset_database():
     """
     Resets state of the database by dropping all tables and then recreating them based
     on the db.Model classes in the models package.
+    The new tables already have every index, so every migration is recorded as applied.
     """
     db.drop_all()
     db.create_all()
+    migrate(log=lambda message: None)
 
 
 def add_mock_data():
@@ -95,6 +98,12 @@ def label_all():
     sec_label("column", "course_student_mapping.course_id", "system_u:object_r:course_data_t:s0")
     
     sec_label("column", "course_student_mapping.grade", "system_u:object_r:grade_data_t:s0")
+
+    # The GPA totals are updated along with the grades, so they share the grade's label
+    sec_label("table", "student_gpa", "system_u:object_r:course_data_t:s0")
+    sec_label("column", "student_gpa.student_id", "system_u:object_r:course_data_t:s0")
+    sec_label("column", "student_gpa.grade_sum", "system_u:object_r:grade_data_t:s0")
+    sec_label("column", "student_gpa.graded_count", "system_u:object_r:grade_data_t:s0")
     
     sec_label("table", "coordinator", "system_u:object_r:coordinator_data_t:s0")
     sec_label("column", "coordinator.id", "system_u:object_r:coordinator_data_t:s0")
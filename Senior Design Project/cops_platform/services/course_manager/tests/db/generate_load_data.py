@@ -0,0 +1,279 @@
+"""
+Load Data Generator
+
+This a script for filling the database with a large, realistic set of generated data for load testing,
+such as 200,000 students enrolled in 5,000 courses. The data is generated from a seed, so the same arguments
+always generate the same database.
+
+The generated data follows these distributions:
+    * Some courses are far more popular than others (enrollment follows a Zipf-like distribution)
+    * Each student is enrolled in a varying number of courses around the given average
+    * Most grades are A's and B's, and some enrollments do not have a grade yet (a course in progress)
+    * Each instructor teaches a varying number of courses
+
+The database is reset, then every table is bulk loaded in batches within a single transaction:
+with COPY on Postgres, and with batched multi-row inserts on any other database (SQLite).
+The rows are inserted without the ORM, so the GPA totals of each student are generated along with their grades.
+
+Usage:
+python -m cops_platform.services.course_manager.tests.db.generate_load_data --students 200000 --courses 5000
+--enrollments-per-student 5 [--instructors 1500] [--coordinators 10] [--seed 316] [--batch-size 10000]
+
+This file can also be imported as a module and contains the following
+functions:
+    * generate_load_data - fills the database of the current app with generated data
+    * main - resets the database, fills it with generated data, and prints the report
+"""
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student, Coordinator, Instructor, \
+    CourseStudentMapping, Course, StudentGpa
+from cops_platform.services.course_manager.tests.db.generate_db import reset_database, label_all
+from datetime import time as time_of_day
+import argparse
+import csv
+import io
+import os
+import random
+import time
+
+FIRST_NAMES = ("James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Wei", "Priya",
+               "Mohammed", "Fatima", "Carlos", "Sofia", "Hiroshi", "Yuki", "Kwame", "Amara", "Ivan", "Olga")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Lee", "Chen",
+              "Wang", "Patel", "Kim", "Nguyen", "Singh", "Khan", "Ali", "Okafor", "Ivanova", "Tanaka")
+DEPARTMENTS = ("CSC", "MA", "ST", "PY", "CH", "BIO", "ECE", "MAE", "ENG", "HI", "PSY", "EC")
+
+# The meeting days of a course, and how often each is used
+DAYS = ("MW", "TH", "MWF", "T", "H", "F")
+DAYS_WEIGHTS = (30, 35, 20, 5, 5, 5)
+
+# The grades given, and how often each is given
+GRADES = (4.0, 3.7, 3.3, 3.0, 2.7, 2.3, 2.0, 1.7, 1.0, 0.0)
+GRADE_WEIGHTS = (25, 12, 12, 14, 9, 7, 7, 4, 5, 5)
+# Fraction of the enrollments that do not have a grade yet
+UNGRADED_FRACTION = 0.15
+
+# Exponent of the Zipf-like distribution of course popularity (0 is every course equally popular)
+POPULARITY_EXPONENT = 0.8
+
+
+def generate_load_data(students, courses, enrollments_per_student, instructors=None, coordinators=10, seed=316,
+                       batch_size=10000):
+    """
+    Fills the empty database of the current app with generated data, within a single transaction.
+    :param students: the number of students
+    :param courses: the number of courses
+    :param enrollments_per_student: the average number of courses each student is enrolled in
+    :param instructors: the number of instructors, defaults to one for every three courses
+    :param coordinators: the number of coordinators
+    :param seed: the seed of the random data
+    :param batch_size: the maximum number of rows loaded together
+    :return: dictionary of the number of rows loaded into each table, and the number of seconds it took
+    """
+    rng = random.Random(seed)
+    instructors = instructors or max(1, courses // 3)
+    counts = {}
+    start = time.monotonic()
+
+    with db.engine.begin() as connection:
+        __load(connection, Coordinator.__table__, ((i, "coordinator" + str(i), __full_name(rng))
+                                                   for i in range(1, coordinators + 1)), batch_size, counts)
+        __load(connection, Instructor.__table__, ((i, "instructor" + str(i), __full_name(rng))
+                                                  for i in range(1, instructors + 1)), batch_size, counts)
+        __load(connection, Course.__table__, __course_rows(rng, courses, instructors), batch_size, counts)
+
+        # Each batch of students is loaded along with their GPA totals and their enrollments
+        choose_courses = __course_chooser(rng, courses)
+        mapping_id = 0
+        for first in range(1, students + 1, batch_size):
+            student_rows, gpa_rows, mapping_rows = [], [], []
+            for student_id in range(first, min(first + batch_size, students + 1)):
+                # The gpa column is left empty, the GPA of a student is calculated from their totals
+                student_rows.append((student_id, "student" + str(student_id), __full_name(rng), None))
+                grade_sum, graded_count = 0.0, 0
+                for course_id in choose_courses(__enrollment_count(rng, enrollments_per_student)):
+                    grade = None if rng.random() < UNGRADED_FRACTION else \
+                        rng.choices(GRADES, weights=GRADE_WEIGHTS)[0]
+                    if grade is not None:
+                        grade_sum += grade
+                        graded_count += 1
+                    mapping_id += 1
+                    mapping_rows.append((mapping_id, student_id, course_id, grade))
+                gpa_rows.append((student_id, grade_sum, graded_count))
+            __load(connection, Student.__table__, student_rows, batch_size, counts)
+            __load(connection, StudentGpa.__table__, gpa_rows, batch_size, counts)
+            __load(connection, CourseStudentMapping.__table__, mapping_rows, batch_size, counts)
+
+        # The ids were inserted explicitly, so each Postgres sequence continues from the largest one
+        if connection.dialect.name == 'postgresql':
+            for table in ('coordinator', 'instructor', 'course', 'student', 'course_student_mapping'):
+                connection.execute("SELECT setval(pg_get_serial_sequence('" + table + "', 'id'), "
+                                   "(SELECT COALESCE(MAX(id), 1) FROM " + table + "))")
+
+    return {"rows": counts, "seconds": round(time.monotonic() - start, 2)}
+
+
+def main(students, courses, enrollments_per_student, instructors=None, coordinators=10, seed=316, batch_size=10000,
+         config='default'):
+    """
+    Creates a new instance of the app, resets the database, and fills it with generated data.
+    :return: the report of generate_load_data
+    """
+    app = create_app(config)
+    app_context = app.app_context()
+    app_context.push()
+    try:
+        reset_database()
+        report = generate_load_data(students, courses, enrollments_per_student, instructors, coordinators, seed,
+                                    batch_size)
+
+        # Only labels the database if the enforced SELinux env is set
+        if os.getenv("ENFORCED"):
+            label_all()
+        return report
+    finally:
+        db.session.remove()
+        app_context.pop()
+
+
+def __full_name(rng):
+    """
+    Private function to generate a full name.
+    :param rng: the random number generator
+    :return: the name
+    """
+    return rng.choice(FIRST_NAMES) + " " + rng.choice(LAST_NAMES)
+
+
+def __course_rows(rng, courses, instructors):
+    """
+    Private function to generate the rows of the course table.
+    Each instructor is picked with a random weight, so some teach many courses and others teach only one.
+    :param rng: the random number generator
+    :param courses: the number of courses
+    :param instructors: the number of instructors
+    :return: generator of (id, name, days, start_time, end_time, instructor_id) tuples
+    """
+    instructor_weights = [rng.uniform(0.5, 2.0) for _ in range(instructors)]
+    for course_id in range(1, courses + 1):
+        # Unique course names, ex: CSC100, MA100, ..., CSC101
+        index = course_id - 1
+        name = DEPARTMENTS[index % len(DEPARTMENTS)] + str(100 + index // len(DEPARTMENTS))
+        days = rng.choices(DAYS, weights=DAYS_WEIGHTS)[0]
+        # Starts on the half hour between 8:00 and 18:30, and lasts 50 or 75 minutes
+        start_minutes = 8 * 60 + 30 * rng.randrange(22)
+        end_minutes = start_minutes + rng.choice((50, 75))
+        instructor_id = rng.choices(range(1, instructors + 1), weights=instructor_weights)[0]
+        yield (course_id, name, days, time_of_day(start_minutes // 60, start_minutes % 60),
+               time_of_day(end_minutes // 60, end_minutes % 60), instructor_id)
+
+
+def __course_chooser(rng, courses):
+    """
+    Private function to create a function that picks distinct courses, with some courses far more popular than others.
+    :param rng: the random number generator
+    :param courses: the number of courses
+    :return: function taking a number of courses and returning a list of that many distinct course ids
+    """
+    # The popularity rank of each course is shuffled so the popular courses are spread across the ids
+    ranks = list(range(1, courses + 1))
+    rng.shuffle(ranks)
+    cumulative_weights = []
+    total = 0.0
+    for rank in ranks:
+        total += 1 / rank ** POPULARITY_EXPONENT
+        cumulative_weights.append(total)
+    course_ids = range(1, courses + 1)
+
+    def choose(count):
+        count = min(count, courses)
+        chosen = []
+        while len(chosen) < count:
+            for course_id in rng.choices(course_ids, cum_weights=cumulative_weights, k=count - len(chosen)):
+                if course_id not in chosen:
+                    chosen.append(course_id)
+        return chosen[:count]
+
+    return choose
+
+
+def __enrollment_count(rng, average):
+    """
+    Private function to pick the number of courses a student is enrolled in.
+    :param rng: the random number generator
+    :param average: the average number of courses
+    :return: a number between half and one and a half times the average, at least 1
+    """
+    spread = average // 2
+    return max(1, rng.randint(average - spread, average + spread))
+
+
+def __load(connection, table, rows, batch_size, counts):
+    """
+    Private function to bulk load rows into a table in batches.
+    Uses COPY on Postgres, and multi-row inserts on any other database.
+    :param connection: the connection of the transaction
+    :param table: the table to load the rows into
+    :param rows: iterable of tuples with a value for each column of the table, in order
+    :param batch_size: the maximum number of rows loaded together
+    :param counts: dictionary of the number of rows loaded into each table, which is updated
+    :raises ValueError: if a row does not have a value for each column
+    """
+    columns = [column.name for column in table.columns]
+    batch = []
+    for row in rows:
+        # Inserts would leave a missing value empty, but COPY rejects the row, so both fail the same way
+        if len(row) != len(columns):
+            raise ValueError("Row of " + table.name + " has " + str(len(row)) + " values, expected one for each of "
+                             "its columns: " + ", ".join(columns))
+        batch.append(row)
+        if len(batch) >= batch_size:
+            __load_batch(connection, table, columns, batch)
+            counts[table.name] = counts.get(table.name, 0) + len(batch)
+            batch = []
+    if batch:
+        __load_batch(connection, table, columns, batch)
+        counts[table.name] = counts.get(table.name, 0) + len(batch)
+
+
+def __load_batch(connection, table, columns, batch):
+    """
+    Private function to load a single batch of rows into a table.
+    :param connection: the connection of the transaction
+    :param table: the table to load the rows into
+    :param columns: the names of the columns of the table, in order
+    :param batch: list of tuples with a value for each column
+    """
+    if connection.dialect.name == 'postgresql':
+        # An unquoted empty CSV value is loaded as NULL
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert("COPY " + table.name + " (" + ", ".join(columns) + ") FROM STDIN WITH (FORMAT csv)",
+                               buffer)
+        finally:
+            cursor.close()
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in batch])
+
+
+# If this is run as a python script, calls its main method
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fills the Course Manager database with generated data for load "
+                                                 "testing. Resets the database first.")
+    parser.add_argument('--students', type=int, default=1000, help="the number of students")
+    parser.add_argument('--courses', type=int, default=100, help="the number of courses")
+    parser.add_argument('--enrollments-per-student', type=int, default=5,
+                        help="the average number of courses each student is enrolled in")
+    parser.add_argument('--instructors', type=int, help="the number of instructors, defaults to courses / 3")
+    parser.add_argument('--coordinators', type=int, default=10, help="the number of coordinators")
+    parser.add_argument('--seed', type=int, default=316, help="the seed of the generated data")
+    parser.add_argument('--batch-size', type=int, default=10000, help="the number of rows loaded together")
+    arguments = parser.parse_args()
+
+    print(main(arguments.students, arguments.courses, arguments.enrollments_per_student, arguments.instructors,
+               arguments.coordinators, arguments.seed, arguments.batch_size, os.getenv('FLASK_CONFIG') or 'default'))
@@ -0,0 +1,119 @@
+import csv
+import io
+import os
+import re
+import unittest
+from types import SimpleNamespace
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student, Course, CourseStudentMapping, StudentGpa
+from cops_platform.services.course_manager.tests.db import generate_load_data as load_data
+from cops_platform.services.course_manager.tests.db.generate_load_data import generate_load_data
+
+
+class FakeCursor:
+    """
+    Cursor that records the COPY statements and the CSV rows copied with each one.
+    """
+    def __init__(self, copies):
+        self.copies = copies
+
+    def copy_expert(self, statement, buffer):
+        self.copies.append((statement, list(csv.reader(io.StringIO(buffer.read())))))
+
+    def close(self):
+        pass
+
+
+class FakePostgresConnection:
+    """
+    Connection to Postgres that records the COPY statements instead of running them.
+    """
+    def __init__(self):
+        self.dialect = SimpleNamespace(name='postgresql')
+        self.copies = []
+        self.connection = SimpleNamespace(cursor=lambda: FakeCursor(self.copies))
+
+    def execute(self, statement):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class GenerateLoadDataTestCase(unittest.TestCase):
+    """
+    Unit tests for the Load Data Generator.
+    """
+    def setUp(self):
+        app_config = os.getenv('FLASK_CONFIG') or 'default'
+        self.app = create_app(config_name=app_config)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def generate(self, seed):
+        db.drop_all()
+        db.create_all()
+        generate_load_data(students=200, courses=20, enrollments_per_student=4, seed=seed, batch_size=64)
+        return [tuple(row) for row in CourseStudentMapping.query.with_entities(
+            CourseStudentMapping.student_id, CourseStudentMapping.course_id, CourseStudentMapping.grade).
+            order_by(CourseStudentMapping.id)]
+
+    def test_generated_data(self):
+        report = generate_load_data(students=200, courses=20, enrollments_per_student=4, batch_size=64)
+        self.assertEqual(report["rows"]["student"], 200)
+        self.assertEqual(report["rows"]["course"], 20)
+        self.assertEqual(Student.query.count(), 200)
+        self.assertEqual(StudentGpa.query.count(), 200)
+        self.assertEqual(Course.query.count(), 20)
+
+        # Every student has between 2 and 6 distinct courses
+        for student in Student.query:
+            course_ids = [mapping.course_id for mapping in CourseStudentMapping.query.filter_by(student_id=student.id)]
+            self.assertTrue(2 <= len(course_ids) <= 6)
+            self.assertEqual(len(course_ids), len(set(course_ids)))
+
+        # The GPA totals match the generated grades
+        for totals in StudentGpa.query:
+            grades = [mapping.grade for mapping in CourseStudentMapping.query.filter_by(student_id=totals.student_id)
+                      if mapping.grade is not None]
+            self.assertEqual(totals.graded_count, len(grades))
+            self.assertAlmostEqual(totals.grade_sum, sum(grades))
+
+    def test_copy_has_value_for_each_column(self):
+        connection = FakePostgresConnection()
+        original = load_data.db
+        load_data.db = SimpleNamespace(engine=SimpleNamespace(begin=lambda: connection))
+        try:
+            report = generate_load_data(students=50, courses=10, enrollments_per_student=3, batch_size=16)
+        finally:
+            load_data.db = original
+
+        copied = {}
+        for statement, rows in connection.copies:
+            table, columns = re.match(r"COPY (\w+) \((.*)\) FROM STDIN", statement).groups()
+            columns = columns.split(", ")
+            self.assertEqual(columns, [column.name for column in db.metadata.tables[table].columns])
+            for row in rows:
+                self.assertEqual(len(row), len(columns))
+            copied[table] = copied.get(table, 0) + len(rows)
+        self.assertEqual(copied, report["rows"])
+        self.assertEqual(copied["student"], 50)
+
+    def test_same_seed_same_data(self):
+        self.assertEqual(self.generate(1), self.generate(1))
+        self.assertNotEqual(self.generate(1), self.generate(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+User Provisioner
+
+This a script for creating many users at once from a file, such as when onboarding a new term.
+The file is either CSV with a "username,name,role" header row, or JSON Lines (a ".jsonl" or ".ndjson" file)
+with a {"username", "name", "role"} object or [username, name, role] list on each line.
+The file is read in batches, so it is never held in memory all at once, and every user is created in one transaction.
+
+Usage:
+python -m cops_platform.services.course_manager.tests.db.provision_users users.csv [--on-duplicate skip|fail]
+[--batch-size 500]
+
+This file can also be imported as a module and contains the following
+functions:
+    * main - creates the users from the file and prints the report
+"""
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.utils.bulk_util import read_lines
+from cops_platform.services.course_manager.app.utils.provision_util import provision_users, DuplicateUserError, \
+    ON_DUPLICATE_SKIP, ON_DUPLICATE_FAIL
+import argparse
+import os
+import sys
+
+
+def main(path, config='default', on_duplicate=ON_DUPLICATE_SKIP, batch_size=None):
+    """
+    Creates a new instance of the app and creates a user for each row of the file.
+    Nothing is created if the file has a user that already exists and on_duplicate is 'fail'.
+    :param path: the path of the CSV or JSON Lines file
+    :param config: the config of the app
+    :param on_duplicate: 'skip' to skip rows for users that already exist, 'fail' to stop without creating any users
+    :param batch_size: the maximum number of rows inserted together, defaults to the app's BULK_BATCH_SIZE
+    :return: the ProvisionReport
+    """
+    app = create_app(config)
+    app_context = app.app_context()
+    app_context.push()
+    try:
+        json_lines = os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson')
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = read_lines(file, ('username', 'name', 'role'), json_lines=json_lines)
+            report, _ = provision_users(rows, batch_size or app.config['BULK_BATCH_SIZE'], on_duplicate)
+        db.session.commit()
+        return report
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.remove()
+        app_context.pop()
+
+
+# If this is run as a python script, calls its main method
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Creates Course Manager users from a CSV or JSON Lines file.")
+    parser.add_argument('path', help="the CSV or JSON Lines file of (username, name, role) rows")
+    parser.add_argument('--on-duplicate', choices=(ON_DUPLICATE_SKIP, ON_DUPLICATE_FAIL), default=ON_DUPLICATE_SKIP,
+                        help="whether users that already exist are skipped, or stop the whole file from being added")
+    parser.add_argument('--batch-size', type=int, help="the number of rows inserted together")
+    arguments = parser.parse_args()
+
+    try:
+        print(main(arguments.path, os.getenv('FLASK_CONFIG') or 'default', arguments.on_duplicate,
+                   arguments.batch_size))
+    except DuplicateUserError as error:
+        print("No users were added. " + str(error))
+        sys.exit(1)
@@ -0,0 +1,94 @@
+import unittest
+from datetime import time
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student, Instructor, Course, CourseStudentMapping, \
+    StudentGpa
+from cops_platform.services.course_manager.app.utils.gpa_util import get_gpa, rebuild_gpa
+import os
+
+
+class StudentGpaTestCase(unittest.TestCase):
+    """
+    Unit tests for the Student GPA Model class and GPA Utils.
+    """
+    def setUp(self):
+        app_config = os.getenv('FLASK_CONFIG') or 'default'
+        self.app = create_app(config_name=app_config)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.drop_all()
+        db.create_all()
+
+        instructor = Instructor(username="instructor", name="Instructor")
+        self.student = Student(username="student", name="Student")
+        db.session.add_all([instructor, self.student])
+        db.session.commit()
+
+        self.courses = [Course(name="CSC" + str(i), days="MW", start_time=time(9, 30), end_time=time(11, 15),
+                               instructor_id=instructor.id) for i in range(3)]
+        db.session.add_all(self.courses)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def enroll(self, course, grade=None):
+        mapping = CourseStudentMapping(student_id=self.student.id, course_id=course.id, grade=grade)
+        db.session.add(mapping)
+        db.session.commit()
+        return mapping
+
+    def test_new_student_has_empty_totals(self):
+        totals = StudentGpa.query.filter_by(student_id=self.student.id).first()
+        self.assertEqual(totals.grade_sum, 0.0)
+        self.assertEqual(totals.graded_count, 0)
+        self.assertEqual(get_gpa(self.student.id), 0.0)
+
+    def test_totals_follow_grade_changes(self):
+        mapping0 = self.enroll(self.courses[0], grade="4.0")
+        mapping1 = self.enroll(self.courses[1])
+        self.assertEqual(get_gpa(self.student.id), 4.0)
+
+        # Grading a course adds to the totals
+        mapping1.grade = 2.0
+        db.session.commit()
+        self.assertEqual(get_gpa(self.student.id), 3.0)
+
+        # Changing a grade after the mapping has been expired replaces the previous grade
+        db.session.expire_all()
+        mapping0 = CourseStudentMapping.query.get(mapping0.id)
+        mapping0.grade = 3.0
+        db.session.commit()
+        self.assertEqual(get_gpa(self.student.id), 2.5)
+
+        # Removing a grade removes it from the totals
+        mapping0.grade = None
+        db.session.commit()
+        self.assertEqual(get_gpa(self.student.id), 2.0)
+
+        # Deleting a course removes the grades of its mappings
+        db.session.delete(Course.query.get(self.courses[1].id))
+        db.session.commit()
+        self.assertEqual(get_gpa(self.student.id), 0.0)
+
+    def test_totals_deleted_with_student(self):
+        self.enroll(self.courses[0], grade=4.0)
+        db.session.delete(self.student)
+        db.session.commit()
+        self.assertEqual(StudentGpa.query.count(), 0)
+
+    def test_rebuild_fixes_drift(self):
+        self.enroll(self.courses[0], grade=4.0)
+        self.enroll(self.courses[1], grade=3.0)
+        self.enroll(self.courses[2])
+
+        # Grades changed without the ORM do not update the totals
+        db.session.execute(CourseStudentMapping.__table__.update().values(grade=1.0))
+        db.session.commit()
+        self.assertEqual(get_gpa(self.student.id), 3.5)
+
+        self.assertEqual(rebuild_gpa(), 1)
+        self.assertEqual(get_gpa(self.student.id), 1.0)
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from cops_platform.services.course_manager.app.utils import logging_util
+from cops_platform.services.course_manager.app.utils.logging_util import get_module_logger, init_logging, \
+    shutdown_logging
+
+
+def logging_config(**settings):
+    """
+    Builds the LOG_* settings of a config, with the given settings replacing the defaults.
+    """
+    config = {'LOG_LEVEL': 'DEBUG', 'LOG_FORMAT': 'text', 'LOG_FILE': None, 'LOG_FILE_MAX_BYTES': 10 * 1024 * 1024,
+              'LOG_FILE_BACKUPS': 5, 'LOG_QUEUE_SIZE': 10000}
+    config.update(settings)
+    return config
+
+
+class LoggingUtilTestCase(unittest.TestCase):
+    """
+    Unit tests for the Logging Util.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'logs', 'course_manager.log')
+
+    def tearDown(self):
+        # Goes back to logging to the console as text
+        init_logging(logging_config())
+        self.directory.cleanup()
+
+    def read_lines(self):
+        # Writes every queued line to the file before reading it
+        shutdown_logging()
+        with open(self.log_file) as log:
+            return log.read().splitlines()
+
+    def test_handler_added_once(self):
+        init_logging(logging_config(LOG_FILE=self.log_file))
+        for _ in range(3):
+            logger = get_module_logger('logging_util_test.once')
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIs(logger.handlers[0], get_module_logger('logging_util_test.other').handlers[0])
+
+        logger.info("Logged %s time", "one")
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn("INFO", lines[0])
+        self.assertTrue(lines[0].endswith("Logged one time"))
+
+    def test_json_lines_with_exception(self):
+        init_logging(logging_config(LOG_FILE=self.log_file, LOG_FORMAT='json', LOG_LEVEL='info'))
+        logger = get_module_logger('logging_util_test.json')
+        logger.debug("Not logged below the level")
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            logger.exception("Request failed for %s", "student")
+
+        lines = [json.loads(line) for line in self.read_lines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['message'], "Request failed for student")
+        self.assertEqual(lines[0]['level'], "ERROR")
+        self.assertEqual(lines[0]['logger'], 'logging_util_test.json')
+        self.assertIn("ValueError: bad value", lines[0]['exception'])
+
+    def test_unknown_level_falls_back(self):
+        init_logging(logging_config(LOG_FILE=self.log_file, LOG_LEVEL='verbose'))
+        get_module_logger('logging_util_test.level').debug("Logged at the default level")
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("WARNING", lines[0])
+        self.assertIn("Unknown LOG_LEVEL verbose", lines[0])
+        self.assertTrue(lines[1].endswith("Logged at the default level"))
+
+    def test_file_rotated(self):
+        init_logging(logging_config(LOG_FILE=self.log_file, LOG_FILE_MAX_BYTES=1000, LOG_FILE_BACKUPS=2))
+        logger = get_module_logger('logging_util_test.rotated')
+        for i in range(100):
+            logger.info("Line %d of the rotated file", i)
+        shutdown_logging()
+
+        files = sorted(os.listdir(os.path.dirname(self.log_file)))
+        self.assertEqual(files, ['course_manager.log', 'course_manager.log.1', 'course_manager.log.2'])
+        for name in files:
+            self.assertLessEqual(os.path.getsize(os.path.join(os.path.dirname(self.log_file), name)), 1000)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        logger = get_module_logger('logging_util_test.full')
+        init_logging(logging_config(LOG_QUEUE_SIZE=5))
+        # No listener is running, so nothing is taken off the queue
+        shutdown_logging()
+        handler = logging_util.HANDLER
+        dropped = handler.dropped
+
+        start = time.monotonic()
+        for i in range(20):
+            logger.log(logging.INFO, "Line %d", i)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(handler.dropped - dropped, 20 - 5)
+        # Empties the queue so the lines are not written by the next listener
+        while not handler.queue.empty():
+            handler.queue.get_nowait()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import unittest
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.utils.migration_util import migrate, get_current_version, \
+    get_pending_migrations, MIGRATIONS
+from cops_platform.services.course_manager.app.utils.scan_util import check_sequential_scans
+
+
+class MigrationUtilTestCase(unittest.TestCase):
+    """
+    Unit tests for the Migration Utils and the sequential scan check.
+    """
+    def setUp(self):
+        app_config = os.getenv('FLASK_CONFIG') or 'default'
+        self.app = create_app(config_name=app_config)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def drop_hot_path_indexes(self):
+        # Recreates the state of a database created before the indexes were declared
+        for migration in MIGRATIONS:
+            for operation in migration.operations:
+                db.engine.execute("DROP INDEX IF EXISTS " + operation.name)
+
+    def test_migrate_adds_indexes(self):
+        self.drop_hot_path_indexes()
+        self.assertEqual(get_current_version(), 0)
+        self.assertNotEqual(check_sequential_scans(), [])
+
+        applied = migrate(log=lambda message: None)
+        self.assertEqual(applied, [migration.version for migration in MIGRATIONS])
+        self.assertEqual(get_current_version(), MIGRATIONS[-1].version)
+        self.assertEqual(get_pending_migrations(), [])
+        self.assertEqual(check_sequential_scans(), [])
+
+        # Migrating again does nothing
+        self.assertEqual(migrate(log=lambda message: None), [])
+
+    def test_migrate_new_database(self):
+        # The indexes declared on the models already exist, so the migrations only record their versions
+        self.assertEqual(check_sequential_scans(), [])
+        migrate(log=lambda message: None)
+        self.assertEqual(get_current_version(), MIGRATIONS[-1].version)
@@ -0,0 +1,65 @@
+import os
+import unittest
+
+from cops_platform.services.course_manager.app import create_app, db
+from cops_platform.services.course_manager.app.models import Student
+from cops_platform.services.course_manager.app.utils.query_profiler import profile_queries, shape_of, \
+    QueryBudgetExceeded
+
+
+class QueryProfilerTestCase(unittest.TestCase):
+    """
+    Unit tests for the Query Profiler.
+    """
+    def setUp(self):
+        app_config = os.getenv('FLASK_CONFIG') or 'default'
+        self.app = create_app(config_name=app_config)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.drop_all()
+        db.create_all()
+        for i in range(10):
+            db.session.add(Student(username='student' + str(i), name='Student'))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_shape_collapses_parameters(self):
+        self.assertEqual(shape_of("SELECT *\n  FROM student WHERE id IN (?, ?, ?)"),
+                         "SELECT * FROM student WHERE id IN (?)")
+        self.assertEqual(shape_of("SELECT * FROM student WHERE id IN (%(id_1)s, %(id_2)s)"),
+                         "SELECT * FROM student WHERE id IN (?)")
+
+    def test_n_plus_one_detected(self):
+        with profile_queries() as profile:
+            for i in range(10):
+                Student.query.filter_by(username='student' + str(i)).first()
+        self.assertEqual(profile.count, 10)
+        self.assertGreater(profile.total_time, 0)
+        self.assertEqual(len(profile.slowest), 3)
+        self.assertEqual(profile.n_plus_one()[0][0], 10)
+        with self.assertRaises(QueryBudgetExceeded):
+            profile.check_budget()
+        profile.check_budget(max_statements=10, allow_n_plus_one=True)
+
+        # The same students with a single query
+        with profile_queries() as profile:
+            Student.query.filter(Student.username.in_(['student' + str(i) for i in range(10)])).all()
+        profile.check_budget(max_statements=1)
+
+    def test_nested_profiles(self):
+        with profile_queries() as outer:
+            Student.query.first()
+            with profile_queries() as inner:
+                Student.query.first()
+        self.assertEqual(outer.count, 2)
+        self.assertEqual(inner.count, 1)
+        with self.assertRaises(QueryBudgetExceeded):
+            outer.check_budget(max_statements=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from cops_platform.services.course_manager.app.utils.response_cache import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """
+    Unit tests for the Response Cache.
+    """
+
+    def test_hit_until_dependency_bumped(self):
+        cache = ResponseCache(max_size=10, ttl=60)
+        key = ('student', 'student', 'schedule')
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, ['schedule'], [('user', 'student'), ('courses',)], cache.current_version())
+        self.assertEqual(cache.get(key), ['schedule'])
+
+        # Changes to data the response was not built from do not invalidate it
+        cache.bump(('user', 'other'), ('course', 1))
+        self.assertEqual(cache.get(key), ['schedule'])
+
+        cache.bump(('courses',))
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 2, 'evictions': 0, 'size': 0})
+
+    def test_change_while_building_invalidates(self):
+        cache = ResponseCache(max_size=10, ttl=60)
+        key = ('student', 'student', 'user')
+
+        # The version is taken before the database is read, and a change is committed before the response is cached
+        version = cache.current_version()
+        cache.bump(('user', 'student'))
+        cache.put(key, {'gpa': 4.0}, [('user', 'student')], version)
+        self.assertIsNone(cache.get(key))
+
+    def test_least_recently_used_evicted(self):
+        cache = ResponseCache(max_size=2, ttl=60)
+        for name in ('a', 'b'):
+            cache.put(('student', name, 'user'), name, [], cache.current_version())
+        cache.get(('student', 'a', 'user'))
+        cache.put(('student', 'c', 'user'), 'c', [], cache.current_version())
+
+        self.assertIsNone(cache.get(('student', 'b', 'user')))
+        self.assertEqual(cache.get(('student', 'a', 'user')), 'a')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_expired_response_not_used(self):
+        cache = ResponseCache(max_size=10, ttl=0.05)
+        cache.put(('student', 'a', 'user'), 'a', [], cache.current_version())
+        time.sleep(0.1)
+        self.assertIsNone(cache.get(('student', 'a', 'user')))